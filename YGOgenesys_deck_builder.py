@@ -1,45 +1,682 @@
 import sys
-import json
 import os
 import locale
+import time
+from contextlib import contextmanager
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QLineEdit, QLabel, QSplitter, QFileDialog, QSpinBox,
-    QMenuBar, QMenu, QListWidget, QListWidgetItem, QMessageBox,
-    QPushButton, QGroupBox, QComboBox
+    QMenuBar, QMenu, QListWidget, QListWidgetItem, QListView, QMessageBox,
+    QPushButton, QGroupBox, QComboBox, QInputDialog, QDialog, QTableWidget, QTableWidgetItem, QHeaderView, QCheckBox,
+    QTreeWidget, QTreeWidgetItem
 )
 from PySide6.QtGui import (
-    QPixmap, QAction, QIcon, QActionGroup, QPainter, QFont, QColor
+    QPixmap, QAction, QIcon, QActionGroup, QPainter, QFont, QColor, QImage, QImageReader, QKeySequence
 )
-from PySide6.QtCore import Qt, QSize, QRect
+from PySide6.QtCore import (
+    Qt, QSize, QRect, QTimer, QAbstractListModel, QModelIndex, QItemSelectionModel,
+    QObject, QRunnable, QThreadPool, Signal, QFileSystemWatcher
+)
+
+import deck_sim
+import deck_codec
+import deck_journal
+from card_table import CardTable, rename_records
+import genesys_rules
+import point_list
+from profiler import PROFILER
+
+class CardListModel(QAbstractListModel):
+    # Exposes the current search result (a list of cids) to the browser view without per-card items.
+    def __init__(self, all_cards, name_key, parent=None):
+        super().__init__(parent)
+        self.all_cards = all_cards
+        self.name_key = name_key
+        self.cids = []
+        self.row_of_cid = {}
+        self.colors = {}
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.cids)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid(): return None
+        cid = self.cids[index.row()]
+        if role == Qt.DisplayRole:
+            record = self.all_cards.get(cid)
+            return record.name if record else "Unknown Card"
+        if role == Qt.UserRole: return cid
+        if role == Qt.ForegroundRole: return self.colors.get(cid)
+        return None
+
+    def set_cids(self, cids):
+        self.beginResetModel(); self.cids = cids; self.row_of_cid = {cid: row for row, cid in enumerate(cids)}; self.endResetModel()
+
+    def set_name_key(self, name_key):
+        # The records already carry the new names; only the view needs repainting.
+        self.name_key = name_key
+        if self.cids: self.dataChanged.emit(self.index(0), self.index(len(self.cids) - 1), [Qt.DisplayRole])
+
+    def set_color(self, cid, color):
+        # Per-card text colour, used to show optimizer marks.
+        if color is None: self.colors.pop(cid, None)
+        else: self.colors[cid] = color
+        row = self.row_of(cid)
+        if row is not None: self.dataChanged.emit(self.index(row), self.index(row), [Qt.ForegroundRole])
+
+    def row_of(self, cid):
+        return self.row_of_cid.get(cid)
+
+class DeckIconCache:
+    # Finished deck icons (scaled art with the point overlay). Hits come from an in-memory LRU;
+    # misses are served from pre-scaled PNGs under pics/.thumbs, and only decode the full JPEG
+    # when the thumbnail is missing or older than the source image.
+    def __init__(self, icon_size, pics_dir="pics", capacity=512):
+        self.icon_size = icon_size
+        self.pics_dir = pics_dir
+        self.thumb_dir = os.path.join(pics_dir, ".thumbs")
+        self.capacity = capacity
+        self.icons = OrderedDict()
+
+    def icon(self, card_id, point_cost):
+        key = (card_id, point_cost, self.icon_size.width(), self.icon_size.height())
+        source_mtime = self.source_mtime(card_id)
+        entry = self.icons.get(key)
+        if entry is not None and entry[1] == source_mtime:
+            self.icons.move_to_end(key); return entry[0]
+        icon = QIcon(self.load_pixmap(card_id, point_cost, source_mtime))
+        self.icons[key] = (icon, source_mtime); self.icons.move_to_end(key)
+        if len(self.icons) > self.capacity: self.icons.popitem(last=False)
+        return icon
+
+    def source_mtime(self, card_id):
+        try: return os.stat(os.path.join(self.pics_dir, f"{card_id}.jpg")).st_mtime_ns
+        except OSError: return None
+
+    def thumb_path(self, card_id, point_cost):
+        return os.path.join(self.thumb_dir, f"{card_id}_{self.icon_size.width()}x{self.icon_size.height()}_p{point_cost}.png")
+
+    def load_pixmap(self, card_id, point_cost, source_mtime):
+        PROFILER.count("icon_pixmap_loads")
+        if source_mtime is None: return self.compose(QPixmap(), point_cost)
+        thumb_path = self.thumb_path(card_id, point_cost)
+        try:
+            if os.stat(thumb_path).st_mtime_ns >= source_mtime:
+                pixmap = QPixmap(thumb_path)
+                if not pixmap.isNull(): return pixmap
+        except OSError: pass
+        PROFILER.count("icon_full_decodes")
+        pixmap = self.compose(QPixmap(os.path.join(self.pics_dir, f"{card_id}.jpg")), point_cost)
+        try: os.makedirs(self.thumb_dir, exist_ok=True); pixmap.save(thumb_path, "PNG")
+        except OSError: pass
+        return pixmap
+
+    def compose(self, source_pixmap, point_cost):
+        base_pixmap = source_pixmap.scaled(self.icon_size, Qt.KeepAspectRatio, Qt.SmoothTransformation) if not source_pixmap.isNull() else source_pixmap
+        if base_pixmap.isNull() or base_pixmap.size() != self.icon_size:
+            base_pixmap = QPixmap(self.icon_size)
+            base_pixmap.fill(Qt.darkGray)
+        if point_cost <= 0: return base_pixmap
+
+        overlay_pixmap = base_pixmap.copy()
+        painter = QPainter(overlay_pixmap)
+        font = QFont(); font.setBold(True); font.setPixelSize(16)
+        painter.setFont(font)
+        point_text = str(point_cost); width = self.icon_size.width(); height = self.icon_size.height()
+
+        # Draw black outline for better visibility
+        painter.setPen(QColor("black"))
+        for dx, dy in ((2, 2), (4, 2), (2, 4), (4, 4)):
+            painter.drawText(QRect(dx, dy, width, height), Qt.AlignTop | Qt.AlignLeft, point_text)
+
+        # Draw main gold text
+        painter.setPen(QColor("#FFD700"))
+        painter.drawText(QRect(3, 3, width, height), Qt.AlignTop | Qt.AlignLeft, point_text)
+        painter.end()
+        return overlay_pixmap
+
+class _ArtDecodeSignals(QObject):
+    decoded = Signal(str, QImage)
+
+class _ArtDecodeTask(QRunnable):
+    def __init__(self, path, target_size, signals):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.path = path; self.target_size = target_size; self.signals = signals
+
+    def run(self):
+        # Decode straight to the details-pane size instead of the full-resolution image.
+        with PROFILER.span("decode_card_art"):
+            reader = QImageReader(self.path); reader.setAutoTransform(True)
+            size = reader.size()
+            if size.isValid(): reader.setScaledSize(size.scaled(self.target_size, Qt.KeepAspectRatio))
+            image = reader.read()
+        PROFILER.count("art_decodes")
+        self.signals.decoded.emit(self.path, image)
+
+class CardArtLoader(QObject):
+    # Decodes card art on a thread pool, keeps a bounded cache of decoded images and drops
+    # queued requests that the selection has already moved past.
+    image_ready = Signal(str, QImage)
+
+    def __init__(self, target_size, capacity=64, parent=None):
+        super().__init__(parent)
+        self.target_size = target_size
+        self.capacity = capacity
+        self.cache = OrderedDict()
+        self.pending = {}
+        self.wanted_path = None
+        self.pool = QThreadPool(self); self.pool.setMaxThreadCount(2)
+        self.signals = _ArtDecodeSignals(self); self.signals.decoded.connect(self.on_decoded)
+
+    def request(self, path, prefetch_paths=()):
+        # Returns the decoded image when it is cached, otherwise None and image_ready fires later.
+        self.wanted_path = path
+        wanted = [path] + [p for p in prefetch_paths if p != path]
+        for pending_path in list(self.pending):
+            if pending_path not in wanted and self.pool.tryTake(self.pending[pending_path]): del self.pending[pending_path]
+        for wanted_path in wanted:
+            if wanted_path not in self.cache and wanted_path not in self.pending:
+                task = _ArtDecodeTask(wanted_path, self.target_size, self.signals)
+                self.pending[wanted_path] = task; self.pool.start(task, 1 if wanted_path == path else 0)
+        image = self.cache.get(path)
+        if image is not None: self.cache.move_to_end(path)
+        return image
+
+    def on_decoded(self, path, image):
+        self.pending.pop(path, None)
+        self.cache[path] = image; self.cache.move_to_end(path)
+        while len(self.cache) > self.capacity: self.cache.popitem(last=False)
+        if path == self.wanted_path: self.image_ready.emit(path, image)
+
+CARDS_PATH = "cards_data.json"
+JOURNAL_PATH = "deck_journal.jsonl"
+
+def read_card_data(json_path, name_key):
+    # Runs on the loader thread, so the snapshot and search modules (sqlite3, hashlib, unicodedata)
+    # are imported there too instead of before the first paint.
+    import card_snapshot
+    import card_search
+    card_data = card_snapshot.load_cards(json_path, name_key)
+    search = card_search.CardSearch(card_data.text, card_data.table, card_data.sort_orders); search.index_for(name_key)
+    return card_data, search
+
+class _CardLoadSignals(QObject):
+    loaded = Signal(object, object)
+    failed = Signal(bool, str)
+
+class _CardLoadTask(QRunnable):
+    def __init__(self, json_path, name_key):
+        super().__init__()
+        self.json_path = json_path; self.name_key = name_key
+        self.signals = _CardLoadSignals()
+
+    def run(self):
+        with PROFILER.span("read_card_data"):
+            try: card_data, search = read_card_data(self.json_path, self.name_key)
+            except FileNotFoundError as e: self.signals.failed.emit(True, str(e)); return
+            except Exception as e: self.signals.failed.emit(False, str(e)); return
+        self.signals.loaded.emit(card_data, search)
+
+class _JournalReplaySignals(QObject):
+    finished = Signal(object)
+    failed = Signal(str)
+
+class _JournalReplayTask(QRunnable):
+    # Replays the journal left by a session that did not exit cleanly while the cards load.
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        self.signals = _JournalReplaySignals()
+
+    def run(self):
+        with PROFILER.span("replay_journal"):
+            try:
+                records, valid_bytes = deck_journal.read_journal(self.path)
+                # Only a torn last line is expected after a crash; anything more is kept in a copy
+                # before the journal is truncated to the records that could be read.
+                if not deck_journal.intact(self.path, valid_bytes): deck_journal.set_aside(self.path, copy=True)
+                session = deck_journal.replay(records, valid_bytes)
+            except Exception as e: self.signals.failed.emit(str(e)); return
+        self.signals.finished.emit(session)
+
+class _SimulationSignals(QObject):
+    finished = Signal(float, int)
+    failed = Signal(str)
+
+class _SimulationTask(QRunnable):
+    def __init__(self, main_deck, groups, requirements, hand_size, trials):
+        super().__init__()
+        self.args = (dict(main_deck), {name: set(ids) for name, ids in groups.items()}, requirements, hand_size, trials)
+        self.signals = _SimulationSignals()
+
+    def run(self):
+        try: self.signals.finished.emit(deck_sim.simulate(*self.args), self.args[-1])
+        except ImportError: self.signals.failed.emit("numpy")
+        except Exception as e: self.signals.failed.emit(str(e))
+
+class _MetagameSignals(QObject):
+    finished = Signal(object)
+    failed = Signal(str)
+
+class _MetagameTask(QRunnable):
+    def __init__(self, sources, table):
+        super().__init__()
+        self.sources = sources; self.table = table
+        self.signals = _MetagameSignals()
+
+    def run(self):
+        # Imported here to keep multiprocessing out of start-up. Forking a process that runs Qt
+        # threads is unsafe, so the workers are spawned.
+        import deck_stats
+        with PROFILER.span("collect_usage"):
+            try: usage = deck_stats.collect_usage(self.sources, self.table, start_method="spawn")
+            except Exception as e: self.signals.failed.emit(str(e)); return
+        self.signals.finished.emit(usage)
+
+class _DeckIndexSignals(QObject):
+    finished = Signal(object)
+    failed = Signal(str)
+
+class _DeckIndexTask(QRunnable):
+    # Reads the decks, hashes them and builds the LSH index and archetype clusters off the GUI thread.
+    def __init__(self, sources):
+        super().__init__()
+        self.sources = sources
+        self.signals = _DeckIndexSignals()
+
+    def run(self):
+        import deck_similarity
+        with PROFILER.span("index_decks"):
+            try:
+                decks = deck_similarity.DeckSet.read(self.sources)
+                index = deck_similarity.LSHIndex(decks.signatures())
+                result = (decks, decks.hashes(), index, index.clusters())
+            except ImportError: self.signals.failed.emit("numpy"); return
+            except Exception as e: self.signals.failed.emit(str(e)); return
+        self.signals.finished.emit(result)
+
+class DeckModel(QObject):
+    # The three decks plus running totals. Every edit updates the counts and points in O(1)
+    # and reports the single list row it inserted or removed; rows are one entry per copy,
+    # kept sorted by (display name, card id).
+    DECK_NAMES = ("Main Deck", "Extra Deck", "Side Deck")
+    CATEGORIES = {"Main Deck": genesys_rules.MAIN_DECK_CATEGORIES, "Extra Deck": genesys_rules.EXTRA_DECK_CATEGORIES}
+    card_inserted = Signal(str, int)
+    card_removed = Signal(str, int)
+    decks_reset = Signal()
+
+    def __init__(self, table, sort_key, parent=None):
+        super().__init__(parent)
+        self.table = table
+        self.sort_key = sort_key
+        self.decks = {name: {} for name in self.DECK_NAMES}
+        self.rows = {name: [] for name in self.DECK_NAMES}
+        self.sizes = dict.fromkeys(self.DECK_NAMES, 0)
+        self.category_counts = {name: {} for name in self.DECK_NAMES}
+        self.total_points = 0
+
+    def row_key(self, card_id):
+        return (self.sort_key(card_id), card_id)
+
+    def _count(self, deck_name, card_id, delta):
+        deck = self.decks[deck_name]; count = deck.get(card_id, 0) + delta
+        if count: deck[card_id] = count
+        else: del deck[card_id]
+        self.sizes[deck_name] += delta
+        categories = self.CATEGORIES.get(deck_name)
+        category = genesys_rules.card_category(self.table.flags_of(card_id), categories) if categories else None
+        if category: self.category_counts[deck_name][category] = self.category_counts[deck_name].get(category, 0) + delta
+        self.total_points += self.table.points_of(card_id) * delta
+
+    def copies(self, card_id):
+        return sum(deck.get(card_id, 0) for deck in self.decks.values())
+
+    def add(self, deck_name, card_id):
+        self._count(deck_name, card_id, 1)
+        rows = self.rows[deck_name]; key = self.row_key(card_id); row = bisect_right(rows, key)
+        rows.insert(row, key)
+        self.card_inserted.emit(deck_name, row)
+
+    def remove(self, deck_name, card_id, amount=1):
+        # Returns the number of copies removed.
+        deck = self.decks.get(deck_name)
+        if deck is None or card_id not in deck: return 0
+        amount = deck[card_id] if amount == 'all' else min(amount, deck[card_id])
+        rows = self.rows[deck_name]; key = self.row_key(card_id)
+        for _ in range(amount):
+            row = bisect_right(rows, key) - 1; del rows[row]
+            self._count(deck_name, card_id, -1)
+            self.card_removed.emit(deck_name, row)
+        return amount
+
+    def update_points(self, changes):
+        # Point list changes only move the total by (new - old) for each copy in play.
+        for card_id, (old_points, new_points) in changes.items():
+            self.total_points += (new_points - old_points) * self.copies(card_id)
+
+    def first_row(self, deck_name, card_id):
+        rows = self.rows[deck_name]; key = self.row_key(card_id); row = bisect_left(rows, key)
+        return row if row < len(rows) and rows[row] == key else None
+
+    def card_ids(self, deck_name):
+        return [card_id for _, card_id in self.rows[deck_name]]
+
+    def set_decks(self, main_deck, extra_deck, side_deck):
+        for deck_name, cards in zip(self.DECK_NAMES, (main_deck, extra_deck, side_deck)):
+            deck = self.decks[deck_name]; cards = dict(cards); deck.clear(); deck.update(cards)
+        self.recount()
+
+    def clear(self):
+        self.set_decks({}, {}, {})
+
+    def set_sort_key(self, sort_key):
+        self.sort_key = sort_key; self.recount()
+
+    def recount(self):
+        self.total_points = 0
+        for deck_name, deck in self.decks.items():
+            cards = list(deck.items()); deck.clear()
+            self.sizes[deck_name] = 0; self.category_counts[deck_name] = {}
+            for card_id, count in cards: self._count(deck_name, card_id, count)
+            self.rows[deck_name] = sorted(self.row_key(card_id) for card_id, count in cards for _ in range(count))
+        self.decks_reset.emit()
+
+class ProfilerPanel(QDialog):
+    # p50/p95 per instrumented handler plus the counters, refreshed on demand.
+    def __init__(self, window):
+        super().__init__(window)
+        self.window = window
+        self.resize(560, 420)
+        layout = QVBoxLayout(self)
+        self.table = QTableWidget(0, 5); self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch); layout.addWidget(self.table)
+        self.counters_label = QLabel(); self.counters_label.setWordWrap(True); layout.addWidget(self.counters_label)
+        buttons = QHBoxLayout(); layout.addLayout(buttons)
+        self.refresh_btn = QPushButton(); self.refresh_btn.clicked.connect(self.refresh); buttons.addWidget(self.refresh_btn)
+        self.reset_btn = QPushButton(); self.reset_btn.clicked.connect(self.reset); buttons.addWidget(self.reset_btn)
+        self.export_btn = QPushButton(); self.export_btn.clicked.connect(self.export_trace); buttons.addWidget(self.export_btn)
+
+    def retranslate(self):
+        t = self.window.translations; lang = self.window.current_lang
+        self.setWindowTitle(t["profiler_panel"][lang].rstrip(".")); self.table.setHorizontalHeaderLabels(t["profiler_columns"][lang])
+        self.refresh_btn.setText(t["profiler_refresh"][lang]); self.reset_btn.setText(t["profiler_reset"][lang]); self.export_btn.setText(t["profiler_export"][lang])
+
+    def refresh(self):
+        rows = sorted(PROFILER.summary().items(), key=lambda item: -item[1][2])
+        self.table.setRowCount(len(rows))
+        for row, (name, (calls, p50, p95, worst)) in enumerate(rows):
+            for column, text in enumerate((name, str(calls), f"{p50:.2f}", f"{p95:.2f}", f"{worst:.2f}")):
+                item = QTableWidgetItem(text)
+                if column: item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.table.setItem(row, column, item)
+        self.counters_label.setText("  ".join(f"{name}: {value}" for name, value in sorted(PROFILER.counters.items())))
+
+    def reset(self):
+        PROFILER.reset(); self.refresh()
+
+    def export_trace(self):
+        filepath, _ = QFileDialog.getSaveFileName(self, self.export_btn.text(), "trace.json", "Chrome Trace (*.json);;All Files (*)")
+        if not filepath: return
+        try: PROFILER.export_chrome_trace(filepath)
+        except OSError as e: QMessageBox.critical(self, "Error", f"Could not write trace file:\n{e}")
+
+class MetagamePanel(QDialog):
+    # Card usage across a folder of .ydk files or a deck archive, collected on worker processes.
+    def __init__(self, window):
+        super().__init__(window)
+        self.window = window
+        self.report = []; self.usage = None; self.task = None
+        self.resize(820, 560)
+        layout = QVBoxLayout(self)
+        self.table = QTableWidget(0, 9); self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.horizontalHeader().setSortIndicator(1, Qt.DescendingOrder); self.table.setSortingEnabled(True)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch); layout.addWidget(self.table)
+        self.status_label = QLabel(); layout.addWidget(self.status_label)
+        buttons = QHBoxLayout(); layout.addLayout(buttons)
+        self.folder_btn = QPushButton(); self.folder_btn.clicked.connect(self.analyze_folder); buttons.addWidget(self.folder_btn)
+        self.archive_btn = QPushButton(); self.archive_btn.clicked.connect(self.analyze_archive); buttons.addWidget(self.archive_btn)
+        self.export_btn = QPushButton(); self.export_btn.clicked.connect(self.export_csv); self.export_btn.setEnabled(False); buttons.addWidget(self.export_btn)
+
+    def retranslate(self):
+        t = self.window.translations; lang = self.window.current_lang
+        self.setWindowTitle(t["metagame_panel"][lang].rstrip(".")); self.table.setHorizontalHeaderLabels(t["metagame_columns"][lang])
+        self.folder_btn.setText(t["metagame_folder"][lang]); self.archive_btn.setText(t["metagame_archive"][lang]); self.export_btn.setText(t["metagame_export"][lang])
+        self.update_status()
+
+    def analyze_folder(self):
+        folder = QFileDialog.getExistingDirectory(self, self.folder_btn.text())
+        if folder: self.analyze([folder])
+
+    def analyze_archive(self):
+        filepath, _ = QFileDialog.getOpenFileName(self, self.archive_btn.text(), "", f"Deck Archive (*{deck_codec.ARCHIVE_EXT});;All Files (*)")
+        if filepath: self.analyze([filepath])
+
+    def analyze(self, sources):
+        if self.task is not None: return
+        self.task = _MetagameTask(sources, self.window.card_table)
+        self.task.signals.finished.connect(self.on_finished); self.task.signals.failed.connect(self.on_failed)
+        for button in (self.folder_btn, self.archive_btn, self.export_btn): button.setEnabled(False)
+        self.status_label.setText(self.window.translations["metagame_running"][self.window.current_lang])
+        QThreadPool.globalInstance().start(self.task)
+
+    def on_finished(self, usage):
+        self.task = None; self.usage = usage
+        self.folder_btn.setEnabled(True); self.archive_btn.setEnabled(True)
+        self.refresh()
+
+    def on_failed(self, error):
+        self.task = None; self.folder_btn.setEnabled(True); self.archive_btn.setEnabled(True); self.export_btn.setEnabled(bool(self.report))
+        self.update_status(); QMessageBox.critical(self, "Error", f"Could not read decks:\n{error}")
+
+    def refresh(self):
+        # Points come from the window's table, so a reloaded point list is picked up here.
+        if self.usage is None: return
+        import deck_stats
+        self.report = deck_stats.usage_report(self.usage, self.window.card_table); self.export_btn.setEnabled(bool(self.report))
+        self.table.setSortingEnabled(False); self.table.setRowCount(len(self.report))
+        for row, usage in enumerate(self.report):
+            values = (usage.decks, usage.inclusion_rate * 100, usage.average_copies, usage.main, usage.extra, usage.side, usage.points, usage.points_per_deck)
+            self.table.setItem(row, 0, QTableWidgetItem(self.card_name(usage.id)))
+            for column, value in enumerate(values, 1):
+                item = QTableWidgetItem(); item.setData(Qt.DisplayRole, value if isinstance(value, int) else round(value, 2))
+                item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter); self.table.setItem(row, column, item)
+        self.table.setSortingEnabled(True); self.update_status()
+
+    def card_name(self, card_id):
+        window = self.window
+        return window.get_card_display_name(window.all_cards.get(window.id_to_cid.get(str(card_id))))
+
+    def update_status(self):
+        if self.usage is None or self.task is not None: return
+        t = self.window.translations; lang = self.window.current_lang; usage = self.usage
+        self.status_label.setText(t["metagame_summary"][lang].format(f"{usage.deck_count:,}", len(self.report), usage.failed, usage.unknown_copies))
+
+    def export_csv(self):
+        filepath, _ = QFileDialog.getSaveFileName(self, self.export_btn.text(), "card_usage.csv", "CSV (*.csv);;All Files (*)")
+        if not filepath: return
+        import deck_stats
+        try:
+            with open(filepath, "w", encoding="utf-8-sig", newline="") as f: deck_stats.write_csv(f, self.report, self.card_name)
+        except OSError as e: QMessageBox.critical(self, "Error", f"Could not write CSV file:\n{e}")
+
+class SimilarDecksPanel(QDialog):
+    # Exact duplicates, the decks closest to the current one and archetype clusters for a deck collection.
+    MAX_CLUSTERS = 200
+
+    def __init__(self, window):
+        super().__init__(window)
+        self.window = window
+        self.decks = None; self.hashes = None; self.index = None; self.clusters = []; self.task = None
+        self.resize(640, 560)
+        layout = QVBoxLayout(self)
+        self.tree = QTreeWidget(); self.tree.setColumnCount(2); self.tree.header().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.tree.itemDoubleClicked.connect(self.on_item_double_clicked); layout.addWidget(self.tree)
+        self.status_label = QLabel(); self.status_label.setWordWrap(True); layout.addWidget(self.status_label)
+        buttons = QHBoxLayout(); layout.addLayout(buttons)
+        self.folder_btn = QPushButton(); self.folder_btn.clicked.connect(self.open_folder); buttons.addWidget(self.folder_btn)
+        self.archive_btn = QPushButton(); self.archive_btn.clicked.connect(self.open_archive); buttons.addWidget(self.archive_btn)
+        self.similar_btn = QPushButton(); self.similar_btn.clicked.connect(self.show_similar); buttons.addWidget(self.similar_btn)
+        self.clusters_btn = QPushButton(); self.clusters_btn.clicked.connect(self.show_clusters); buttons.addWidget(self.clusters_btn)
+        self.similar_btn.setEnabled(False); self.clusters_btn.setEnabled(False)
+
+    def retranslate(self):
+        t = self.window.translations; lang = self.window.current_lang
+        self.setWindowTitle(t["similar_panel"][lang].rstrip(".")); self.tree.setHeaderLabels(t["similar_columns"][lang])
+        self.folder_btn.setText(t["metagame_folder"][lang]); self.archive_btn.setText(t["metagame_archive"][lang])
+        self.similar_btn.setText(t["similar_find"][lang]); self.clusters_btn.setText(t["similar_clusters"][lang])
+        self.update_status()
+
+    def open_folder(self):
+        folder = QFileDialog.getExistingDirectory(self, self.folder_btn.text())
+        if folder: self.load([folder])
+
+    def open_archive(self):
+        filepath, _ = QFileDialog.getOpenFileName(self, self.archive_btn.text(), "", f"Deck Archive (*{deck_codec.ARCHIVE_EXT});;All Files (*)")
+        if filepath: self.load([filepath])
+
+    def load(self, sources):
+        if self.task is not None: return
+        self.task = _DeckIndexTask(sources)
+        self.task.signals.finished.connect(self.on_loaded); self.task.signals.failed.connect(self.on_failed)
+        for button in (self.folder_btn, self.archive_btn, self.similar_btn, self.clusters_btn): button.setEnabled(False)
+        self.status_label.setText(self.window.translations["similar_running"][self.window.current_lang])
+        QThreadPool.globalInstance().start(self.task)
+
+    def set_idle(self):
+        self.task = None
+        for button in (self.folder_btn, self.archive_btn): button.setEnabled(True)
+        for button in (self.similar_btn, self.clusters_btn): button.setEnabled(self.index is not None)
+
+    def on_loaded(self, result):
+        self.decks, self.hashes, self.index, self.clusters = result
+        self.set_idle(); self.show_clusters()
+
+    def on_failed(self, error):
+        self.set_idle(); self.update_status(); t = self.window.translations; lang = self.window.current_lang
+        if error == "numpy": QMessageBox.warning(self, t["similar_panel"][lang].rstrip("."), t["numpy_required"][lang])
+        else: QMessageBox.critical(self, "Error", f"Could not read decks:\n{error}")
+
+    def deck_item(self, parent, index, value):
+        item = QTreeWidgetItem(parent, [self.decks.names[index], value]); item.setData(0, Qt.UserRole, index)
+        item.setTextAlignment(1, Qt.AlignRight | Qt.AlignVCenter)
+        return item
+
+    def show_similar(self):
+        if self.index is None: return
+        import deck_similarity
+        window = self.window; t = window.translations; lang = window.current_lang
+        decks = (window.main_deck, window.extra_deck, window.side_deck); digest = deck_similarity.deck_hash(*decks)
+        signature = deck_similarity.DeckSet.from_decks([("", *decks)]).signatures()[0]
+        self.tree.clear()
+        for index, similarity in self.index.similar(signature, 50):
+            label = f"{similarity:.0%}" + (t["similar_identical"][lang] if self.hashes[index] == digest else "")
+            self.deck_item(self.tree, index, label)
+
+    def show_clusters(self):
+        if self.index is None: return
+        window = self.window; self.tree.clear()
+        for members in self.clusters[:self.MAX_CLUSTERS]:
+            if len(members) < 2: break
+            core = self.decks.core_cards(members)
+            names = [window.get_card_display_name(window.all_cards.get(window.id_to_cid.get(str(card_id)))) for card_id in core]
+            cluster_item = QTreeWidgetItem(self.tree, [" / ".join(names), str(len(members))]); cluster_item.setTextAlignment(1, Qt.AlignRight | Qt.AlignVCenter)
+            for index in members: self.deck_item(cluster_item, int(index), "")
+        self.update_status()
+
+    def update_status(self):
+        if self.decks is None or self.task is not None: return
+        import deck_similarity
+        t = self.window.translations; lang = self.window.current_lang; groups = deck_similarity.duplicate_groups(self.hashes)
+        archetypes = sum(1 for members in self.clusters if len(members) >= 2)
+        self.status_label.setText(t["similar_summary"][lang].format(f"{len(self.decks):,}", sum(len(indices) - 1 for indices in groups), len(groups), archetypes))
+
+    def on_item_double_clicked(self, item, column):
+        index = item.data(0, Qt.UserRole)
+        if index is not None: self.window.load_archived_deck(self.decks.names[index], self.decks.deck(index))
 
 class DeckBuilderWindow(QMainWindow):
     def __init__(self):
         super().__init__()
+        self.init_started_ns = time.perf_counter_ns(); self.first_paint_done = False
         
         self.setup_default_language()
         self.setup_translations()
         
         # --- App State ---
         self.all_cards = {}
+        self.card_text = None
         self.id_to_cid = {}
         self.card_list_cids = []
+        self.sort_orders = {}
+        self.card_search = None
         self.current_file_path = None
         self.icon_size = QSize(60, 88) # Define icon size for reuse
+        self.icon_cache = DeckIconCache(self.icon_size)
+        self.art_loader = CardArtLoader(QSize(240, 350), parent=self)
+        self.art_loader.image_ready.connect(self.on_card_art_ready)
         
         # --- Interaction State ---
+        self.card_groups = {"starter": set(), "extender": set()}
+        self.optimizer_marks = {"required": {}, "preferred": {}, "excluded": set()}
+        self.simulation_task = None
         self.active_cid = None
         self.active_card_source_list = None
+        self.point_list = None
+        self.point_list_mtime = None
+        self.card_data_ready = False
+        self.card_load_task = None
+        self.pending_deck_paths = []
+        self.history = deck_journal.History()
+        self.journal = None
+        self.journal_task = None
+        self.restored_session = None
 
         # --- Deck State ---
-        self.main_deck = {}
-        self.extra_deck = {}
-        self.side_deck = {}
+        self.card_table = CardTable.from_cards({})
+        self.deck_model = DeckModel(self.card_table, self.deck_sort_key, self)
+        self.main_deck = self.deck_model.decks["Main Deck"]
+        self.extra_deck = self.deck_model.decks["Extra Deck"]
+        self.side_deck = self.deck_model.decks["Side Deck"]
 
-        self.load_card_data()
+        # The shell is built with no cards; the card data arrives from a worker thread.
         self.setup_ui()
+        self.deck_model.card_inserted.connect(self.on_deck_card_inserted)
+        self.deck_model.card_removed.connect(self.on_deck_card_removed)
+        self.deck_model.decks_reset.connect(self.update_all_views)
         self.update_all_views()
         self.update_ui_text()
+        self.setup_point_list_watcher()
+        self.set_card_data_ready(False)
+        if PROFILER.enabled: PROFILER.record("window_init", self.init_started_ns, time.perf_counter_ns())
+        self.start_card_loading()
+        self.start_journal()
+
+    def paintEvent(self, event):
+        if not self.first_paint_done:
+            self.first_paint_done = True
+            if PROFILER.enabled: PROFILER.record("first_paint", self.init_started_ns, time.perf_counter_ns())
+        super().paintEvent(event)
+
+    def on_profiling_toggled(self, enabled):
+        PROFILER.enabled = enabled
+
+    def show_metagame_panel(self):
+        if self.metagame_panel is None: self.metagame_panel = MetagamePanel(self)
+        self.metagame_panel.retranslate(); self.metagame_panel.refresh()
+        self.metagame_panel.show(); self.metagame_panel.raise_()
+
+    def show_similar_panel(self):
+        if self.similar_panel is None: self.similar_panel = SimilarDecksPanel(self)
+        self.similar_panel.retranslate()
+        self.similar_panel.show(); self.similar_panel.raise_()
+
+    def show_profiler_panel(self):
+        if self.profiler_panel is None: self.profiler_panel = ProfilerPanel(self)
+        self.profiler_panel.retranslate(); self.profiler_panel.refresh()
+        self.profiler_panel.show(); self.profiler_panel.raise_()
 
     def setup_default_language(self):
         try:
@@ -72,13 +709,32 @@ class DeckBuilderWindow(QMainWindow):
             "file_menu": {"zh": "&文件", "ja": "&ファイル", "en": "&File"},
             "new_deck": {"zh": "&新建卡组", "ja": "&新規デッキ", "en": "&New Deck"},
             "open_deck": {"zh": "&打开卡组...", "ja": "&デッキを開く...", "en": "&Open Deck..."},
+            "import_ydke": {"zh": "从剪贴板导入 ydke:// 链接", "ja": "クリップボードから ydke:// URL を読み込む", "en": "Import ydke:// URL from Clipboard"},
+            "export_ydke": {"zh": "复制 ydke:// 链接", "ja": "ydke:// URL をコピー", "en": "Copy ydke:// URL"},
+            "ydke_copied": {"zh": "ydke:// 链接已复制到剪贴板", "ja": "ydke:// URL をクリップボードにコピーしました", "en": "ydke:// URL copied to the clipboard"},
+            "ydke_invalid": {"zh": "剪贴板中没有有效的 ydke:// 链接：{0}", "ja": "クリップボードに有効な ydke:// URL がありません：{0}", "en": "The clipboard does not hold a valid ydke:// URL: {0}"},
+            "choose_archived_deck": {"zh": "选择要打开的卡组：", "ja": "開くデッキを選択：", "en": "Choose a deck to open:"},
+            "unknown_cards_dropped": {"zh": "以下卡片 ID 不在卡片数据中，已被忽略：\n{0}", "ja": "次のカードIDはカードデータにないため無視されました：\n{0}", "en": "These card ids are not in the card data and were skipped:\n{0}"},
             "save_deck": {"zh": "&保存卡组", "ja": "&デッキを保存", "en": "&Save Deck"},
             "save_as": {"zh": "另存为...", "ja": "名前を付けて保存...", "en": "Save As..."},
             "exit": {"zh": "&退出", "ja": "&終了", "en": "&Exit"},
             "options_menu": {"zh": "&选项", "ja": "&オプション", "en": "&Options"},
+            "edit_menu": {"zh": "&编辑", "ja": "&編集", "en": "&Edit"},
+            "undo": {"zh": "撤销(&U)", "ja": "元に戻す(&U)", "en": "&Undo"},
+            "redo": {"zh": "重做(&R)", "ja": "やり直し(&R)", "en": "&Redo"},
+            "deck_restored": {"zh": "已恢复上次未正常退出时的卡组（{0} 张卡）", "ja": "前回正常に終了しなかったセッションのデッキを復元しました（{0} 枚）", "en": "Restored the deck from a session that did not exit cleanly ({0} cards)"},
+            "journal_unreadable": {"zh": "无法读取上次的编辑记录：{0}（已保留为 {1}）", "ja": "前回の編集記録を読み込めません：{0}（{1} として保存しました）", "en": "Could not read the previous edit journal: {0} (kept as {1})"},
+            "journal_off": {"zh": "编辑记录不可用：程序意外退出时将无法恢复未保存的更改", "ja": "編集記録が無効です：異常終了した場合、保存していない変更は復元できません", "en": "Edit journal is off: unsaved changes will not be recovered after a crash"},
+            "profiling": {"zh": "记录性能数据", "ja": "パフォーマンスを記録", "en": "Record Profiling Data"},
+            "profiler_panel": {"zh": "性能面板...", "ja": "パフォーマンスパネル...", "en": "Profiling Panel..."},
+            "profiler_refresh": {"zh": "刷新", "ja": "更新", "en": "Refresh"},
+            "profiler_reset": {"zh": "清空", "ja": "クリア", "en": "Reset"},
+            "profiler_export": {"zh": "导出 Chrome Trace...", "ja": "Chrome Trace を書き出す...", "en": "Export Chrome Trace..."},
+            "profiler_columns": {"zh": ["处理程序", "次数", "p50 (ms)", "p95 (ms)", "最大 (ms)"], "ja": ["ハンドラ", "回数", "p50 (ms)", "p95 (ms)", "最大 (ms)"], "en": ["Handler", "Calls", "p50 (ms)", "p95 (ms)", "Max (ms)"]},
             "language_menu": {"zh": "&语言", "ja": "&言語", "en": "&Language"},
             "search_group": {"zh": "卡片检索", "ja": "カード検索", "en": "Card Search"},
-            "search_placeholder": {"zh": "输入卡名进行搜索...", "ja": "カード名で検索...", "en": "Search by card name..."},
+            "search_placeholder": {"zh": "卡名/拼音/罗马字，可加 t:怪兽 p:0-10", "ja": "カード名・ローマ字で検索、t:monster p:0-10 で絞り込み", "en": "Card name, pinyin or romaji; filter with t:monster p:0-10"},
+            "search_effect_text": {"zh": "同时搜索效果文本", "ja": "効果テキストも検索", "en": "Also search effect text"},
             "display_name_label": {"zh": "显示名称:", "ja": "表示名:", "en": "Display Name:"},
             "details_group": {"zh": "卡片详情 (操作目标)", "ja": "カード詳細 (操作対象)", "en": "Card Details (Active Target)"},
             "no_card_selected": {"zh": "请选择一张卡片", "ja": "カードを選択してください", "en": "Please select a card"},
@@ -109,6 +765,8 @@ class DeckBuilderWindow(QMainWindow):
             "copy_limit_error": {"zh": "卡片 '{0}' 的合计投入数量超过3张。", "ja": "カード '{0}' の合計枚数が3枚を超えています。", "en": "More than 3 copies of '{0}' were found."},
             "extra_in_main_list_header": {"zh": "\n以下额外卡组怪兽不能在主卡组中:", "ja": "\n以下のEXデッキモンスターはメインデッキに入れられません:", "en": "\nThe following Extra Deck monsters cannot be in the Main Deck:"},
             "main_in_extra_list_header": {"zh": "\n以下非额外卡组怪兽不能在额外卡组中:", "ja": "\n以下の非EXデッキモンスターはEXデッキに入れられません:", "en": "\nThe following non-Extra Deck monsters cannot be in the Extra Deck:"},
+            "forbidden_list_header": {"zh": "\n以下灵摆或连接怪兽不能使用:", "ja": "\n以下のペンデュラム・リンクモンスターは使用できません:", "en": "\nThe following Pendulum or Link monsters are not allowed:"},
+            "point_cap_error": {"zh": "卡组分数 ({0}) 超过上限 ({1})。", "ja": "デッキのポイント ({0}) が上限 ({1}) を超えています。", "en": "Deck points ({0}) exceed the cap ({1})."},
             "monster_short": {"zh": "怪", "ja": "モ", "en": "M"},
             "spell_short": {"zh": "魔", "ja": "魔", "en": "S"},
             "trap_short": {"zh": "陷", "ja": "罠", "en": "T"},
@@ -117,19 +775,239 @@ class DeckBuilderWindow(QMainWindow):
             "xyz_short": {"zh": "超", "ja": "X", "en": "X"},
             "pend_link_forbidden_title": {"zh": "禁止的卡片类型", "ja": "禁止カードタイプ", "en": "Forbidden Card Type"},
             "pend_link_forbidden_msg": {"zh": "此构筑器禁止添加灵摆和连接怪兽。", "ja": "このビルダーではペンデュラムとリンクモンスターの追加は禁止されています。", "en": "Pendulum and Link monsters are forbidden in this deck builder."},
+            "odds_group": {"zh": "开局概率", "ja": "初手確率", "en": "Opening Odds"},
+            "hand_size": {"zh": "手牌数:", "ja": "手札枚数:", "en": "Hand:"},
+            "starter": {"zh": "动点", "ja": "初動", "en": "Starter"},
+            "extender": {"zh": "展开", "ja": "展開", "en": "Extender"},
+            "tag_starter": {"zh": "标记为动点", "ja": "初動に設定", "en": "Tag Starter"},
+            "tag_extender": {"zh": "标记为展开", "ja": "展開に設定", "en": "Tag Extender"},
+            "simulate": {"zh": "模拟", "ja": "シミュレート", "en": "Simulate"},
+            "odds_selected": {"zh": "选中卡片", "ja": "選択中のカード", "en": "Selected card"},
+            "odds_combo": {"zh": "动点+展开", "ja": "初動+展開", "en": "Starter + Extender"},
+            "odds_simulated": {"zh": "模拟 {0} 手", "ja": "{0} 回シミュレート", "en": "simulated over {0} hands"},
+            "numpy_required": {"zh": "此功能需要安装 NumPy。", "ja": "この機能には NumPy が必要です。", "en": "This feature requires NumPy."},
+            "tools_menu": {"zh": "&工具", "ja": "&ツール", "en": "&Tools"},
+            "optimize_deck": {"zh": "按分数上限优化卡组...", "ja": "ポイント上限でデッキを最適化...", "en": "Optimize Deck for Point Cap..."},
+            "mark_required": {"zh": "设为必选...", "ja": "必須に設定...", "en": "Mark Required..."},
+            "mark_preferred": {"zh": "设为优先...", "ja": "優先に設定...", "en": "Mark Preferred..."},
+            "mark_excluded": {"zh": "设为排除", "ja": "除外に設定", "en": "Mark Excluded"},
+            "clear_mark": {"zh": "清除标记", "ja": "マークを解除", "en": "Clear Mark"},
+            "required_copies_prompt": {"zh": "必须投入的张数:", "ja": "必ず入れる枚数:", "en": "Copies to include:"},
+            "preferred_weight_prompt": {"zh": "每张的价值:", "ja": "1枚あたりの価値:", "en": "Value per copy:"},
+            "optimizer_no_marks": {"zh": "请先在卡片检索列表中右键，将卡片设为必选或优先。", "ja": "まずカード検索リストを右クリックして、カードを必須または優先に設定してください。", "en": "Right-click cards in the search list to mark them as required or preferred first."},
+            "metagame_panel": {"zh": "环境统计...", "ja": "環境分析...", "en": "Metagame Analysis..."},
+            "metagame_folder": {"zh": "分析文件夹...", "ja": "フォルダを分析...", "en": "Analyze Folder..."},
+            "metagame_archive": {"zh": "分析卡组包...", "ja": "デッキアーカイブを分析...", "en": "Analyze Archive..."},
+            "metagame_export": {"zh": "导出 CSV...", "ja": "CSV を書き出す...", "en": "Export CSV..."},
+            "metagame_running": {"zh": "正在统计卡组...", "ja": "デッキを集計中...", "en": "Counting decks..."},
+            "metagame_summary": {"zh": "{0} 个卡组，{1} 种卡片；{2} 个文件无法读取，{3} 张未知卡片", "ja": "{0} デッキ、{1} 種類のカード；読み込めないファイル {2}、不明なカード {3} 枚", "en": "{0} decks, {1} distinct cards; {2} unreadable files, {3} unknown card copies"},
+            "metagame_columns": {"zh": ["卡片", "卡组数", "采用率 %", "平均张数", "主卡组", "额外", "副卡组", "分数", "每组分数"], "ja": ["カード", "デッキ数", "採用率 %", "平均枚数", "メイン", "EX", "サイド", "ポイント", "デッキ毎ポイント"], "en": ["Card", "Decks", "Inclusion %", "Avg Copies", "Main", "Extra", "Side", "Points", "Points/Deck"]},
+            "similar_panel": {"zh": "相似卡组...", "ja": "類似デッキ...", "en": "Similar Decks..."},
+            "similar_find": {"zh": "与当前卡组最接近", "ja": "現在のデッキに近いもの", "en": "Closest to Current Deck"},
+            "similar_clusters": {"zh": "卡组类型", "ja": "アーキタイプ", "en": "Archetypes"},
+            "similar_running": {"zh": "正在建立卡组索引...", "ja": "デッキの索引を作成中...", "en": "Indexing decks..."},
+            "similar_identical": {"zh": " (完全相同)", "ja": " (完全一致)", "en": " (identical)"},
+            "similar_summary": {"zh": "{0} 个卡组；{1} 个完全重复（{2} 组）；{3} 个卡组类型", "ja": "{0} デッキ；完全な重複 {1}（{2} グループ）；アーキタイプ {3}", "en": "{0} decks; {1} exact duplicates in {2} groups; {3} archetypes"},
+            "similar_columns": {"zh": ["卡组 / 类型", "相似度 / 卡组数"], "ja": ["デッキ / アーキタイプ", "類似度 / デッキ数"], "en": ["Deck / Archetype", "Similarity / Decks"]},
+            "loading_cards": {"zh": "正在加载卡片数据...", "ja": "カードデータを読み込み中...", "en": "Loading card data..."},
+            "point_list_reloaded": {"zh": "积分表已重新加载：{0} 张卡的积分有变化", "ja": "ポイントリストを再読み込みしました：{0} 枚のポイントが変更されました", "en": "Point list reloaded: {0} cards changed"},
+            "point_list_invalid": {"zh": "无法读取积分表：{0}", "ja": "ポイントリストを読み込めません：{0}", "en": "Could not read the point list: {0}"},
+            "optimizer_failed": {"zh": "无法组成合法卡组：{0}", "ja": "合法なデッキを構築できません：{0}", "en": "No legal deck could be built: {0}"},
+            "optimizer_confirm": {"zh": "最优卡组：主卡组 {0} 张，额外 {1} 张，共 {2} 分（价值 {3:g}）。\n替换当前的主卡组和额外卡组吗？", "ja": "最適なデッキ：メイン {0} 枚、EX {1} 枚、合計 {2} ポイント（価値 {3:g}）。\n現在のメインデッキとEXデッキを置き換えますか？", "en": "Best deck: {0} main, {1} extra, {2} points (value {3:g}).\nReplace the current main and extra deck?"},
         }
 
+    def start_card_loading(self):
+        self.card_load_task = _CardLoadTask(CARDS_PATH, self.current_display_name_key)
+        self.card_load_task.signals.loaded.connect(self.on_card_data_loaded)
+        self.card_load_task.signals.failed.connect(self.on_card_data_failed)
+        QThreadPool.globalInstance().start(self.card_load_task)
+
+    @PROFILER.instrument()
     def load_card_data(self):
-        try:
-            with open("cards_data.json", "r", encoding="utf-8") as f: data = json.load(f)
-            for cid, card_data in data.items():
-                self.all_cards[cid] = card_data
-                card_id = card_data.get("id")
-                if card_id: self.id_to_cid[str(card_id)] = cid
-            self.card_list_cids = sorted(self.all_cards.keys(), key=lambda c: self.get_card_display_name(self.all_cards[c]) or "")
-        except FileNotFoundError: QMessageBox.critical(self, "Error", "cards_data.json not found.")
-        except Exception as e: QMessageBox.critical(self, "Error", f"Failed to load card data: {e}")
+        # Blocking variant of the background load, for reloading on the GUI thread.
+        try: self.on_card_data_loaded(*read_card_data(CARDS_PATH, self.current_display_name_key))
+        except FileNotFoundError as e: self.on_card_data_failed(True, str(e))
+        except Exception as e: self.on_card_data_failed(False, str(e))
+
+    def on_card_data_loaded(self, card_data, search):
+        self.card_load_task = None
+        self.all_cards, self.id_to_cid, self.sort_orders, self.card_table, self.card_text = card_data
+        self.base_point_column = self.card_table.points[:]
+        self.card_search = search
+        self.deck_model.table = self.card_table; self.card_list_model.all_cards = self.all_cards
+        self.point_list = None; self.point_list_mtime = None
+        if point_list.point_list_mtime() is not None: self.reload_point_list()
+        # A journal still being replayed finishes loading when it arrives.
+        if self.journal_task is None: self.finish_card_loading()
+
+    def finish_card_loading(self):
+        self.set_card_data_ready(True)
+        self.deck_model.recount(); self.filter_card_list()
+        if PROFILER.enabled: PROFILER.record("card_data_ready", self.init_started_ns, time.perf_counter_ns())
+        if self.restored_session is not None: self.restore_session()
+        pending, self.pending_deck_paths = self.pending_deck_paths, []
+        for filepath in pending: self.open_deck_path(filepath)
+
+    def on_card_data_failed(self, missing, message):
+        self.card_load_task = None; self.statusBar().clearMessage()
+        if missing: QMessageBox.critical(self, "Error", f"{CARDS_PATH} not found.")
+        else: QMessageBox.critical(self, "Error", f"Failed to load card data: {message}")
+        # A replayed journal is restored only together with the cards, and it stays on disk until then.
+        if self.journal is None and self.journal_task is None: self.show_journal_off()
+
+    def start_journal(self):
+        # A journal left on disk means the last session did not exit cleanly; it is replayed on a
+        # worker thread and restored once the cards have loaded. Otherwise a new journal starts.
+        if os.path.isfile(JOURNAL_PATH) and os.path.getsize(JOURNAL_PATH):
+            self.journal_task = _JournalReplayTask(JOURNAL_PATH)
+            self.journal_task.signals.finished.connect(self.on_journal_replayed)
+            self.journal_task.signals.failed.connect(self.on_journal_replay_failed)
+            QThreadPool.globalInstance().start(self.journal_task)
+        else: self.journal = deck_journal.Journal(JOURNAL_PATH)
+
+    def on_journal_replayed(self, session):
+        self.journal_task = None; self.restored_session = session
+        if self.card_load_task is None:
+            if self.card_text is not None: self.finish_card_loading()
+            else: self.show_journal_off()
+
+    def on_journal_replay_failed(self, message):
+        # The unreadable journal may hold the only copy of unsaved edits, so it is moved aside, not truncated.
+        self.journal_task = None
+        try: kept = deck_journal.set_aside(JOURNAL_PATH)
+        except OSError: self.show_journal_off()
+        else:
+            self.journal = deck_journal.Journal(JOURNAL_PATH)
+            QMessageBox.warning(self, "Warning", self.translations["journal_unreadable"][self.current_lang].format(message, kept))
+        if self.card_load_task is None and self.card_text is not None: self.finish_card_loading()
+
+    def show_journal_off(self):
+        self.statusBar().showMessage(self.translations["journal_off"][self.current_lang])
+
+    def restore_session(self):
+        session, self.restored_session = self.restored_session, None
+        snapshot = session.snapshot; known_ids = self.card_table.row_of_id
+        decks = tuple({card_id: count for card_id, count in deck.items() if card_id in known_ids} for deck in snapshot.decks)
+        self.journal = deck_journal.Journal(JOURNAL_PATH, session.valid_bytes); self.journal.records = session.records
+        self.deck_model.set_decks(*decks); self.current_file_path = snapshot.path
+        if snapshot.title: self.setWindowTitle(snapshot.title)
+        if decks == snapshot.decks: self.history = session.history
+        else:
+            # Cards missing from the card data are dropped, and the history that refers to them with them;
+            # the full journal is kept in a copy.
+            try: deck_journal.set_aside(JOURNAL_PATH, copy=True)
+            except OSError: pass
+            self.history = deck_journal.History(); self.journal.checkpoint(self.deck_snapshot())
+        self.update_edit_actions()
+        if any(decks) or self.history.can_undo():
+            self.statusBar().showMessage(self.translations["deck_restored"][self.current_lang].format(sum(sum(deck.values()) for deck in decks)), 5000)
 
+    def deck_snapshot(self):
+        return deck_journal.Snapshot(deck_journal.freeze(self.deck_model.decks[name] for name in DeckModel.DECK_NAMES), self.current_file_path, self.windowTitle())
+
+    def apply_snapshot(self, snapshot):
+        self.deck_model.set_decks(*snapshot.decks); self.current_file_path = snapshot.path
+        if snapshot.title: self.setWindowTitle(snapshot.title)
+
+    def record_change(self, change, record):
+        self.history.push(change); self.update_edit_actions()
+        if self.journal is None: return
+        if self.journal.error is not None:
+            # The journal stopped at a write error (disk full, file removed): say so once and stop journaling.
+            self.journal = None; self.show_journal_off(); return
+        self.journal.append(record)
+        if self.journal.records >= deck_journal.CHECKPOINT_RECORDS: self.journal.checkpoint(self.deck_snapshot())
+
+    @contextmanager
+    def deck_reset(self):
+        # Records whatever replaces the whole deck inside the block as one undoable step.
+        before = self.deck_snapshot()
+        yield
+        after = self.deck_snapshot()
+        if after != before: self.record_change(deck_journal.Reset(before, after), deck_journal.reset_record(after))
+
+    def undo(self):
+        change = self.history.undo()
+        if change is None: return
+        if isinstance(change, deck_journal.Edit): self.apply_edit(change, reverse=True)
+        else: self.apply_snapshot(change.before)
+        if self.journal is not None: self.journal.append({"t": "undo"})
+        self.update_edit_actions(); self.restore_selection()
+
+    def redo(self):
+        change = self.history.redo()
+        if change is None: return
+        if isinstance(change, deck_journal.Edit): self.apply_edit(change)
+        else: self.apply_snapshot(change.after)
+        if self.journal is not None: self.journal.append({"t": "redo"})
+        self.update_edit_actions(); self.restore_selection()
+
+    def apply_edit(self, edit, reverse=False):
+        # Goes through the deck model so the lists update one row at a time, as for a normal edit.
+        deck_name = DeckModel.DECK_NAMES[edit.section]; delta = -edit.delta if reverse else edit.delta
+        if delta < 0: self.deck_model.remove(deck_name, edit.card_id, -delta)
+        else:
+            for _ in range(delta): self.deck_model.add(deck_name, edit.card_id)
+
+    def update_edit_actions(self):
+        self.undo_action.setEnabled(self.history.can_undo()); self.redo_action.setEnabled(self.history.can_redo())
+
+    def closeEvent(self, event):
+        # A clean exit leaves no journal behind, so the next start does not restore anything.
+        if self.journal is not None: self.journal.close(discard=True); self.journal = None
+        super().closeEvent(event)
+
+    def set_card_data_ready(self, ready):
+        # Until the cards arrive, searching and anything that needs card ids stays disabled.
+        self.card_data_ready = ready
+        for widget in (self.search_input, self.search_text_check, self.import_ydke_action, self.optimize_action, self.metagame_action, self.similar_action): widget.setEnabled(ready)
+        if ready: self.statusBar().clearMessage()
+        else: self.statusBar().showMessage(self.translations["loading_cards"][self.current_lang])
+
+    def setup_point_list_watcher(self):
+        # Editors often replace the file instead of writing it in place, so the folder is watched too.
+        self.point_list_watcher = QFileSystemWatcher(self)
+        self.point_list_watcher.addPath(os.path.dirname(os.path.abspath(point_list.POINT_LIST_PATH)))
+        if self.point_list_mtime is not None: self.point_list_watcher.addPath(point_list.POINT_LIST_PATH)
+        self.point_list_timer = QTimer(self); self.point_list_timer.setSingleShot(True); self.point_list_timer.setInterval(200)
+        self.point_list_timer.timeout.connect(self.reload_point_list)
+        self.point_list_watcher.fileChanged.connect(self.point_list_timer.start)
+        self.point_list_watcher.directoryChanged.connect(self.point_list_timer.start)
+
+    def base_points(self):
+        return {card_id: self.base_point_column[row] for card_id, row in self.card_table.row_of_id.items()}
+
+    @PROFILER.instrument()
+    def reload_point_list(self):
+        mtime = point_list.point_list_mtime()
+        if mtime == self.point_list_mtime: return
+        if mtime is None: points = self.base_points()
+        else:
+            try: points = point_list.load_point_list()
+            except (OSError, ValueError) as e:
+                # A half-written file fails to parse; the next change notification retries.
+                self.statusBar().showMessage(self.translations["point_list_invalid"][self.current_lang].format(e), 5000); return
+        old_points = self.point_list if self.point_list is not None else point_list.table_points(self.card_table)
+        changes = point_list.diff_point_lists(old_points, points)
+        point_list.apply_changes(self.card_table, changes)
+        self.point_list = points; self.point_list_mtime = mtime
+        if mtime is not None and point_list.POINT_LIST_PATH not in self.point_list_watcher.files(): self.point_list_watcher.addPath(point_list.POINT_LIST_PATH)
+        self.on_points_changed(changes)
+
+    def on_points_changed(self, changes):
+        self.deck_model.update_points(changes)
+        for deck_name, list_widget in self.deck_list_widgets.items():
+            deck = self.deck_model.decks[deck_name]
+            for card_id in changes.keys() & deck.keys():
+                row = self.deck_model.first_row(deck_name, card_id)
+                for r in range(row, row + deck[card_id]): self.refresh_deck_item(list_widget.item(r), card_id)
+        self.update_points_display()
+        active_card = self.all_cards.get(self.active_cid)
+        if active_card and active_card.id in changes: self.display_card_by_cid(self.active_cid, self.active_card_source_list)
+        if self.metagame_panel is not None and self.metagame_panel.isVisible(): self.metagame_panel.refresh()
+        self.statusBar().showMessage(self.translations["point_list_reloaded"][self.current_lang].format(len(changes)), 5000)
+
+    @PROFILER.instrument()
     def setup_ui(self):
         self.setGeometry(100, 100, 1360, 800)
         menu_bar = self.menuBar()
@@ -137,23 +1015,44 @@ class DeckBuilderWindow(QMainWindow):
         self.open_deck_action = self.file_menu.addAction(""); self.open_deck_action.triggered.connect(self.open_deck)
         self.save_deck_action = self.file_menu.addAction(""); self.save_deck_action.triggered.connect(self.save_deck)
         self.save_as_action = self.file_menu.addAction(""); self.save_as_action.triggered.connect(self.save_deck_as)
+        self.file_menu.addSeparator()
+        self.import_ydke_action = self.file_menu.addAction(""); self.import_ydke_action.triggered.connect(self.import_ydke)
+        self.export_ydke_action = self.file_menu.addAction(""); self.export_ydke_action.triggered.connect(self.export_ydke)
         self.file_menu.addSeparator(); self.exit_action = self.file_menu.addAction(""); self.exit_action.triggered.connect(self.close)
+        self.edit_menu = menu_bar.addMenu(""); self.undo_action = self.edit_menu.addAction(""); self.undo_action.setShortcut(QKeySequence.Undo)
+        self.undo_action.triggered.connect(self.undo); self.undo_action.setEnabled(False)
+        self.redo_action = self.edit_menu.addAction(""); self.redo_action.setShortcut(QKeySequence.Redo)
+        self.redo_action.triggered.connect(self.redo); self.redo_action.setEnabled(False)
         self.options_menu = menu_bar.addMenu(""); self.language_menu = self.options_menu.addMenu("")
         lang_group = QActionGroup(self)
         self.zh_action = lang_group.addAction(QAction("简体中文", self, checkable=True)); self.zh_action.triggered.connect(lambda: self.on_language_changed("zh"))
         self.ja_action = lang_group.addAction(QAction("日本語", self, checkable=True)); self.ja_action.triggered.connect(lambda: self.on_language_changed("ja"))
         self.en_action = lang_group.addAction(QAction("English", self, checkable=True)); self.en_action.triggered.connect(lambda: self.on_language_changed("en"))
         self.language_menu.addActions(lang_group.actions())
+        self.options_menu.addSeparator()
+        self.profiling_action = self.options_menu.addAction(""); self.profiling_action.setCheckable(True); self.profiling_action.setChecked(PROFILER.enabled)
+        self.profiling_action.toggled.connect(self.on_profiling_toggled)
+        self.profiler_panel_action = self.options_menu.addAction(""); self.profiler_panel_action.triggered.connect(self.show_profiler_panel)
+        self.profiler_panel = None
+        self.tools_menu = menu_bar.addMenu(""); self.optimize_action = self.tools_menu.addAction(""); self.optimize_action.triggered.connect(self.optimize_deck)
+        self.metagame_action = self.tools_menu.addAction(""); self.metagame_action.triggered.connect(self.show_metagame_panel)
+        self.metagame_panel = None
+        self.similar_action = self.tools_menu.addAction(""); self.similar_action.triggered.connect(self.show_similar_panel)
+        self.similar_panel = None
         central_widget = QWidget(); self.setCentralWidget(central_widget)
         main_layout = QHBoxLayout(central_widget); splitter = QSplitter(Qt.Horizontal); main_layout.addWidget(splitter)
         left_pane = QWidget(); left_layout = QVBoxLayout(left_pane); splitter.addWidget(left_pane)
         right_pane = QWidget(); right_layout = QVBoxLayout(right_pane); splitter.addWidget(right_pane)
         self.browser_group = QGroupBox(); browser_layout = QVBoxLayout(self.browser_group)
-        self.search_input = QLineEdit(); browser_layout.addWidget(self.search_input); self.search_input.textChanged.connect(self.filter_card_list)
+        self.search_input = QLineEdit(); browser_layout.addWidget(self.search_input); self.search_input.textChanged.connect(lambda _: self.filter_card_list())
+        self.search_text_check = QCheckBox(); browser_layout.addWidget(self.search_text_check); self.search_text_check.toggled.connect(lambda _: self.filter_card_list())
         name_display_layout = QHBoxLayout(); self.display_name_label = QLabel(); self.name_display_combo = QComboBox()
         self.name_display_combo.currentIndexChanged.connect(self.on_name_display_changed)
         name_display_layout.addWidget(self.display_name_label); name_display_layout.addWidget(self.name_display_combo); browser_layout.addLayout(name_display_layout)
-        self.card_list_view = QListWidget(); self.card_list_view.itemSelectionChanged.connect(self.on_browser_card_selected); self.card_list_view.itemDoubleClicked.connect(self.on_browser_card_double_clicked)
+        self.card_list_model = CardListModel(self.all_cards, self.current_display_name_key, self)
+        self.card_list_view = QListView(); self.card_list_view.setUniformItemSizes(True); self.card_list_view.setModel(self.card_list_model)
+        self.card_list_view.setContextMenuPolicy(Qt.CustomContextMenu); self.card_list_view.customContextMenuRequested.connect(self.on_browser_context_menu)
+        self.card_list_view.selectionModel().selectionChanged.connect(self.on_browser_card_selected); self.card_list_view.doubleClicked.connect(self.on_browser_card_double_clicked)
         browser_layout.addWidget(self.card_list_view); left_layout.addWidget(self.browser_group)
         self.details_group = QGroupBox(); details_layout = QVBoxLayout(self.details_group)
         self.card_image_label = QLabel(); self.card_image_label.setAlignment(Qt.AlignCenter); self.card_image_label.setFixedSize(240, 350); self.card_image_label.setScaledContents(True)
@@ -167,12 +1066,23 @@ class DeckBuilderWindow(QMainWindow):
         left_layout.addWidget(self.details_group); left_layout.setStretch(0, 5); left_layout.setStretch(1, 4)
         self.stats_group = QGroupBox(); stats_layout = QHBoxLayout(self.stats_group)
         self.points_label_title = QLabel(); stats_layout.addWidget(self.points_label_title); self.points_label = QLabel("0 / 100"); stats_layout.addWidget(self.points_label)
-        self.cap_label_title = QLabel(); stats_layout.addWidget(self.cap_label_title); self.point_cap_spinbox = QSpinBox(); self.point_cap_spinbox.setRange(0, 999); self.point_cap_spinbox.setValue(100)
+        self.cap_label_title = QLabel(); stats_layout.addWidget(self.cap_label_title); self.point_cap_spinbox = QSpinBox(); self.point_cap_spinbox.setRange(0, 999); self.point_cap_spinbox.setValue(genesys_rules.DEFAULT_POINT_CAP)
         self.point_cap_spinbox.valueChanged.connect(self.update_points_display); stats_layout.addWidget(self.point_cap_spinbox); stats_layout.addStretch()
-        self.stats_label = QLabel(); stats_layout.addWidget(self.stats_label); right_layout.addWidget(self.stats_group)
+        self.stats_label = QLabel(); stats_layout.addWidget(self.stats_label)
+        self.odds_group = QGroupBox(); odds_layout = QVBoxLayout(self.odds_group); odds_controls = QHBoxLayout()
+        self.hand_size_label = QLabel(); self.hand_size_spinbox = QSpinBox(); self.hand_size_spinbox.setRange(1, 10); self.hand_size_spinbox.setValue(5)
+        self.hand_size_spinbox.valueChanged.connect(self.update_odds_display)
+        self.tag_starter_btn = QPushButton(); self.tag_starter_btn.clicked.connect(lambda: self.toggle_card_group("starter"))
+        self.tag_extender_btn = QPushButton(); self.tag_extender_btn.clicked.connect(lambda: self.toggle_card_group("extender"))
+        self.simulate_btn = QPushButton(); self.simulate_btn.clicked.connect(self.run_odds_simulation)
+        for widget in (self.hand_size_label, self.hand_size_spinbox, self.tag_starter_btn, self.tag_extender_btn, self.simulate_btn): odds_controls.addWidget(widget)
+        self.odds_label = QLabel(); self.odds_label.setWordWrap(True); odds_layout.addLayout(odds_controls); odds_layout.addWidget(self.odds_label)
+        deck_info_layout = QHBoxLayout(); deck_info_layout.addWidget(self.stats_group, 1); deck_info_layout.addWidget(self.odds_group, 1); right_layout.addLayout(deck_info_layout)
         self.main_deck_group, self.main_deck_list = self.create_deck_list_widget("Main Deck")
         self.extra_deck_group, self.extra_deck_list = self.create_deck_list_widget("Extra Deck")
         self.side_deck_group, self.side_deck_list = self.create_deck_list_widget("Side Deck")
+        self.deck_list_widgets = {"Main Deck": self.main_deck_list, "Extra Deck": self.extra_deck_list, "Side Deck": self.side_deck_list}
+        self.deck_groups = {"Main Deck": self.main_deck_group, "Extra Deck": self.extra_deck_group, "Side Deck": self.side_deck_group}
         right_layout.addWidget(self.main_deck_group, 2)
         right_layout.addWidget(self.extra_deck_group, 1)
         right_layout.addWidget(self.side_deck_group, 1)
@@ -200,28 +1110,42 @@ class DeckBuilderWindow(QMainWindow):
     def on_language_changed(self, lang_code): 
         self.current_lang = lang_code
         self.update_ui_text()
-        self.update_all_views()
+        self.update_deck_titles()
 
     def on_name_display_changed(self, index):
         key = self.name_display_combo.itemData(index)
         if key:
             self.current_display_name_key = key
+            if self.card_text is not None: rename_records(self.all_cards, self.card_text.names(key))
+            self.card_list_model.set_name_key(key)
             self.filter_card_list()
-            self.update_all_views()
+            self.deck_model.set_sort_key(self.deck_sort_key)
 
     def update_ui_text(self):
         lang = self.current_lang
         self.setWindowTitle(self.translations["window_title"][lang]); self.file_menu.setTitle(self.translations["file_menu"][lang])
         self.new_deck_action.setText(self.translations["new_deck"][lang]); self.open_deck_action.setText(self.translations["open_deck"][lang])
         self.save_deck_action.setText(self.translations["save_deck"][lang]); self.save_as_action.setText(self.translations["save_as"][lang])
+        self.import_ydke_action.setText(self.translations["import_ydke"][lang]); self.export_ydke_action.setText(self.translations["export_ydke"][lang])
         self.exit_action.setText(self.translations["exit"][lang]); self.options_menu.setTitle(self.translations["options_menu"][lang])
+        self.edit_menu.setTitle(self.translations["edit_menu"][lang])
+        self.undo_action.setText(self.translations["undo"][lang]); self.redo_action.setText(self.translations["redo"][lang])
+        self.tools_menu.setTitle(self.translations["tools_menu"][lang]); self.optimize_action.setText(self.translations["optimize_deck"][lang])
+        self.metagame_action.setText(self.translations["metagame_panel"][lang])
+        self.similar_action.setText(self.translations["similar_panel"][lang])
+        if self.metagame_panel is not None: self.metagame_panel.retranslate()
+        if self.similar_panel is not None: self.similar_panel.retranslate()
         self.language_menu.setTitle(self.translations["language_menu"][lang]); self.zh_action.setChecked(lang == "zh")
+        self.profiling_action.setText(self.translations["profiling"][lang]); self.profiler_panel_action.setText(self.translations["profiler_panel"][lang])
         self.ja_action.setChecked(lang == "ja"); self.en_action.setChecked(lang == "en")
         self.browser_group.setTitle(self.translations["search_group"][lang]); self.search_input.setPlaceholderText(self.translations["search_placeholder"][lang])
+        self.search_text_check.setText(self.translations["search_effect_text"][lang])
         self.display_name_label.setText(self.translations["display_name_label"][lang]); self.details_group.setTitle(self.translations["details_group"][lang])
         if not self.active_cid: self.card_image_label.setText(self.translations["no_card_selected"][lang])
         self.add_to_main_btn.setText(self.translations["add_to_main"][lang])
         self.add_to_extra_btn.setText(self.translations["add_to_extra"][lang]); self.add_to_side_btn.setText(self.translations["add_to_side"][lang])
+        self.odds_group.setTitle(self.translations["odds_group"][lang]); self.hand_size_label.setText(self.translations["hand_size"][lang])
+        self.tag_starter_btn.setText(self.translations["tag_starter"][lang]); self.tag_extender_btn.setText(self.translations["tag_extender"][lang]); self.simulate_btn.setText(self.translations["simulate"][lang])
         self.stats_group.setTitle(self.translations["deck_info_group"][lang]); self.points_label_title.setText(f"<b>{self.translations['points'][lang]}:</b>")
         self.cap_label_title.setText(f"<b>{self.translations['cap'][lang]}:</b>")
         self.name_display_combo.blockSignals(True); self.name_display_combo.clear()
@@ -231,47 +1155,65 @@ class DeckBuilderWindow(QMainWindow):
         self.name_display_combo.blockSignals(False); self.update_stats_display()
 
     def get_card_display_name(self, card_data):
-        if not card_data: return "Unknown Card"
-        name = card_data.get(self.current_display_name_key) or card_data.get("cn_name") or "Unknown Card"
-        return name
+        return card_data.name if card_data else "Unknown Card"
 
+    def warm_search_index(self):
+        # Build the active name key's index ahead of the first query (the loader does this at startup).
+        if self.card_search is not None: self.card_search.index_for(self.current_display_name_key)
+
+    @PROFILER.instrument()
     def filter_card_list(self):
-        search_text = self.search_input.text().lower(); temp_card_list = []
-        for cid, data in self.all_cards.items():
-            name = self.get_card_display_name(data)
-            if name and (not search_text or search_text in name.lower()):
-                temp_card_list.append(cid)
-        temp_card_list.sort(key=lambda c: self.get_card_display_name(self.all_cards[c]))
-        self.card_list_cids = temp_card_list
+        if self.card_search is None: return
+        self.card_list_cids = self.card_search.search(self.current_display_name_key, self.search_input.text(), self.search_text_check.isChecked())
         self.update_card_list_view()
 
     def update_card_list_view(self):
-        self.card_list_view.clear()
-        for cid in self.card_list_cids:
-            card_data = self.all_cards.get(cid)
-            if card_data:
-                display_name = self.get_card_display_name(card_data)
-                item = QListWidgetItem(display_name); item.setData(Qt.UserRole, cid); self.card_list_view.addItem(item)
+        self.card_list_model.set_cids(self.card_list_cids)
     
+    @PROFILER.instrument()
     def display_card_by_cid(self, cid, source_list):
         self.active_cid = cid
         self.active_card_source_list = source_list
         card_data = self.all_cards.get(cid)
         if not card_data: return
-        image_path = os.path.join("pics", f"{card_data.get('id')}.jpg"); pixmap = QPixmap(image_path)
-        if pixmap.isNull(): self.card_image_label.setText(self.translations["image_not_found"][self.current_lang])
-        else: self.card_image_label.setPixmap(pixmap)
-        point_cost = card_data.get("point", 0); display_name = self.get_card_display_name(card_data)
-        info_text = (f"<b>{display_name}</b><br><i>{card_data.get('en_name', '')}</i><br><br>"
+        image_path = self.card_image_path(card_data.id)
+        prefetch_paths = [self.card_image_path(card_id) for card_id in self.neighbour_card_ids(source_list)]
+        image = self.art_loader.request(image_path, prefetch_paths)
+        if image is None: self.card_image_label.clear()
+        else: self.show_card_art(image)
+        point_cost = self.card_table.points_of(card_data.id); display_name = self.get_card_display_name(card_data)
+        details = self.card_text.details(card_data.row)
+        info_text = (f"<b>{display_name}</b><br><i>{details['en_name']}</i><br><br>"
                      f"<b>{self.translations['points_cost'][self.current_lang]}: {point_cost}</b><hr>"
-                     f"{card_data.get('text', {}).get('types', '').replace(chr(10), '<br>')}<hr>"
-                     f"{card_data.get('text', {}).get('desc', '')}")
+                     f"{details['types'].replace(chr(10), '<br>')}<hr>"
+                     f"{details['desc']}")
         self.card_info_label.setText(info_text)
+        self.update_odds_display()
+
+    def card_image_path(self, card_id):
+        return os.path.join("pics", f"{card_id}.jpg")
+
+    def neighbour_card_ids(self, source_list, reach=2):
+        # Cards just above and below the selection, which arrow-key browsing shows next.
+        if source_list is self.card_list_view:
+            row = self.card_list_view.currentIndex().row(); cids = self.card_list_model.cids
+            return [self.all_cards[cids[r]].id for r in range(row - reach, row + reach + 1) if r != row and 0 <= r < len(cids)]
+        row = source_list.currentRow()
+        return [source_list.item(r).data(Qt.UserRole) for r in range(row - reach, row + reach + 1) if r != row and 0 <= r < source_list.count()]
+
+    def show_card_art(self, image):
+        if image.isNull(): self.card_image_label.setText(self.translations["image_not_found"][self.current_lang])
+        else: self.card_image_label.setPixmap(QPixmap.fromImage(image))
+
+    def on_card_art_ready(self, path, image):
+        card_data = self.all_cards.get(self.active_cid)
+        if card_data and path == self.card_image_path(card_data.id): self.show_card_art(image)
 
     def on_browser_card_selected(self):
-        if not self.card_list_view.selectedItems(): return
+        selected = self.card_list_view.selectionModel().selectedIndexes()
+        if not selected: return
         self.main_deck_list.clearSelection(); self.extra_deck_list.clearSelection(); self.side_deck_list.clearSelection()
-        cid = self.card_list_view.selectedItems()[0].data(Qt.UserRole)
+        cid = selected[0].data(Qt.UserRole)
         self.display_card_by_cid(cid, self.card_list_view)
 
     def on_deck_card_selected(self):
@@ -284,119 +1226,176 @@ class DeckBuilderWindow(QMainWindow):
         cid = self.id_to_cid.get(str(card_id))
         if cid: self.display_card_by_cid(cid, sender_list)
     
-    def update_deck_list_widget(self, list_widget, deck_dict):
+    def deck_sort_key(self, card_id):
+        return self.get_card_display_name(self.get_card_by_id(card_id))
+
+    def create_deck_item(self, card_id):
+        PROFILER.count("deck_list_items")
+        item = QListWidgetItem()
+        item.setData(Qt.UserRole, card_id)
+        self.refresh_deck_item(item, card_id)
+        return item
+
+    def refresh_deck_item(self, item, card_id):
+        display_name = self.get_card_display_name(self.get_card_by_id(card_id) or {})
+        point_cost = self.card_table.points_of(card_id)
+        item.setIcon(self.icon_cache.icon(card_id, point_cost))
+        item.setText(display_name)
+        item.setToolTip(f"{display_name}\nPoint: {point_cost}")
+
+    def update_deck_list_widget(self, list_widget, deck_name):
         list_widget.clear()
-        sorted_ids = sorted(deck_dict.keys(), key=lambda i: self.get_card_display_name(self.all_cards.get(self.id_to_cid.get(str(i)))))
-        
-        for card_id in sorted_ids:
-            count = deck_dict[card_id]
-            cid = self.id_to_cid.get(str(card_id))
-            if not cid: continue
-            
-            card_data = self.all_cards.get(cid, {})
-            display_name = self.get_card_display_name(card_data)
-            point_cost = card_data.get("point", 0)
-            image_path = os.path.join("pics", f"{card_id}.jpg")
-
-            base_pixmap = QPixmap(image_path).scaled(self.icon_size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-            if base_pixmap.isNull() or base_pixmap.size() != self.icon_size:
-                base_pixmap = QPixmap(self.icon_size)
-                base_pixmap.fill(Qt.darkGray)
-
-            final_icon = QIcon()
-            if point_cost > 0:
-                overlay_pixmap = base_pixmap.copy()
-                painter = QPainter(overlay_pixmap)
-                font = QFont(); font.setBold(True); font.setPixelSize(16)
-                painter.setFont(font)
-                point_text = str(point_cost)
-                
-                # Draw black outline for better visibility
-                painter.setPen(QColor("black"))
-                painter.drawText(QRect(2, 2, self.icon_size.width(), self.icon_size.height()), Qt.AlignTop | Qt.AlignLeft, point_text)
-                painter.drawText(QRect(4, 2, self.icon_size.width(), self.icon_size.height()), Qt.AlignTop | Qt.AlignLeft, point_text)
-                painter.drawText(QRect(2, 4, self.icon_size.width(), self.icon_size.height()), Qt.AlignTop | Qt.AlignLeft, point_text)
-                painter.drawText(QRect(4, 4, self.icon_size.width(), self.icon_size.height()), Qt.AlignTop | Qt.AlignLeft, point_text)
-
-                # Draw main gold text
-                painter.setPen(QColor("#FFD700"))
-                painter.drawText(QRect(3, 3, self.icon_size.width(), self.icon_size.height()), Qt.AlignTop | Qt.AlignLeft, point_text)
-                painter.end()
-                final_icon = QIcon(overlay_pixmap)
-            else:
-                final_icon = QIcon(base_pixmap)
-
-            for _ in range(count):
-                item = QListWidgetItem()
-                item.setIcon(final_icon)
-                item.setText(display_name)
-                item.setData(Qt.UserRole, card_id)
-                item.setToolTip(f"{display_name}\nPoint: {point_cost}")
-                list_widget.addItem(item)
-    
+        for card_id in self.deck_model.card_ids(deck_name): list_widget.addItem(self.create_deck_item(card_id))
+
+    def on_deck_card_inserted(self, deck_name, row):
+        card_id = self.deck_model.rows[deck_name][row][1]
+        self.deck_list_widgets[deck_name].insertItem(row, self.create_deck_item(card_id))
+        self.on_deck_totals_changed(deck_name)
+
+    def on_deck_card_removed(self, deck_name, row):
+        list_widget = self.deck_list_widgets[deck_name]
+        list_widget.blockSignals(True); list_widget.takeItem(row); list_widget.blockSignals(False)
+        self.on_deck_totals_changed(deck_name)
+
+    def on_deck_totals_changed(self, deck_name):
+        self.update_deck_title(deck_name); self.update_stats_display(); self.update_points_display()
+        if deck_name == "Main Deck": self.update_odds_display()
+
+    def update_deck_title(self, deck_name):
+        lang = self.current_lang; t = self.translations; size = self.deck_model.sizes[deck_name]
+        counts = self.deck_model.category_counts[deck_name]
+        if deck_name == "Main Deck":
+            title = f"{t['main_deck_label'][lang]} | {size} ({t['monster_short'][lang]}:{counts.get('monster', 0)} {t['spell_short'][lang]}:{counts.get('spell', 0)} {t['trap_short'][lang]}:{counts.get('trap', 0)})"
+        elif deck_name == "Extra Deck":
+            title = f"{t['extra_deck_label'][lang]} | {size} ({t['fusion_short'][lang]}:{counts.get('fusion', 0)} {t['synchro_short'][lang]}:{counts.get('synchro', 0)} {t['xyz_short'][lang]}:{counts.get('xyz', 0)})"
+        else:
+            title = f"{t['side_deck_label'][lang]} | {size}"
+        self.deck_groups[deck_name].setTitle(title)
+
+    def update_deck_titles(self):
+        for deck_name in self.deck_model.DECK_NAMES: self.update_deck_title(deck_name)
+
+    @PROFILER.instrument()
     def update_all_views(self):
-        lang = self.current_lang
-        main_total = sum(self.main_deck.values())
-        m, s, t = 0, 0, 0
-        for card_id, count in self.main_deck.items():
-            cid = self.id_to_cid.get(str(card_id), ''); card_data = self.all_cards.get(cid, {})
-            types = card_data.get("text", {}).get("types", "")
-            if "怪兽" in types: m += count
-            elif "魔法" in types: s += count
-            elif "陷阱" in types: t += count
-        main_title_base = self.translations["main_deck_label"][lang]
-        self.main_deck_group.setTitle(f"{main_title_base} | {main_total} ({self.translations['monster_short'][lang]}:{m} {self.translations['spell_short'][lang]}:{s} {self.translations['trap_short'][lang]}:{t})")
-        
-        extra_total = sum(self.extra_deck.values())
-        f, s_ex, x = 0, 0, 0
-        for card_id, count in self.extra_deck.items():
-            cid = self.id_to_cid.get(str(card_id), ''); card_data = self.all_cards.get(cid, {})
-            types = card_data.get("text", {}).get("types", "")
-            if "融合" in types: f += count
-            elif "同调" in types: s_ex += count
-            elif "超量" in types: x += count
-        extra_title_base = self.translations["extra_deck_label"][lang]
-        self.extra_deck_group.setTitle(f"{extra_title_base} | {extra_total} ({self.translations['fusion_short'][lang]}:{f} {self.translations['synchro_short'][lang]}:{s_ex} {self.translations['xyz_short'][lang]}:{x})")
-
-        side_total = sum(self.side_deck.values())
-        side_title_base = self.translations["side_deck_label"][lang]
-        self.side_deck_group.setTitle(f"{side_title_base} | {side_total}")
-
-        self.update_deck_list_widget(self.main_deck_list, self.main_deck)
-        self.update_deck_list_widget(self.extra_deck_list, self.extra_deck)
-        self.update_deck_list_widget(self.side_deck_list, self.side_deck)
-        
-        self.update_stats_display(); self.update_points_display()
+        self.update_deck_titles()
+        for deck_name, list_widget in self.deck_list_widgets.items(): self.update_deck_list_widget(list_widget, deck_name)
+        self.update_stats_display(); self.update_points_display(); self.update_odds_display()
 
     def restore_selection(self):
         if not self.active_cid or not self.active_card_source_list: return
         target_list = self.active_card_source_list
+        if target_list is self.card_list_view:
+            row = self.card_list_model.row_of(self.active_cid)
+            if row is None: return
+            index = self.card_list_model.index(row); selection_model = self.card_list_view.selectionModel()
+            selection_model.blockSignals(True); selection_model.select(index, QItemSelectionModel.ClearAndSelect); selection_model.blockSignals(False)
+            self.card_list_view.scrollTo(index); return
+        card_id = self.all_cards[self.active_cid].id
+        row = self.deck_model.first_row(target_list.objectName(), card_id)
+        if row is None: return
         target_list.blockSignals(True)
-        data_to_find = self.active_cid
-        if target_list is not self.card_list_view:
-            card_id = self.all_cards[self.active_cid].get("id")
-            data_to_find = card_id
-        for i in range(target_list.count()):
-            item = target_list.item(i)
-            if item.data(Qt.UserRole) == data_to_find:
-                item.setSelected(True); target_list.scrollToItem(item)
-                break
+        item = target_list.item(row); item.setSelected(True); target_list.scrollToItem(item)
         target_list.blockSignals(False)
 
     def update_stats_display(self):
-        main_count = sum(self.main_deck.values()); extra_count = sum(self.extra_deck.values()); side_count = sum(self.side_deck.values())
+        sizes = self.deck_model.sizes; main_count = sizes["Main Deck"]; extra_count = sizes["Extra Deck"]; side_count = sizes["Side Deck"]
         self.stats_label.setText(self.translations["deck_stats_label"][self.current_lang].format(main_count, extra_count, side_count))
 
     def update_points_display(self):
-        total_points = sum(self.all_cards[self.id_to_cid[str(cid)]].get("point", 0) * count for deck in (self.main_deck, self.extra_deck, self.side_deck) for cid, count in deck.items())
+        total_points = self.deck_model.total_points
         point_cap = self.point_cap_spinbox.value(); self.points_label.setText(f"{total_points} / {point_cap}")
         self.points_label.setStyleSheet("color: red; font-weight: bold;" if total_points > point_cap else "")
 
-    def on_browser_card_double_clicked(self, item):
-        cid = item.data(Qt.UserRole); card_data = self.all_cards.get(cid)
+    def toggle_card_group(self, group_name):
+        if not self.active_cid:
+            QMessageBox.information(self, "Info", self.translations["select_card_to_add"][self.current_lang]); return
+        card_ids = self.card_groups[group_name]; card_id = self.all_cards[self.active_cid].id
+        if card_id in card_ids: card_ids.discard(card_id)
+        else: card_ids.add(card_id)
+        self.update_odds_display()
+
+    def update_odds_display(self):
+        lang = self.current_lang; t = self.translations; hand_size = self.hand_size_spinbox.value()
+        deck_size = sum(self.main_deck.values()); sizes = deck_sim.group_sizes(self.main_deck, self.card_groups); lines = []
+        if self.active_cid:
+            card_id = self.all_cards[self.active_cid].id; copies = self.main_deck.get(card_id, 0)
+            lines.append(f"{t['odds_selected'][lang]} ({copies}): {deck_sim.prob_at_least(deck_size, copies, hand_size):.1%}")
+        for group_name in ("starter", "extender"):
+            lines.append(f"{t[group_name][lang]} ({sizes[group_name]}): {deck_sim.prob_at_least(deck_size, sizes[group_name], hand_size):.1%}")
+        combo = deck_sim.exact_probability(self.main_deck, self.card_groups, {"starter": 1, "extender": 1}, hand_size)
+        lines.append(f"{t['odds_combo'][lang]}: {'—' if combo is None else format(combo, '.1%')}")
+        self.odds_label.setText("<br>".join(lines))
+
+    def run_odds_simulation(self):
+        task = _SimulationTask(self.main_deck, self.card_groups, {"starter": 1, "extender": 1}, self.hand_size_spinbox.value(), 1_000_000)
+        task.signals.finished.connect(self.on_odds_simulated); task.signals.failed.connect(self.on_odds_simulation_failed)
+        self.simulate_btn.setEnabled(False); self.simulation_task = task
+        QThreadPool.globalInstance().start(task)
+
+    def on_odds_simulated(self, probability, trials):
+        self.simulate_btn.setEnabled(True); self.simulation_task = None
+        lang = self.current_lang; t = self.translations
+        # Shown until the next deck or selection change recomputes the exact odds.
+        self.update_odds_display()
+        self.odds_label.setText(self.odds_label.text() + f"<br>{t['odds_combo'][lang]} ({t['odds_simulated'][lang].format(f'{trials:,}')}): {probability:.1%}")
+
+    def on_odds_simulation_failed(self, error):
+        self.simulate_btn.setEnabled(True); self.simulation_task = None
+        QMessageBox.warning(self, "Error", self.translations["numpy_required"][self.current_lang] if error == "numpy" else error)
+
+    def on_browser_context_menu(self, pos):
+        index = self.card_list_view.indexAt(pos)
+        if not index.isValid(): return
+        cid = index.data(Qt.UserRole); card_id = self.all_cards[cid].id; t = self.translations; lang = self.current_lang
+        menu = QMenu(self)
+        required_action = menu.addAction(t["mark_required"][lang]); preferred_action = menu.addAction(t["mark_preferred"][lang])
+        excluded_action = menu.addAction(t["mark_excluded"][lang]); clear_action = menu.addAction(t["clear_mark"][lang])
+        action = menu.exec(self.card_list_view.viewport().mapToGlobal(pos))
+        if action is None: return
+        marks = self.optimizer_marks
+        if action is required_action:
+            copies, ok = QInputDialog.getInt(self, t["mark_required"][lang], t["required_copies_prompt"][lang], 1, 1, genesys_rules.COPY_LIMIT)
+            if not ok: return
+            self.clear_optimizer_mark(card_id); marks["required"][card_id] = copies; self.card_list_model.set_color(cid, QColor("darkgreen"))
+        elif action is preferred_action:
+            weight, ok = QInputDialog.getDouble(self, t["mark_preferred"][lang], t["preferred_weight_prompt"][lang], marks["preferred"].get(card_id, 1.0), 0.01, 1000.0, 2)
+            if not ok: return
+            self.clear_optimizer_mark(card_id); marks["preferred"][card_id] = weight; self.card_list_model.set_color(cid, QColor("blue"))
+        elif action is excluded_action:
+            self.clear_optimizer_mark(card_id); marks["excluded"].add(card_id); self.card_list_model.set_color(cid, QColor("gray"))
+        else:
+            self.clear_optimizer_mark(card_id); self.card_list_model.set_color(cid, None)
+
+    def clear_optimizer_mark(self, card_id):
+        marks = self.optimizer_marks
+        marks["required"].pop(card_id, None); marks["preferred"].pop(card_id, None); marks["excluded"].discard(card_id)
+
+    def optimize_deck(self):
+        lang = self.current_lang; t = self.translations; marks = self.optimizer_marks
+        if not marks["required"] and not marks["preferred"]:
+            QMessageBox.information(self, "Info", t["optimizer_no_marks"][lang]); return
+        try:
+            import deck_optimizer
+            side_points = genesys_rules.deck_points((self.side_deck,), self.card_table)
+            result = deck_optimizer.optimize(self.card_table, self.point_cap_spinbox.value(), marks["required"], marks["preferred"], marks["excluded"], reserved_points=side_points, side_deck=self.side_deck)
+        except ImportError:
+            QMessageBox.warning(self, "Error", t["numpy_required"][lang]); return
+        except ValueError as e:
+            QMessageBox.warning(self, t["legality_error_title"][lang], t["optimizer_failed"][lang].format(e)); return
+        # The optimizer owns the size, copy and point rules; the side deck is left as the user built it.
+        issues = [issue for issue in genesys_rules.check_deck(result.main_deck, result.extra_deck, self.side_deck, self.card_table, self.point_cap_spinbox.value())
+                  if issue.code in ("main_deck_size", "extra_deck_size", "copy_limit", "point_cap")]
+        if issues:
+            QMessageBox.warning(self, t["legality_error_title"][lang], t["optimizer_failed"][lang].format(", ".join(issue.code for issue in issues))); return
+        message = t["optimizer_confirm"][lang].format(sum(result.main_deck.values()), sum(result.extra_deck.values()), result.points + side_points, result.value)
+        if QMessageBox.question(self, t["optimize_deck"][lang], message) == QMessageBox.Yes:
+            with self.deck_reset(): self.deck_model.set_decks(result.main_deck, result.extra_deck, self.side_deck)
+
+    def on_browser_card_double_clicked(self, index):
+        cid = index.data(Qt.UserRole); card_data = self.all_cards.get(cid)
         if not card_data: return
-        card_id = card_data.get("id"); card_type_text = card_data.get("text", {}).get("types", "")
-        if any(t in card_type_text for t in ["融合", "同调", "超量"]): self.add_card("Extra Deck", card_id)
+        card_id = card_data.id
+        if genesys_rules.is_extra_deck(self.card_table.flags_of(card_id)): self.add_card("Extra Deck", card_id)
         else: self.add_card("Main Deck", card_id)
 
     def on_deck_card_double_clicked(self, item):
@@ -406,88 +1405,114 @@ class DeckBuilderWindow(QMainWindow):
     def add_card_from_details(self, deck_name):
         if not self.active_cid:
             QMessageBox.information(self, "Info", self.translations["select_card_to_add"][self.current_lang]); return
-        card_id = self.all_cards[self.active_cid].get("id")
+        card_id = self.all_cards[self.active_cid].id
         if card_id: self.add_card(deck_name, card_id)
 
     def add_card(self, deck_name, card_id):
-        cid = self.id_to_cid.get(str(card_id))
-        if not cid: return
-        card_data = self.all_cards[cid]
-        card_type_text = card_data.get("text", {}).get("types", "")
-        
-        if "灵摆" in card_type_text or "链接" in card_type_text:
+        if str(card_id) not in self.id_to_cid: return
+        flags = self.card_table.flags_of(card_id)
+        if genesys_rules.is_forbidden(flags):
             QMessageBox.warning(self, self.translations["pend_link_forbidden_title"][self.current_lang], self.translations["pend_link_forbidden_msg"][self.current_lang])
             return
 
-        is_extra_deck_monster = any(t in card_type_text for t in ["融合", "同调", "超量"])
+        is_extra_deck_monster = genesys_rules.is_extra_deck(flags)
         if deck_name == "Main Deck" and is_extra_deck_monster:
             QMessageBox.warning(self, self.translations["legality_error_title"][self.current_lang], self.translations["extra_in_main_error_msg"][self.current_lang]); return
         if deck_name == "Extra Deck" and not is_extra_deck_monster:
             QMessageBox.warning(self, self.translations["legality_error_title"][self.current_lang], self.translations["main_in_extra_error_msg"][self.current_lang]); return
-        deck_map = {"Main Deck": self.main_deck, "Extra Deck": self.extra_deck, "Side Deck": self.side_deck}
-        deck = deck_map.get(deck_name); total_count = sum(d.get(card_id, 0) for d in deck_map.values())
-        if total_count >= 3:
+        if deck_name not in self.deck_model.decks: return
+        if self.deck_model.copies(card_id) >= genesys_rules.COPY_LIMIT:
             QMessageBox.warning(self, self.translations["limit_reached"][self.current_lang], self.translations["limit_reached_msg"][self.current_lang]); return
-        deck[card_id] = deck.get(card_id, 0) + 1
-        self.update_all_views()
+        self.deck_model.add(deck_name, card_id)
+        edit = deck_journal.Edit(DeckModel.DECK_NAMES.index(deck_name), card_id, 1); self.record_change(edit, deck_journal.edit_record(edit))
         self.restore_selection()
     
     def remove_card(self, deck_name, card_id, amount):
-        deck_map = {"Main Deck": self.main_deck, "Extra Deck": self.extra_deck, "Side Deck": self.side_deck}
-        deck = deck_map.get(deck_name)
-        if deck is None or card_id not in deck: return
-        if amount == 'all' or deck[card_id] <= amount: del deck[card_id]
-        else: deck[card_id] -= amount
-        self.update_all_views()
+        removed = self.deck_model.remove(deck_name, card_id, amount)
+        if removed:
+            edit = deck_journal.Edit(DeckModel.DECK_NAMES.index(deck_name), card_id, -removed); self.record_change(edit, deck_journal.edit_record(edit))
         self.restore_selection()
 
     def new_deck(self):
+        with self.deck_reset(): self.clear_deck()
+
+    def clear_deck(self):
         self.active_cid = None; self.active_card_source_list = None
-        self.main_deck.clear(); self.extra_deck.clear(); self.side_deck.clear()
         self.current_file_path = None
         self.card_info_label.clear()
         self.card_image_label.setText(self.translations["no_card_selected"][self.current_lang])
-        self.update_all_views()
+        self.deck_model.clear()
         self.setWindowTitle(f"{self.translations['window_title'][self.current_lang]} - {self.translations['new_deck'][self.current_lang]}")
 
     def open_deck(self):
-        filepath, _ = QFileDialog.getOpenFileName(self, self.translations["open_deck"][self.current_lang], "", "YGOPro Deck (*.ydk);;All Files (*)")
-        if not filepath: return
-        self.new_deck(); self.current_file_path = filepath; current_section = None
+        filepath, _ = QFileDialog.getOpenFileName(self, self.translations["open_deck"][self.current_lang], "", f"YGOPro Deck (*.ydk);;Deck Archive (*{deck_codec.ARCHIVE_EXT});;All Files (*)")
+        if filepath: self.open_deck_path(filepath)
+
+    @PROFILER.instrument()
+    def open_deck_path(self, filepath):
+        if not self.card_data_ready:
+            # Unknown-id checks need the card data; the deck opens once it has loaded.
+            self.pending_deck_paths.append(filepath); return
+        known_ids = self.card_table.row_of_id
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                for line in f:
-                    line = line.strip()
-                    if not line or line.startswith('#created by'): continue
-                    if line == '#main': current_section = self.main_deck
-                    elif line == '#extra': current_section = self.extra_deck
-                    elif line == '!side': current_section = self.side_deck
-                    elif line.isdigit() and current_section is not None:
-                        card_id = int(line)
-                        if str(card_id) in self.id_to_cid: current_section[card_id] = current_section.get(card_id, 0) + 1
-        except Exception as e: QMessageBox.critical(self, "Error", f"Could not read deck file:\n{e}")
-        self.update_all_views(); self.setWindowTitle(f"Deck Builder - {os.path.basename(filepath)}")
+            if filepath.lower().endswith(deck_codec.ARCHIVE_EXT): return self.open_archived_deck(filepath)
+            deck, unknown = deck_codec.read_ydk(filepath, known_ids)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Could not read deck file:\n{e}"); return
+        self.load_deck(deck, unknown, filepath, os.path.basename(filepath))
+
+    @PROFILER.instrument()
+    def open_archived_deck(self, filepath):
+        decks = deck_codec.read_archive(filepath)
+        if not decks: return
+        name, ok = QInputDialog.getItem(self, self.translations["open_deck"][self.current_lang], self.translations["choose_archived_deck"][self.current_lang], [deck.name for deck in decks], 0, False)
+        if not ok: return
+        archived = next(deck for deck in decks if deck.name == name)
+        self.load_archived_deck(name, archived[1:])
+
+    def load_archived_deck(self, name, deck):
+        known_ids = self.card_table.row_of_id; unknown = {}; sections = []
+        for cards in deck:
+            sections.append({card_id: count for card_id, count in cards.items() if card_id in known_ids})
+            unknown.update((card_id, count) for card_id, count in cards.items() if card_id not in known_ids)
+        # Archive entries are not written back in place, so saving asks for a .ydk path.
+        self.load_deck(deck_codec.Deck(*sections), unknown, None, name)
+
+    def load_deck(self, deck, unknown, filepath, title):
+        with self.deck_reset():
+            self.clear_deck(); self.current_file_path = filepath
+            self.deck_model.set_decks(*deck); self.setWindowTitle(f"Deck Builder - {title}")
+        if unknown:
+            listing = "\n".join(f"{card_id} x{count}" for card_id, count in unknown.items())
+            QMessageBox.warning(self, "Warning", self.translations["unknown_cards_dropped"][self.current_lang].format(listing))
+
+    def import_ydke(self):
+        try: deck, unknown = deck_codec.decode_ydke(QApplication.clipboard().text(), self.card_table.row_of_id)
+        except ValueError as e:
+            QMessageBox.warning(self, "Error", self.translations["ydke_invalid"][self.current_lang].format(e)); return
+        self.load_deck(deck, unknown, None, "ydke://")
+
+    def export_ydke(self):
+        QApplication.clipboard().setText(deck_codec.encode_ydke(self.main_deck, self.extra_deck, self.side_deck))
+        self.statusBar().showMessage(self.translations["ydke_copied"][self.current_lang], 3000)
+
+    def get_card_by_id(self, card_id):
+        cid = self.id_to_cid.get(str(card_id))
+        return self.all_cards.get(cid) if cid else None
 
     def check_deck_legality(self):
         lang = self.current_lang; error_messages = []
-        main_count = sum(self.main_deck.values()); extra_count = sum(self.extra_deck.values()); side_count = sum(self.side_deck.values())
-        if not (40 <= main_count <= 60): error_messages.append(self.translations["main_deck_size_error"][lang].format(main_count))
-        if extra_count > 15: error_messages.append(self.translations["extra_deck_size_error"][lang].format(extra_count))
-        if side_count > 15: error_messages.append(self.translations["side_deck_size_error"][lang].format(side_count))
-        all_cards_counter = {}; illegal_main = []; illegal_extra = []
-        for card_id, count in self.main_deck.items():
-            all_cards_counter[card_id] = all_cards_counter.get(card_id, 0) + count
-            card_data = self.all_cards[self.id_to_cid[str(card_id)]]; card_type = card_data.get("text", {}).get("types", "")
-            if any(t in card_type for t in ["融合", "同调", "超量"]): illegal_main.append(self.get_card_display_name(card_data))
-        for card_id, count in self.extra_deck.items():
-            all_cards_counter[card_id] = all_cards_counter.get(card_id, 0) + count
-            card_data = self.all_cards[self.id_to_cid[str(card_id)]]; card_type = card_data.get("text", {}).get("types", "")
-            if not any(t in card_type for t in ["融合", "同调", "超量"]): illegal_extra.append(self.get_card_display_name(card_data))
-        for card_id, count in self.side_deck.items(): all_cards_counter[card_id] = all_cards_counter.get(card_id, 0) + count
-        for card_id, count in all_cards_counter.items():
-            if count > 3: error_messages.append(self.translations["copy_limit_error"][lang].format(self.get_card_display_name(self.all_cards[self.id_to_cid[str(card_id)]])))
-        if illegal_main: error_messages.append(self.translations["extra_in_main_list_header"][lang] + "\n- " + "\n- ".join(set(illegal_main)))
-        if illegal_extra: error_messages.append(self.translations["main_in_extra_list_header"][lang] + "\n- " + "\n- ".join(set(illegal_extra)))
+        issues = genesys_rules.check_deck(self.main_deck, self.extra_deck, self.side_deck, self.card_table, self.point_cap_spinbox.value())
+        names = lambda card_ids: "\n- " + "\n- ".join(dict.fromkeys(self.get_card_display_name(self.get_card_by_id(i)) for i in card_ids))
+        for issue in issues:
+            if issue.code == "main_deck_size": error_messages.append(self.translations["main_deck_size_error"][lang].format(issue.detail))
+            elif issue.code == "extra_deck_size": error_messages.append(self.translations["extra_deck_size_error"][lang].format(issue.detail))
+            elif issue.code == "side_deck_size": error_messages.append(self.translations["side_deck_size_error"][lang].format(issue.detail))
+            elif issue.code == "copy_limit": error_messages.append(self.translations["copy_limit_error"][lang].format(self.get_card_display_name(self.get_card_by_id(issue.detail))))
+            elif issue.code == "forbidden_cards": error_messages.append(self.translations["forbidden_list_header"][lang] + names(issue.detail))
+            elif issue.code == "extra_in_main": error_messages.append(self.translations["extra_in_main_list_header"][lang] + names(issue.detail))
+            elif issue.code == "main_in_extra": error_messages.append(self.translations["main_in_extra_list_header"][lang] + names(issue.detail))
+            elif issue.code == "point_cap": error_messages.append(self.translations["point_cap_error"][lang].format(issue.detail, self.point_cap_spinbox.value()))
         if error_messages:
             full_error_msg = self.translations["deck_illegal_header"][lang] + "\n* " + "\n* ".join(error_messages)
             QMessageBox.critical(self, self.translations["deck_illegal_title"][lang], full_error_msg); return False
@@ -496,26 +1521,37 @@ class DeckBuilderWindow(QMainWindow):
     def save_deck(self):
         if not self.check_deck_legality(): return
         if not self.current_file_path: self.save_deck_as()
-        else: self._write_deck_file(self.current_file_path)
+        elif self._write_deck_file(self.current_file_path): self.record_saved()
 
     def save_deck_as(self):
         if not self.check_deck_legality(): return
         filepath, _ = QFileDialog.getSaveFileName(self, self.translations["save_as"][self.current_lang], "", "YGOPro Deck (*.ydk);;All Files (*)")
         if filepath:
-            self.current_file_path = filepath; self._write_deck_file(filepath)
+            self.current_file_path = filepath
+            saved = self._write_deck_file(filepath)
             self.setWindowTitle(f"YGOgenesys Deck Builder - {os.path.basename(filepath)}")
+            if saved: self.record_saved()
 
+    def record_saved(self):
+        # The file name and title are not undoable, but a restored session should keep them.
+        if self.journal is not None: self.journal.append({"t": "saved", "path": self.current_file_path, "title": self.windowTitle()})
+
+    @PROFILER.instrument()
     def _write_deck_file(self, filepath):
+        # Written beside the target and swapped in, so a failed save never leaves a truncated deck.
+        tmp_path = filepath + ".tmp"
         try:
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write("#created by YGOgenesys Deck Builder\n")
-                f.write("#main\n"); [f.write(f"{cid}\n" * c) for cid, c in self.main_deck.items()]
-                f.write("#extra\n"); [f.write(f"{cid}\n" * c) for cid, c in self.extra_deck.items()]
-                f.write("!side\n"); [f.write(f"{cid}\n" * c) for cid, c in self.side_deck.items()]
-        except Exception as e: QMessageBox.critical(self, "Error", f"Could not write to deck file:\n{e}")
+            with open(tmp_path, 'w', encoding='utf-8') as f: deck_codec.write_ydk(f, self.main_deck, self.extra_deck, self.side_deck)
+            os.replace(tmp_path, filepath)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Could not write to deck file:\n{e}"); return False
+        return True
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
     window = DeckBuilderWindow()
     window.show()
+    # Decks passed on the command line (e.g. by a file association) open once the cards are loaded.
+    for path in app.arguments()[1:]:
+        if os.path.isfile(path): window.open_deck_path(path)
     sys.exit(app.exec())
\ No newline at end of file
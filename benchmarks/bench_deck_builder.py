@@ -0,0 +1,233 @@
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+# Offscreen timing of the deck builder against generated card databases.
+#   python benchmarks/bench_deck_builder.py [--sizes 10000 20000 50000] [-o bench_results.json]
+# Each size gets its own work directory with a synthetic cards_data.json and card
+# art in pics/. Timings are in milliseconds; compare the JSON from two revisions
+# to spot regressions.
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from PySide6 import __version__ as PYSIDE_VERSION
+from PySide6.QtCore import QEventLoop, QTimer
+from PySide6.QtGui import QColor, QImage
+from PySide6.QtWidgets import QApplication, QMessageBox
+
+TYPES = [
+    ("[怪兽|效果] 战士/光\n[★4] 1800/1200", 40), ("[怪兽|通常] 龙/暗\n[★7] 2500/2000", 8),
+    ("[魔法]", 12), ("[魔法|速攻]", 6), ("[陷阱]", 10), ("[陷阱|反击]", 3),
+    ("[怪兽|效果|融合] 龙/暗\n[★8] 3000/2500", 5), ("[怪兽|效果|同调] 机械/地\n[★6] 2300/1400", 5),
+    ("[怪兽|效果|超量] 魔法师/光\n[☆4] 2100/1800", 5), ("[怪兽|效果|灵摆] 龙/暗\n[★5] 2000/0", 3),
+    ("[怪兽|效果|链接] 电子界/暗\n[LINK-2] 1500", 3),
+]
+EN_WORDS = ["Blue-Eyes", "White", "Dragon", "Dark", "Magician", "Ash", "Blossom", "Joyous", "Spring", "Called", "By",
+            "The", "Grave", "Maxx", "Sky", "Striker", "Ace", "Raye", "Knight", "Of", "Destiny", "Hero", "Elemental"]
+CN_WORDS = ["青眼", "白龙", "黑魔", "导师", "龙", "战士", "魔法", "陷阱", "灰流", "丽", "增殖", "的", "天使", "英雄", "闪刀"]
+JP_WORDS = ["ブルー", "アイズ", "ホワイト", "ドラゴン", "ブラック", "マジシャン", "灰流", "うらら", "増殖", "の", "閃刀姫", "ヒーロー"]
+POINTS = [0] * 90 + [1, 2, 5, 10, 15, 20, 33, 50, 75, 100]
+QUERIES = {"en_name": ["dragon", "blue-eyes white", "ash blosom", "hero t:monster p:0-10"], "cn_name": ["青眼白龙", "灰流丽", "闪刀", "qybl"], "jp_name": ["ブルーアイズ", "buruuaizu", "灰流うらら"]}
+DECK_SHAPES = {40: (40, 0, 0), 60: (45, 15, 0), 90: (60, 15, 15)}
+
+
+def generate_cards(count, seed):
+    rng = random.Random(seed); types = [t for t, _ in TYPES]; weights = [w for _, w in TYPES]; cards = {}
+    for i in range(count):
+        en_name = " ".join(rng.choice(EN_WORDS) for _ in range(rng.randint(2, 5)))
+        cn_name = "".join(rng.choice(CN_WORDS) for _ in range(rng.randint(2, 5)))
+        jp_name = "".join(rng.choice(JP_WORDS) for _ in range(rng.randint(2, 4)))
+        cid = 10000 + i
+        cards[str(cid)] = {
+            "cid": cid, "id": 10000000 + i * 7, "cn_name": cn_name, "sc_name": cn_name, "nwbbs_n": cn_name, "cnocg_n": cn_name,
+            "jp_name": jp_name, "en_name": en_name, "point": rng.choice(POINTS),
+            "text": {"types": rng.choices(types, weights)[0], "desc": f"{en_name}: " + "效果文本。" * rng.randint(20, 80)},
+        }
+    return cards
+
+
+def generate_images(pics_dir, card_ids, size=(400, 580)):
+    os.makedirs(pics_dir, exist_ok=True)
+    for i, card_id in enumerate(card_ids):
+        image = QImage(size[0], size[1], QImage.Format_RGB32); image.fill(QColor(i % 255, (i * 7) % 255, (i * 13) % 255))
+        image.save(os.path.join(pics_dir, f"{card_id}.jpg"), "JPG", 90)
+
+
+def prepare_workdir(workdir, count, images, seed):
+    os.makedirs(workdir, exist_ok=True)
+    json_path = os.path.join(workdir, "cards_data.json")
+    if os.path.exists(json_path):
+        with open(json_path, "r", encoding="utf-8") as f: cards = json.load(f)
+        if len(cards) == count: return cards
+    cards = generate_cards(count, seed)
+    with open(json_path, "w", encoding="utf-8") as f: json.dump(cards, f, ensure_ascii=False)
+    rng = random.Random(seed); ids = [card["id"] for card in cards.values()]
+    generate_images(os.path.join(workdir, "pics"), rng.sample(ids, min(images, len(ids))))
+    return cards
+
+
+def summarize(samples):
+    samples = sorted(samples); n = len(samples)
+    return {"n": n, "min": samples[0], "median": samples[n // 2], "mean": sum(samples) / n, "p95": samples[min(n - 1, int(n * 0.95))], "max": samples[-1]}
+
+
+def timed(func, *args):
+    start = time.perf_counter(); func(*args)
+    return (time.perf_counter() - start) * 1000
+
+
+def repeat(func, times, *args):
+    return summarize([timed(func, *args) for _ in range(times)])
+
+
+def wait(ms):
+    loop = QEventLoop(); QTimer.singleShot(ms, loop.quit); loop.exec()
+
+
+def open_window(module, timeout=120):
+    # (window, ms until the shell is built, ms until the background card load is applied)
+    start = time.perf_counter(); window = module.DeckBuilderWindow(); shell_ms = (time.perf_counter() - start) * 1000
+    while not window.card_data_ready:
+        if time.perf_counter() - start > timeout: raise RuntimeError("card data did not load")
+        QApplication.processEvents(QEventLoop.AllEvents, 5); time.sleep(0.001)
+    return window, shell_ms, (time.perf_counter() - start) * 1000
+
+
+def card_pools(module, table):
+    main_ids, extra_ids = [], []
+    for card_id in table.row_of_id:
+        flags = table.flags_of(card_id)
+        if module.genesys_rules.is_forbidden(flags): continue
+        (extra_ids if module.genesys_rules.is_extra_deck(flags) else main_ids).append(card_id)
+    return main_ids, extra_ids
+
+
+def random_deck(pools, shape, rng):
+    main_ids, extra_ids = pools; picks = [{}, {}, {}]
+    for deck, pool, wanted in zip(picks, (main_ids, extra_ids, main_ids), shape):
+        total = 0
+        while total < wanted:
+            card_id = rng.choice(pool); copies = min(rng.randint(1, 3), 3 - deck.get(card_id, 0), wanted - total)
+            if copies > 0: deck[card_id] = deck.get(card_id, 0) + copies; total += copies
+    return picks
+
+
+def build_decks(module, window, rng):
+    pools = card_pools(module, window.card_table)
+    return {size: random_deck(pools, shape, rng) for size, shape in DECK_SHAPES.items()}
+
+
+def index_decks(module, path):
+    import deck_similarity
+    decks = deck_similarity.DeckSet.read([path]); decks.hashes()
+    deck_similarity.LSHIndex(decks.signatures()).clusters()
+
+
+def bench_metagame(module, window, workdir, count, rng):
+    # A deck archive of `count` random 60-card decks, folded by deck_stats on all cores and
+    # indexed for duplicates, similarity and clusters (the latter needs NumPy).
+    import deck_stats
+    path = os.path.join(workdir, f"meta_{count}.ydka")
+    if not os.path.exists(path):
+        pools = card_pools(module, window.card_table)
+        module.deck_codec.write_archive(path, ((f"deck{i}", *random_deck(pools, DECK_SHAPES[60], rng)) for i in range(count)))
+    results = {"decks": count, "collect_usage": timed(deck_stats.collect_usage, [path], window.card_table, start_method="spawn")}
+    try: results["index_decks"] = timed(index_decks, module, path)
+    except ImportError: pass
+    return results
+
+
+def bench_size(module, count, workdir, args):
+    cards = prepare_workdir(workdir, count, args.images, args.seed)
+    os.chdir(workdir); rng = random.Random(args.seed); results = {"cards": count}
+    db_path = os.path.join(workdir, "cards_data.db")
+    if os.path.exists(db_path): os.remove(db_path)
+
+    window, results["shell_cold_ms"], results["startup_cold_ms"] = open_window(module)
+    warm_window, results["shell_warm_ms"], results["startup_warm_ms"] = open_window(module); warm_window.deleteLater()
+    samples = []
+    for _ in range(args.repeat):
+        os.remove(db_path); samples.append(timed(window.load_card_data))
+    results["load_card_data_cold"] = summarize(samples)
+    results["load_card_data_warm"] = repeat(window.load_card_data, args.repeat)
+    results["warm_search_index"] = timed(window.warm_search_index)
+
+    typing = {}
+    for name_key, queries in QUERIES.items():
+        window.name_display_combo.setCurrentIndex(window.name_display_combo.findData(name_key)); window.warm_search_index()
+        keystrokes = []
+        for query in queries:
+            for end in range(1, len(query) + 1):
+                window.search_input.blockSignals(True); window.search_input.setText(query[:end]); window.search_input.blockSignals(False)
+                keystrokes.append(timed(window.filter_card_list))
+            window.search_input.blockSignals(True); window.search_input.clear(); window.search_input.blockSignals(False)
+            keystrokes.append(timed(window.filter_card_list))
+        typing[name_key] = summarize(keystrokes)
+    results["filter_card_list"] = typing
+
+    decks = build_decks(module, window, rng); views = {}; legality = {}
+    for size, picks in decks.items():
+        window.deck_model.set_decks(*picks)
+        views[str(size)] = repeat(window.update_all_views, args.repeat)
+        legality[str(size)] = repeat(window.check_deck_legality, args.repeat)
+    results["update_all_views"] = views; results["check_deck_legality"] = legality
+
+    if args.meta_decks: results["metagame"] = bench_metagame(module, window, workdir, args.meta_decks, random.Random(args.seed))
+
+    cids = rng.sample(list(cards), min(200, len(cards)))
+    window.card_list_cids = cids; window.update_card_list_view()
+    results["display_card_by_cid"] = summarize([timed(window.display_card_by_cid, cid, window.card_list_view) for cid in cids])
+    wait(200)
+    results["display_card_by_cid_cached"] = summarize([timed(window.display_card_by_cid, cid, window.card_list_view) for cid in cids[-20:]])
+    window.deleteLater(); QApplication.processEvents()
+    return results
+
+
+def git_revision():
+    try: return subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError): return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offscreen benchmarks for the YGO Genesys deck builder.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 20000, 50000], help="card database sizes (default: %(default)s)")
+    parser.add_argument("--images", type=int, default=1000, help="synthetic card images per database")
+    parser.add_argument("--repeat", type=int, default=5, help="samples per timing")
+    parser.add_argument("--meta-decks", type=int, default=100000, help="decks in the metagame and similarity archive, 0 to skip")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--workdir", help="keep generated databases here and reuse them on later runs (default: a temporary directory)")
+    parser.add_argument("-o", "--output", default="bench_results.json", help="where to write the JSON results")
+    args = parser.parse_args(argv)
+    output = os.path.abspath(args.output); cwd = os.getcwd()
+
+    app = QApplication.instance() or QApplication([])  # noqa: F841 (kept alive for the whole run)
+    # Legality failures and missing files would otherwise open modal dialogs.
+    for name in ("critical", "warning", "information"): setattr(QMessageBox, name, staticmethod(lambda *a, **k: QMessageBox.Ok))
+    import YGOgenesys_deck_builder as module
+
+    base = args.workdir or tempfile.mkdtemp(prefix="ygo_bench_"); results = {}
+    try:
+        for count in args.sizes:
+            print(f"benchmarking {count} cards...", file=sys.stderr)
+            results[str(count)] = bench_size(module, count, os.path.join(base, str(count)), args)
+    finally: os.chdir(cwd)
+    report = {
+        "meta": {"revision": git_revision(), "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"), "python": platform.python_version(),
+                 "pyside6": PYSIDE_VERSION, "platform": platform.platform(), "qpa": os.environ.get("QT_QPA_PLATFORM"), "repeat": args.repeat},
+        "results": results,
+    }
+    with open(output, "w", encoding="utf-8") as f: json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"results written to {output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
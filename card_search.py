@@ -0,0 +1,280 @@
+import importlib.util
+import re
+import unicodedata
+import zlib
+from array import array
+from collections import Counter, namedtuple
+from itertools import accumulate, chain
+
+import genesys_rules
+
+# Ranked card search over every name field and the effect text. Names are
+# normalized (NFKC, case folded, katakana folded to hiragana, punctuation and
+# spaces dropped) and each card also gets romaji for its Japanese name and, when
+# pypinyin is installed, pinyin for its Chinese names. Trigrams are hashed into a
+# fixed number of buckets, so the inverted index is two flat arrays that load
+# without building a token dictionary. The index is built with the card
+# snapshot and persisted in it; the effect-text postings are only read the first
+# time a search includes effect text.
+#
+# Query syntax: free text plus optional filters, e.g. "blue eyes t:monster p:0-10".
+#   t:NAME (or type:NAME)  monster spell trap fusion synchro xyz pendulum link, or 怪兽/魔法/...
+#   p:N, p:N-M, p:>=N, p:<N  point cost (current point list)
+
+GRAM = 3
+NAME_BUCKET_BITS = 17
+TEXT_BUCKET_BITS = 19
+MIN_SIMILARITY = 0.45
+SEPARATOR = "\x01"
+
+TYPE_FILTERS = {
+    "monster": genesys_rules.MONSTER, "spell": genesys_rules.SPELL, "trap": genesys_rules.TRAP,
+    "fusion": genesys_rules.FUSION, "synchro": genesys_rules.SYNCHRO, "xyz": genesys_rules.XYZ,
+    "pendulum": genesys_rules.PENDULUM, "link": genesys_rules.LINK,
+    "もんすたー": genesys_rules.MONSTER, "罠": genesys_rules.TRAP, "しんくろ": genesys_rules.SYNCHRO,
+    "えくしーず": genesys_rules.XYZ, "ぺんでゅらむ": genesys_rules.PENDULUM, "りんく": genesys_rules.LINK,
+    **dict(genesys_rules.TYPE_KEYWORDS),
+}
+
+Query = namedtuple("Query", "text flags min_points max_points")
+
+_KATAKANA_TO_HIRAGANA = {code: code - 0x60 for code in range(0x30A1, 0x30F7)}
+_NOT_WORD = re.compile(r"[\W_]+")
+_POINT_FILTER = re.compile(r"^(>=|<=|>|<)?(\d+)(?:-(\d+))?$")
+
+_ROMAJI = dict(zip(
+    "あいうえおかきくけこさしすせそたちつてとなにぬねのはひふへほまみむめもやゆよらりるれろわをんがぎぐげござじずぜぞだぢづでどばびぶべぼぱぴぷぺぽゔ",
+    "a i u e o ka ki ku ke ko sa shi su se so ta chi tsu te to na ni nu ne no ha hi fu he ho ma mi mu me mo ya yu yo ra ri ru re ro wa o n "
+    "ga gi gu ge go za ji zu ze zo da ji zu de do ba bi bu be bo pa pi pu pe po vu".split()))
+_SMALL_Y = {"ゃ": "a", "ゅ": "u", "ょ": "o"}
+_SMALL_VOWELS = {"ぁ": "a", "ぃ": "i", "ぅ": "u", "ぇ": "e", "ぉ": "o"}
+
+
+def normalize(text):
+    text = unicodedata.normalize("NFKC", text or "").casefold().translate(_KATAKANA_TO_HIRAGANA)
+    return _NOT_WORD.sub("", text)
+
+
+def romaji(kana):
+    """Wapuro-style romaji for the kana in a normalized string; other characters are dropped."""
+    out = []; double_next = False
+    for ch in kana:
+        if ch == "っ": double_next = True; continue
+        if ch == "ー":
+            if out: out.append(out[-1][-1])
+            continue
+        if ch in _SMALL_Y and out and out[-1].endswith("i") and len(out[-1]) > 1:
+            # きゃ -> kya, しゃ -> sha, ちゃ -> cha, じゃ -> ja
+            stem = out.pop()[:-1]; out.append((stem if stem in ("sh", "ch", "j") else stem + "y") + _SMALL_Y[ch]); continue
+        if ch in _SMALL_VOWELS:
+            # ファ -> fa, ティ -> ti; on its own a small vowel reads as the plain vowel.
+            if out and len(out[-1]) > 1: out.append(out.pop()[:-1] + _SMALL_VOWELS[ch])
+            else: out.append(_SMALL_VOWELS[ch])
+            continue
+        syllable = _ROMAJI.get(ch)
+        if syllable is None: double_next = False; continue
+        if double_next and syllable[0] not in "aiueon": syllable = syllable[0] + syllable
+        double_next = False; out.append(syllable)
+    return "".join(out)
+
+
+_pinyin = None
+
+
+def pinyin_available():
+    return importlib.util.find_spec("pypinyin") is not None
+
+
+def pinyin_forms(text):
+    # Full and initial-letter pinyin (qingyanbailong, qybl); empty without the optional pypinyin.
+    global _pinyin
+    if _pinyin is None:
+        try: from pypinyin import lazy_pinyin as _pinyin
+        except ImportError: _pinyin = False
+    if not _pinyin or not text: return ()
+    syllables = [s for s in _pinyin(text, errors="ignore") if s]
+    if not syllables: return ()
+    return ("".join(syllables), "".join(s[0] for s in syllables))
+
+
+def search_forms(card_data, name_keys):
+    forms = {normalize(card_data.get(key)) for key in name_keys}
+    forms.add(romaji(normalize(card_data.get("jp_name"))))
+    for key in ("cn_name", "sc_name"): forms.update(normalize(form) for form in pinyin_forms(card_data.get(key)))
+    forms.discard("")
+    return forms
+
+
+def _gram_buckets(text, bits):
+    mask = (1 << bits) - 1
+    return {zlib.crc32(text[i:i + GRAM].encode("utf-8")) & mask for i in range(len(text) - GRAM + 1)}
+
+
+class Postings:
+    # Rows per hashed trigram bucket: rows[offsets[b]:offsets[b + 1]].
+    def __init__(self, offsets, rows):
+        self.offsets = offsets
+        self.rows = rows
+        self.bits = (len(offsets) - 1).bit_length() - 1
+
+    @classmethod
+    def build(cls, row_buckets, bits):
+        # Counting sort: one pass for bucket sizes, one to place the rows.
+        counts = array("I", bytes(4 * ((1 << bits) + 1)))
+        for buckets in row_buckets:
+            for bucket in buckets: counts[bucket + 1] += 1
+        offsets = array("I", accumulate(counts)); fill = array("I", offsets)
+        rows = array("I", bytes(4 * offsets[-1]))
+        for row, buckets in enumerate(row_buckets):
+            for bucket in buckets: rows[fill[bucket]] = row; fill[bucket] += 1
+        return cls(offsets, rows)
+
+    @classmethod
+    def from_bytes(cls, offsets_bytes, rows_bytes):
+        offsets = array("I"); offsets.frombytes(offsets_bytes)
+        rows = array("I"); rows.frombytes(rows_bytes)
+        return cls(offsets, rows)
+
+    def to_bytes(self):
+        return self.offsets.tobytes(), self.rows.tobytes()
+
+    def coverage(self, text):
+        # {row: share of the text's trigram buckets that the row contains}
+        buckets = _gram_buckets(text, self.bits); offsets = self.offsets; rows = self.rows
+        counts = Counter(chain.from_iterable(rows[offsets[b]:offsets[b + 1]] for b in buckets))
+        return {row: hits / len(buckets) for row, hits in counts.items()}
+
+
+class FullTextIndex:
+    def __init__(self, haystacks, names, load_text):
+        self.haystacks = haystacks
+        self.names = names
+        self.load_text = load_text
+        self.text = None
+
+    @classmethod
+    def build(cls, cards, name_keys):
+        haystacks = []; name_buckets = []; text_buckets = []
+        for card_data in cards:
+            forms = sorted(search_forms(card_data, name_keys))
+            haystacks.append(SEPARATOR + SEPARATOR.join(forms) + SEPARATOR)
+            name_buckets.append(array("I", set().union(*(_gram_buckets(form, NAME_BUCKET_BITS) for form in forms))))
+            text_buckets.append(array("I", _gram_buckets(normalize(card_data.get("text", {}).get("desc", "")), TEXT_BUCKET_BITS)))
+        text = Postings.build(text_buckets, TEXT_BUCKET_BITS)
+        index = cls(haystacks, Postings.build(name_buckets, NAME_BUCKET_BITS), lambda: text); index.text = text
+        return index
+
+    def blobs(self):
+        names_offsets, names_rows = self.names.to_bytes(); text_offsets, text_rows = self.text.to_bytes()
+        return {"fts:haystacks": "\0".join(self.haystacks).encode("utf-8"), "fts:names:offsets": names_offsets,
+                "fts:names:rows": names_rows, "fts:text:offsets": text_offsets, "fts:text:rows": text_rows}
+
+    def match(self, query, include_text=False, within=None):
+        """(hits, fuzzy) for a normalized query.
+
+        `hits` are the rows with a name form containing the query: the rows of
+        `within` that do, in its order, or unordered when `within` is None.
+        `fuzzy` maps the other matching rows to a score: the trigram similarity
+        of fuzzy name matches (only when nothing contains the query) and 0.4 for
+        effect-text-only hits."""
+        haystacks = self.haystacks; fuzzy = {}
+        coverage = self.names.coverage(query) if len(query) >= GRAM else {}
+        if within is not None: hits = [row for row in within if query in haystacks[row]]
+        # A name containing the query contains all of its trigrams.
+        elif len(query) >= GRAM: hits = [row for row, share in coverage.items() if share == 1.0 and query in haystacks[row]]
+        else: hits = [row for row, haystack in enumerate(haystacks) if query in haystack]
+        if len(query) < GRAM: return hits, fuzzy
+        found = set(hits)
+        if not hits:
+            # Fuzzy matches only stand in for a query with no real hits (a typo). One wrong
+            # character spoils up to three trigrams, so short queries must keep nearly all of theirs.
+            grams = len(query) - GRAM + 1; threshold = max(MIN_SIMILARITY, 1 - 3 / grams) if grams > 3 else 1.0
+            for row, similarity in coverage.items():
+                if similarity >= threshold: fuzzy[row] = similarity
+        if include_text:
+            if self.text is None: self.text = self.load_text()
+            for row, share in self.text.coverage(query).items():
+                if share == 1.0 and row not in found and row not in fuzzy: fuzzy[row] = 0.4
+        return hits, fuzzy
+
+    def tiers(self, query, rows):
+        # Splits name hits into exact form, prefix and substring matches, keeping their order.
+        haystacks = self.haystacks; prefix = SEPARATOR + query
+        prefixed = [row for row in rows if prefix in haystacks[row]]
+        if not prefixed: return [], [], rows
+        exact = SEPARATOR + query + SEPARATOR; exact_rows = [row for row in prefixed if exact in haystacks[row]]
+        exact_set = set(exact_rows); prefixed_set = set(prefixed)
+        return exact_rows, [row for row in prefixed if row not in exact_set], [row for row in rows if row not in prefixed_set]
+
+
+def parse_query(query):
+    words = []; flags = 0; min_points = None; max_points = None
+    for word in unicodedata.normalize("NFKC", query).split():
+        name, _, value = word.partition(":")
+        name = name.casefold()
+        if value and name in ("t", "type") and normalize(value) in TYPE_FILTERS:
+            flags |= TYPE_FILTERS[normalize(value)]; continue
+        match = _POINT_FILTER.match(value) if value and name in ("p", "pt", "point", "points") else None
+        if match:
+            op, low, high = match.groups(); low = int(low)
+            if high is not None: min_points, max_points = low, int(high)
+            elif op == ">=": min_points = low
+            elif op == ">": min_points = low + 1
+            elif op == "<=": max_points = low
+            elif op == "<": max_points = low - 1
+            else: min_points = max_points = low
+            continue
+        words.append(word)
+    return Query(" ".join(words), flags, min_points, max_points)
+
+
+class CardSearch:
+    def __init__(self, text, table, sort_orders):
+        self.text = text
+        self.table = table
+        self.sort_orders = sort_orders
+        self.index = None
+        self.ranks = {}
+        self.rank_rows = {}
+        self.last_key = None; self.last_text = None; self.last_hits = None
+
+    def index_for(self, name_key):
+        # Loads the persisted index, the rows in this name key's sort order and the rank of every row.
+        if self.index is None: self.index = self.text.search_index()
+        if name_key not in self.ranks:
+            row_of_cid = self.table.row_of_cid; rows = array("I", (row_of_cid[cid] for cid in self.sort_orders.get(name_key, ())))
+            ranks = array("I", bytes(4 * len(self.table)))
+            for rank, row in enumerate(rows): ranks[row] = rank
+            self.rank_rows[name_key] = rows; self.ranks[name_key] = ranks
+        return self.index
+
+    def search(self, name_key, query, include_text=False):
+        """Matching cids, best first; ties and filter-only queries keep the name sort order.
+
+        Name hits come first (exact form, then prefix, then substring), each in sort
+        order, followed by fuzzy and effect-text matches by score."""
+        parsed = parse_query(query); order = self.sort_orders.get(name_key, []); text = normalize(parsed.text)
+        if not text: self.last_text = None
+        if not text and not parsed.flags and parsed.min_points is None and parsed.max_points is None: return list(order)
+        table = self.table; flags = table.flags; points = table.points
+
+        def wanted(row):
+            if flags[row] & parsed.flags != parsed.flags: return False
+            if parsed.min_points is not None and points[row] < parsed.min_points: return False
+            return parsed.max_points is None or points[row] <= parsed.max_points
+
+        if not text:
+            row_of_cid = table.row_of_cid
+            return [cid for cid in order if wanted(row_of_cid[cid])]
+        index = self.index_for(name_key); ranks = self.ranks[name_key]
+        if name_key == self.last_key and self.last_text and self.last_text in text:
+            # A query that extends the previous one can only narrow its name hits.
+            within = self.last_hits
+        else: within = self.rank_rows[name_key] if len(text) < GRAM else None
+        hits, fuzzy = index.match(text, include_text, within)
+        if within is None: hits.sort(key=ranks.__getitem__)
+        self.last_key = name_key; self.last_text = text; self.last_hits = hits
+        cids = table.cids
+        rows = chain(*index.tiers(text, hits), sorted(fuzzy, key=lambda row: (-fuzzy[row], ranks[row])))
+        if not parsed.flags and parsed.min_points is None and parsed.max_points is None: return [cids[row] for row in rows]
+        return [cids[row] for row in rows if wanted(row)]
@@ -0,0 +1,191 @@
+import hashlib
+import json
+import os
+import sqlite3
+from array import array
+from collections import namedtuple
+from contextlib import closing
+
+import card_search
+from card_table import CardTable, card_records, display_name
+
+# Compiled SQLite snapshot of cards_data.json. The snapshot holds the card table
+# columns, every name key's display names and browser sort order as packed blobs,
+# and the effect text in an indexed table. A normal start reads the table and a
+# single name column; the other names and the effect text are fetched per card
+# when they are shown. The search index (see card_search) is stored as blobs too.
+# It is rebuilt whenever the JSON file's mtime/size changes and its content hash
+# no longer matches, or when pypinyin was installed or removed since the build.
+
+SNAPSHOT_VERSION = 4
+NAME_KEYS = ("cn_name", "sc_name", "nwbbs_n", "cnocg_n", "jp_name", "en_name")
+
+CardData = namedtuple("CardData", "all_cards id_to_cid sort_orders table text")
+
+
+def snapshot_path(json_path):
+    return os.path.splitext(json_path)[0] + ".db"
+
+
+def _file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""): digest.update(block)
+    return digest.hexdigest()
+
+
+def _read_meta(conn):
+    try: return dict(conn.execute("SELECT key, value FROM meta"))
+    except sqlite3.DatabaseError: return {}
+
+
+def _is_current(db_path, json_path):
+    if not os.path.exists(db_path): return False
+    stat = os.stat(json_path)
+    try:
+        # closing() closes the connection; the inner `with conn` commits the meta update.
+        with closing(sqlite3.connect(db_path)) as conn, conn:
+            meta = _read_meta(conn)
+            if meta.get("version") != str(SNAPSHOT_VERSION): return False
+            if meta.get("pinyin") != str(card_search.pinyin_available()): return False
+            if meta.get("source_mtime_ns") == str(stat.st_mtime_ns) and meta.get("source_size") == str(stat.st_size): return True
+            # The file was touched; only rebuild if its content really changed.
+            if meta.get("source_sha256") != _file_digest(json_path): return False
+            conn.executemany("REPLACE INTO meta (key, value) VALUES (?, ?)", [("source_mtime_ns", str(stat.st_mtime_ns)), ("source_size", str(stat.st_size))])
+        return True
+    except sqlite3.DatabaseError:
+        return False
+
+
+def _join_names(names):
+    return "\0".join(names).encode("utf-8")
+
+
+def _split_names(blob):
+    return blob.decode("utf-8").split("\0") if blob else []
+
+
+def _card_details(card_data):
+    text = card_data.get("text", {})
+    return {"en_name": card_data.get("en_name", ""), "types": text.get("types", ""), "desc": text.get("desc", "")}
+
+
+class SnapshotText:
+    # Names and effect text that stay on disk; each lookup is one indexed read.
+    def __init__(self, db_path):
+        self.db_path = db_path
+
+    def names(self, name_key):
+        with closing(sqlite3.connect(self.db_path)) as conn:
+            row = conn.execute("SELECT data FROM blobs WHERE name = ?", (f"names:{name_key}",)).fetchone()
+        return _split_names(row[0] if row else b"")
+
+    def details(self, row):
+        with closing(sqlite3.connect(self.db_path)) as conn:
+            found = conn.execute("SELECT en_name, types, desc FROM card_text WHERE row = ?", (row,)).fetchone()
+        en_name, types, desc = found or ("", "", "")
+        return {"en_name": en_name, "types": types, "desc": desc}
+
+    def _blobs(self, names):
+        with closing(sqlite3.connect(self.db_path)) as conn:
+            return dict(conn.execute(f"SELECT name, data FROM blobs WHERE name IN ({','.join('?' * len(names))})", names))
+
+    def _postings(self, prefix):
+        blobs = self._blobs((f"{prefix}:offsets", f"{prefix}:rows"))
+        return card_search.Postings.from_bytes(blobs[f"{prefix}:offsets"], blobs[f"{prefix}:rows"])
+
+    def search_index(self):
+        # The effect-text postings are the largest part and are only read on the first text search.
+        haystacks = _split_names(self._blobs(("fts:haystacks",))["fts:haystacks"])
+        return card_search.FullTextIndex(haystacks, self._postings("fts:names"), lambda: self._postings("fts:text"))
+
+
+class JsonText:
+    # Same interface over a parsed cards_data.json, for when no snapshot can be written.
+    def __init__(self, data):
+        self.cards = list(data.values())
+
+    def names(self, name_key):
+        return [display_name(card_data, name_key) for card_data in self.cards]
+
+    def details(self, row):
+        return _card_details(self.cards[row])
+
+    def search_index(self):
+        return card_search.FullTextIndex.build(self.cards, NAME_KEYS)
+
+
+def build_snapshot(json_path, db_path=None):
+    db_path = db_path or snapshot_path(json_path)
+    stat = os.stat(json_path); source_sha256 = _file_digest(json_path)
+    with open(json_path, "r", encoding="utf-8") as f: data = json.load(f)
+    cards = list(data.values())
+    tmp_path = db_path + ".tmp"
+    if os.path.exists(tmp_path): os.remove(tmp_path)
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+        conn.execute("CREATE TABLE blobs (name TEXT PRIMARY KEY, data BLOB)")
+        conn.execute("CREATE TABLE card_text (row INTEGER PRIMARY KEY, en_name TEXT, types TEXT, desc TEXT)")
+        conn.execute("INSERT INTO blobs VALUES ('cids', ?)", (_join_names(data.keys()),))
+        conn.executemany("INSERT INTO blobs VALUES (?, ?)", zip(("table:ids", "table:points", "table:flags"), CardTable.from_cards(data).columns()))
+        for name_key in NAME_KEYS:
+            names = [display_name(card_data, name_key) for card_data in cards]
+            order = sorted(range(len(names)), key=names.__getitem__)
+            conn.execute("INSERT INTO blobs VALUES (?, ?)", (f"names:{name_key}", _join_names(names)))
+            conn.execute("INSERT INTO blobs VALUES (?, ?)", (f"sort:{name_key}", array("I", order).tobytes()))
+        conn.executemany("INSERT INTO card_text VALUES (?, ?, ?, ?)", ((row, *_card_details(card_data).values()) for row, card_data in enumerate(cards)))
+        conn.executemany("INSERT INTO blobs VALUES (?, ?)", card_search.FullTextIndex.build(cards, NAME_KEYS).blobs().items())
+        conn.executemany("INSERT INTO meta VALUES (?, ?)", [
+            ("version", str(SNAPSHOT_VERSION)), ("pinyin", str(card_search.pinyin_available())),
+            ("source_mtime_ns", str(stat.st_mtime_ns)), ("source_size", str(stat.st_size)), ("source_sha256", source_sha256)])
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp_path, db_path)
+    return db_path
+
+
+def ensure_snapshot(json_path="cards_data.json"):
+    db_path = snapshot_path(json_path)
+    if not os.path.exists(json_path):
+        if os.path.exists(db_path): return db_path
+        raise FileNotFoundError(json_path)
+    if not _is_current(db_path, json_path): build_snapshot(json_path, db_path)
+    return db_path
+
+
+def _card_data(table, names, sort_rows, text):
+    cids = table.cids
+    id_to_cid = {str(card_id): cids[row] for row, card_id in enumerate(table.ids) if card_id}
+    sort_orders = {name_key: [cids[row] for row in rows] for name_key, rows in sort_rows.items()}
+    return CardData(card_records(table, names), id_to_cid, sort_orders, table, text)
+
+
+def read_snapshot(db_path, name_key="cn_name"):
+    with closing(sqlite3.connect(db_path)) as conn:
+        blobs = dict(conn.execute("SELECT name, data FROM blobs WHERE (name NOT LIKE 'names:%' AND name NOT LIKE 'fts:%') OR name = ?", (f"names:{name_key}",)))
+    table = CardTable.from_columns(_split_names(blobs["cids"]), blobs["table:ids"], blobs["table:points"], blobs["table:flags"])
+    sort_rows = {}
+    for key in NAME_KEYS:
+        rows = array("I"); rows.frombytes(blobs[f"sort:{key}"]); sort_rows[key] = rows
+    return _card_data(table, _split_names(blobs[f"names:{name_key}"]), sort_rows, SnapshotText(db_path))
+
+
+def read_table(db_path):
+    # Just the attribute table, for headless workers that never need names or effect text.
+    with closing(sqlite3.connect(db_path)) as conn:
+        blobs = dict(conn.execute("SELECT name, data FROM blobs WHERE name LIKE 'table:%'"))
+    return CardTable.from_columns([], blobs["table:ids"], blobs["table:points"], blobs["table:flags"])
+
+
+def load_cards(json_path="cards_data.json", name_key="cn_name"):
+    try: return read_snapshot(ensure_snapshot(json_path), name_key)
+    except (OSError, sqlite3.DatabaseError, KeyError):
+        # Read-only install or a broken snapshot: fall back to parsing the JSON directly.
+        if not os.path.exists(json_path): raise
+        with open(json_path, "r", encoding="utf-8") as f: data = json.load(f)
+        text = JsonText(data); sort_rows = {}
+        for key in NAME_KEYS:
+            names = text.names(key); sort_rows[key] = sorted(range(len(names)), key=names.__getitem__)
+        return _card_data(CardTable.from_cards(data), text.names(name_key), sort_rows, text)
@@ -0,0 +1,76 @@
+from array import array
+
+import genesys_rules
+
+# Compact, column-oriented card attributes indexed by a dense row number (the
+# card's position in the card data). Types are parsed into bit flags once, so
+# legality checks, deck statistics and point totals are plain array lookups
+# instead of substring tests on each card's Chinese type text.
+
+
+def display_name(card_data, name_key):
+    if not card_data: return "Unknown Card"
+    return card_data.get(name_key) or card_data.get("cn_name") or "Unknown Card"
+
+
+class CardRecord:
+    # What the GUI keeps resident per card: its keys, the name in the active display
+    # language and its type flags. Points stay in the table column (the point list
+    # rewrites them), effect text and the other names are read on demand.
+    __slots__ = ("cid", "id", "row", "name", "flags")
+
+    def __init__(self, cid, card_id, row, name, flags):
+        self.cid = cid
+        self.id = card_id
+        self.row = row
+        self.name = name
+        self.flags = flags
+
+
+def card_records(table, names):
+    ids = table.ids; flags = table.flags
+    return {cid: CardRecord(cid, ids[row] or None, row, names[row], flags[row]) for row, cid in enumerate(table.cids)}
+
+
+def rename_records(records, names):
+    for record in records.values(): record.name = names[record.row]
+
+
+class CardTable:
+    def __init__(self, cids, ids, points, flags):
+        self.cids = cids
+        self.ids = ids
+        self.points = points
+        self.flags = flags
+        self.row_of_id = {card_id: row for row, card_id in enumerate(ids) if card_id}
+        self.row_of_cid = {cid: row for row, cid in enumerate(cids)}
+
+    @classmethod
+    def from_cards(cls, all_cards):
+        cids = list(all_cards.keys()); ids = array("q"); points = array("i"); flags = array("H")
+        for card_data in all_cards.values():
+            ids.append(card_data.get("id") or 0)
+            points.append(card_data.get("point", 0))
+            flags.append(genesys_rules.type_flags(genesys_rules.card_types(card_data)))
+        return cls(cids, ids, points, flags)
+
+    @classmethod
+    def from_columns(cls, cids, ids_bytes, points_bytes, flags_bytes):
+        ids = array("q"); ids.frombytes(ids_bytes)
+        points = array("i"); points.frombytes(points_bytes)
+        flags = array("H"); flags.frombytes(flags_bytes)
+        return cls(cids, ids, points, flags)
+
+    def columns(self):
+        return self.ids.tobytes(), self.points.tobytes(), self.flags.tobytes()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def flags_of(self, card_id):
+        row = self.row_of_id.get(card_id)
+        return self.flags[row] if row is not None else 0
+
+    def points_of(self, card_id):
+        row = self.row_of_id.get(card_id)
+        return self.points[row] if row is not None else 0
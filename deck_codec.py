@@ -0,0 +1,154 @@
+import base64
+import os
+import struct
+import sys
+from array import array
+from collections import namedtuple
+
+# Deck formats. Decks are three {card_id: copies} dicts (main, extra, side).
+# - YDK: the YGOPro text format, read line by line from any iterable of lines.
+# - ydke://: the clipboard format, three base64 blocks of little-endian uint32
+#   ids (one per copy) separated by "!".
+# - Deck archive (.ydka): many decks in one file. A header, a table of per-deck
+#   lengths, the names, then every card id and copy count as two flat arrays, so
+#   an archive loads with a single read and a few array copies.
+
+Deck = namedtuple("Deck", "main extra side")
+ArchivedDeck = namedtuple("ArchivedDeck", "name main extra side")
+
+YDK_CREATOR = "YGOgenesys Deck Builder"
+YDKE_PREFIX = "ydke://"
+ARCHIVE_EXT = ".ydka"
+ARCHIVE_MAGIC = b"YGDA"
+ARCHIVE_VERSION = 1
+_ARCHIVE_HEADER = struct.Struct("<4sHHI")
+_SECTIONS = {"#main": 0, "#extra": 1, "!side": 2}
+
+
+def _little_endian(values):
+    if sys.byteorder == "big": values.byteswap()
+    return values
+
+
+def find_deck_files(root, recursive=True):
+    if os.path.isfile(root): return [root]
+    paths = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        paths.extend(os.path.join(dirpath, name) for name in filenames if name.lower().endswith(".ydk"))
+        if not recursive: break
+    paths.sort()
+    return paths
+
+
+def iter_ydk(lines):
+    """Yield (section, card_id) for every card line; section is 0 main, 1 extra, 2 side."""
+    section = None
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#created by"): continue
+        if line in _SECTIONS: section = _SECTIONS[line]
+        elif line.isdigit() and section is not None: yield section, int(line)
+
+
+def parse_ydk(lines, known_ids=None):
+    """Return (Deck, unknown) where unknown maps ids not in `known_ids` to their dropped copies."""
+    decks = ({}, {}, {}); unknown = {}
+    for section, card_id in iter_ydk(lines):
+        if known_ids is not None and card_id not in known_ids: unknown[card_id] = unknown.get(card_id, 0) + 1; continue
+        deck = decks[section]; deck[card_id] = deck.get(card_id, 0) + 1
+    return Deck(*decks), unknown
+
+
+def read_ydk(path, known_ids=None):
+    with open(path, "r", encoding="utf-8") as f: return parse_ydk(f, known_ids)
+
+
+def write_ydk(f, main_deck, extra_deck, side_deck, creator=YDK_CREATOR):
+    f.write(f"#created by {creator}\n")
+    for header, deck in zip(_SECTIONS, (main_deck, extra_deck, side_deck)):
+        f.write(header + "\n")
+        f.writelines(f"{card_id}\n" * count for card_id, count in deck.items())
+
+
+def encode_ydke(main_deck, extra_deck, side_deck):
+    blocks = []
+    for deck in (main_deck, extra_deck, side_deck):
+        ids = _little_endian(array("I", (card_id for card_id, count in deck.items() for _ in range(count))))
+        blocks.append(base64.b64encode(ids.tobytes()).decode("ascii"))
+    return YDKE_PREFIX + "!".join(blocks) + "!"
+
+
+def decode_ydke(url, known_ids=None):
+    """Return (Deck, unknown) for a ydke:// URL; raise ValueError when it is malformed."""
+    url = url.strip()
+    if not url.startswith(YDKE_PREFIX): raise ValueError("not a ydke:// URL")
+    blocks = url[len(YDKE_PREFIX):].split("!")
+    if len(blocks) < 3: raise ValueError("a ydke:// URL needs main, extra and side blocks")
+    decks = ({}, {}, {}); unknown = {}
+    for deck, block in zip(decks, blocks):
+        try: data = base64.b64decode(block, validate=True)
+        except ValueError as e: raise ValueError(f"invalid base64 in ydke:// URL: {e}") from None
+        if len(data) % 4: raise ValueError("ydke:// block length is not a multiple of 4")
+        ids = array("I"); ids.frombytes(data); _little_endian(ids)
+        for card_id in ids:
+            if known_ids is not None and card_id not in known_ids: unknown[card_id] = unknown.get(card_id, 0) + 1
+            else: deck[card_id] = deck.get(card_id, 0) + 1
+    return Deck(*decks), unknown
+
+
+def write_archive(path, decks):
+    """Write an iterable of ArchivedDeck (or (name, main, extra, side) tuples) to one file.
+
+    Raise ValueError, naming the deck, when it does not fit the archive layout: names
+    up to 65535 UTF-8 bytes, up to 65535 entries per section, ids that fit in 32 bits
+    and 0 to 255 copies per entry."""
+    lengths = array("H"); names = bytearray(); ids = array("I"); counts = array("B"); deck_count = 0
+    for name, *sections in decks:
+        encoded = name.encode("utf-8")
+        if len(encoded) > 0xFFFF: raise ValueError(f"deck {name[:40]!r}...: the name is longer than 65535 bytes")
+        for deck in sections:
+            if len(deck) > 0xFFFF: raise ValueError(f"deck {name!r}: a section has more than 65535 entries")
+            if deck and not (0 <= min(deck.values()) and max(deck.values()) <= 0xFF): raise ValueError(f"deck {name!r}: copy counts must be 0 to 255")
+            if deck and not (0 <= min(deck.keys()) and max(deck.keys()) <= 0xFFFFFFFF): raise ValueError(f"deck {name!r}: card ids must fit in 32 bits")
+        lengths.append(len(encoded)); names += encoded
+        for deck in sections:
+            lengths.append(len(deck)); ids.extend(deck.keys()); counts.extend(deck.values())
+        deck_count += 1
+    with open(path, "wb") as f:
+        f.write(_ARCHIVE_HEADER.pack(ARCHIVE_MAGIC, ARCHIVE_VERSION, 0, deck_count))
+        f.write(_little_endian(lengths).tobytes()); f.write(names)
+        f.write(_little_endian(ids).tobytes()); f.write(counts.tobytes())
+    return deck_count
+
+
+def read_archive_columns(path):
+    """Return (names, lengths, ids, counts): the raw columns of a deck archive.
+
+    `lengths` holds four entries per deck (name bytes, main, extra, side entries);
+    `ids` and `counts` hold every entry of every deck in order. Raise ValueError
+    when the file is not a deck archive."""
+    with open(path, "rb") as f: data = f.read()
+    if len(data) < _ARCHIVE_HEADER.size: raise ValueError("truncated deck archive")
+    magic, version, _, deck_count = _ARCHIVE_HEADER.unpack_from(data)
+    if magic != ARCHIVE_MAGIC or version != ARCHIVE_VERSION: raise ValueError("not a deck archive")
+    offset = _ARCHIVE_HEADER.size; end = offset + deck_count * 4 * 2
+    lengths = array("H"); lengths.frombytes(data[offset:end]); _little_endian(lengths)
+    name_bytes = sum(lengths[0::4]); card_count = sum(lengths) - name_bytes
+    names = data[end:end + name_bytes]; offset = end + name_bytes
+    ids = array("I"); ids.frombytes(data[offset:offset + card_count * 4]); _little_endian(ids); offset += card_count * 4
+    counts = data[offset:offset + card_count]
+    if len(ids) != card_count or len(counts) != card_count: raise ValueError("truncated deck archive")
+    return names, lengths, ids, counts
+
+
+def read_archive(path):
+    """Return the list of ArchivedDeck stored in a deck archive; raise ValueError when it is not one."""
+    names, lengths, ids, counts = read_archive_columns(path)
+    decks = []; name_at = 0; card_at = 0
+    for i in range(0, len(lengths), 4):
+        name_length = lengths[i]; name = names[name_at:name_at + name_length].decode("utf-8"); name_at += name_length
+        sections = []
+        for size in lengths[i + 1:i + 4]:
+            sections.append(dict(zip(ids[card_at:card_at + size], counts[card_at:card_at + size]))); card_at += size
+        decks.append(ArchivedDeck(name, *sections))
+    return decks
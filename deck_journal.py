@@ -0,0 +1,203 @@
+import json
+import os
+import shutil
+import threading
+import time
+from collections import namedtuple
+
+# Undo/redo history and crash journal for the deck being edited.
+# - Every change is an Edit (copies of one card added to or removed from one
+#   section) or a Reset (the whole deck replaced, e.g. by opening a file). The
+#   history is a chain of immutable nodes that point at the node before them,
+#   so an edit costs one small node however large the deck is, and undone
+#   nodes are moved onto a redo chain rather than copied.
+# - The journal appends one JSON line per change, undo and redo. A background
+#   thread writes whatever has queued up and fsyncs once per batch, so editing
+#   never waits on the disk. A clean exit deletes the journal; if it is still
+#   there on the next start, replaying it rebuilds the deck and its history.
+
+JOURNAL_FORMAT = 1
+CHECKPOINT_RECORDS = 5000
+
+Edit = namedtuple("Edit", "section card_id delta")
+Snapshot = namedtuple("Snapshot", "decks path title")
+Reset = namedtuple("Reset", "before after")
+Session = namedtuple("Session", "snapshot history valid_bytes records")
+
+
+class _Node:
+    __slots__ = ("change", "parent")
+
+    def __init__(self, change, parent):
+        self.change = change
+        self.parent = parent
+
+
+class History:
+    def __init__(self):
+        self.undo_head = None
+        self.redo_head = None
+
+    def push(self, change):
+        self.undo_head = _Node(change, self.undo_head); self.redo_head = None
+
+    def can_undo(self):
+        return self.undo_head is not None
+
+    def can_redo(self):
+        return self.redo_head is not None
+
+    def undo(self):
+        """Return the change to revert, or None when there is nothing to undo."""
+        node = self.undo_head
+        if node is None: return None
+        self.undo_head = node.parent; self.redo_head = _Node(node.change, self.redo_head)
+        return node.change
+
+    def redo(self):
+        node = self.redo_head
+        if node is None: return None
+        self.redo_head = node.parent; self.undo_head = _Node(node.change, self.undo_head)
+        return node.change
+
+
+def freeze(decks):
+    # Copies kept in the history; they are never modified afterwards.
+    return tuple(dict(deck) for deck in decks)
+
+
+def apply_edit(decks, edit, reverse=False):
+    deck = decks[edit.section]; count = deck.get(edit.card_id, 0) + (-edit.delta if reverse else edit.delta)
+    if count > 0: deck[edit.card_id] = count
+    else: deck.pop(edit.card_id, None)
+
+
+def edit_record(edit):
+    return {"t": "edit", "s": edit.section, "id": edit.card_id, "n": edit.delta}
+
+
+def reset_record(snapshot):
+    return {"t": "reset", "decks": [{str(card_id): count for card_id, count in deck.items()} for deck in snapshot.decks],
+            "path": snapshot.path, "title": snapshot.title}
+
+
+def read_journal(path):
+    """Return (records, valid_bytes). A torn or corrupt line ends the journal; everything before it is kept."""
+    records = []; valid_bytes = 0
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"): break
+            try: record = json.loads(line)
+            except ValueError: break
+            if not isinstance(record, dict) or "t" not in record: break
+            records.append(record); valid_bytes += len(line)
+    return records, valid_bytes
+
+
+def intact(path, valid_bytes):
+    # True when nothing but a torn last line follows the records read_journal kept.
+    with open(path, "rb") as f:
+        f.seek(valid_bytes); return b"\n" not in f.read()
+
+
+def set_aside(path, copy=False):
+    """Move (or copy) a journal that cannot be used as it is to `<path>.bad-<time>`; returns the new path."""
+    target = f"{path}.bad-{time.strftime('%Y%m%d-%H%M%S')}"
+    if copy: shutil.copyfile(path, target)
+    else: os.replace(path, target)
+    return target
+
+
+def replay(records, valid_bytes=0):
+    """Rebuild the deck, its path and title and the undo/redo history from journal records."""
+    decks = ({}, {}, {}); path = title = None; history = History()
+    for record in records:
+        kind = record["t"]
+        if kind == "edit":
+            edit = Edit(record["s"], record["id"], record["n"]); apply_edit(decks, edit); history.push(edit)
+        elif kind == "reset":
+            after = Snapshot(tuple({int(card_id): count for card_id, count in deck.items()} for deck in record["decks"]), record.get("path"), record.get("title"))
+            history.push(Reset(Snapshot(freeze(decks), path, title), after))
+            decks = freeze(after.decks); path, title = after.path, after.title
+        elif kind == "checkpoint":
+            # Start of a compacted journal: the state without the history that led to it.
+            decks = tuple({int(card_id): count for card_id, count in deck.items()} for deck in record["decks"])
+            path, title = record.get("path"), record.get("title"); history = History()
+        elif kind == "saved": path, title = record.get("path"), record.get("title")
+        elif kind in ("undo", "redo"):
+            change = history.undo() if kind == "undo" else history.redo()
+            if isinstance(change, Edit): apply_edit(decks, change, reverse=kind == "undo")
+            elif change is not None:
+                target = change.before if kind == "undo" else change.after
+                decks = freeze(target.decks); path, title = target.path, target.title
+    return Session(Snapshot(decks, path, title), history, valid_bytes, len(records))
+
+
+class Journal:
+    # Append-only JSON-lines file written and fsynced in batches by a background thread.
+    def __init__(self, path, keep_bytes=0):
+        self.path = path
+        self.lines = []
+        self.checkpoint_lines = None
+        self.queued = 0
+        self.synced = 0
+        self.records = 0
+        self.closed = False
+        self.error = None
+        self.condition = threading.Condition()
+        self.thread = threading.Thread(target=self._run, args=(keep_bytes,), name="deck-journal", daemon=True)
+        self.thread.start()
+
+    def append(self, record):
+        with self.condition:
+            if self.closed or self.error: return
+            self.lines.append(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+            self.queued += 1; self.records += 1; self.condition.notify()
+
+    def checkpoint(self, snapshot):
+        """Replace the journal with a single record of the current state."""
+        record = dict(reset_record(snapshot), t="checkpoint", format=JOURNAL_FORMAT)
+        with self.condition:
+            if self.closed or self.error: return
+            self.lines = []; self.checkpoint_lines = [json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"]
+            self.queued += 1; self.records = 1; self.condition.notify()
+
+    def flush(self, timeout=None):
+        """Wait until every queued record is on disk; False on timeout or write error."""
+        with self.condition:
+            target = self.queued
+            return self.condition.wait_for(lambda: self.synced >= target or self.error is not None, timeout) and self.error is None
+
+    def close(self, discard=False):
+        with self.condition: self.closed = True; self.condition.notify_all()
+        self.thread.join()
+        if discard:
+            try: os.remove(self.path)
+            except FileNotFoundError: pass
+
+    def _run(self, keep_bytes):
+        f = None
+        try:
+            f = open(self.path, "ab"); f.truncate(keep_bytes)
+            while True:
+                with self.condition:
+                    self.condition.wait_for(lambda: self.lines or self.checkpoint_lines or self.closed)
+                    if self.closed and not self.lines and not self.checkpoint_lines: break
+                    lines, self.lines = self.lines, []; checkpoint, self.checkpoint_lines = self.checkpoint_lines, None
+                    target = self.queued
+                if checkpoint:
+                    # Written beside the journal and swapped in, so a crash leaves one complete file.
+                    tmp_path = self.path + ".tmp"
+                    with open(tmp_path, "wb") as tmp:
+                        tmp.write("".join(checkpoint + lines).encode("utf-8")); tmp.flush(); os.fsync(tmp.fileno())
+                    f.close(); os.replace(tmp_path, self.path); f = open(self.path, "ab")
+                else:
+                    f.write("".join(lines).encode("utf-8")); f.flush(); os.fsync(f.fileno())
+                with self.condition:
+                    self.synced = target; self.condition.notify_all()
+                    # Let edits made during the next moment share one fsync.
+                    self.condition.wait_for(lambda: self.closed, 0.25)
+        except OSError as e:
+            with self.condition: self.error = e; self.condition.notify_all()
+        finally:
+            if f is not None: f.close()
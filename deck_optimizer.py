@@ -0,0 +1,88 @@
+from collections import namedtuple
+
+import genesys_rules
+
+# Point-budget deck optimizer. The user marks cards as required (with a copy
+# count), preferred (with a value per copy) or excluded; the optimizer picks the
+# highest-value main and extra deck that fits the Genesys construction rules and
+# the point cap. Main and extra deck are each solved as an exact bounded knapsack
+# over (points, card count) with a NumPy dynamic program, then the two tables are
+# combined under the shared point budget.
+
+OptimizerResult = namedtuple("OptimizerResult", "main_deck extra_deck points value")
+
+
+def _knapsack(np, items, max_points, max_count):
+    # value[p, c]: best value using exactly p points and c cards; choices[i][p, c]: copies of item i taken there.
+    value = np.full((max_points + 1, max_count + 1), -np.inf); value[0, 0] = 0.0
+    choices = []
+    for _, points, weight, copies in items:
+        best = value.copy(); choice = np.zeros(value.shape, dtype=np.int8)
+        for k in range(1, copies + 1):
+            dp = k * points
+            if dp > max_points or k > max_count: break
+            shifted = np.full_like(value, -np.inf)
+            shifted[dp:, k:] = value[:max_points + 1 - dp, :max_count + 1 - k] + k * weight
+            better = shifted > best; best[better] = shifted[better]; choice[better] = k
+        value = best; choices.append(choice)
+    return value, choices
+
+
+def _backtrack(items, choices, points, count):
+    picks = {}
+    for (card_id, card_points, _, _), choice in zip(reversed(items), reversed(choices)):
+        k = int(choice[points, count])
+        if k: picks[card_id] = k; points -= k * card_points; count -= k
+    return picks
+
+
+def optimize(table, point_cap, required=None, preferred=None, excluded=(), reserved_points=0, side_deck=None,
+             main_min=genesys_rules.MAIN_DECK_MIN, main_max=genesys_rules.MAIN_DECK_MAX, extra_max=genesys_rules.EXTRA_DECK_MAX):
+    """Return the best OptimizerResult, or raise ValueError when no legal deck exists.
+
+    `required` maps card ids to copies that must be included, `preferred` maps card ids
+    to the value of each copy. `reserved_points` are already spent elsewhere (the side deck);
+    copies in `side_deck` count towards the copy limit of the cards picked."""
+    import numpy as np
+    required = dict(required or {}); preferred = dict(preferred or {}); excluded = set(excluded); side_deck = side_deck or {}
+    main_deck, extra_deck = {}, {}; budget = point_cap - reserved_points; value = 0.0
+    for card_id, copies in required.items():
+        flags = table.flags_of(card_id)
+        if card_id not in table.row_of_id: raise ValueError(f"unknown required card {card_id}")
+        if genesys_rules.is_forbidden(flags): raise ValueError(f"required card {card_id} is a forbidden Pendulum/Link card")
+        copies = min(copies, genesys_rules.COPY_LIMIT - side_deck.get(card_id, 0))
+        if copies <= 0: continue
+        (extra_deck if genesys_rules.is_extra_deck(flags) else main_deck)[card_id] = copies
+        budget -= table.points_of(card_id) * copies; value += preferred.get(card_id, 0.0) * copies
+    main_free = main_max - sum(main_deck.values()); main_needed = max(0, main_min - sum(main_deck.values()))
+    extra_free = extra_max - sum(extra_deck.values())
+    if budget < 0: raise ValueError("the required cards alone exceed the point cap")
+    if main_free < 0 or extra_free < 0: raise ValueError("the required cards alone exceed the deck size limits")
+
+    main_items, extra_items = [], []
+    for card_id, weight in preferred.items():
+        if card_id in excluded or card_id not in table.row_of_id or weight <= 0: continue
+        flags = table.flags_of(card_id); copies = genesys_rules.COPY_LIMIT - main_deck.get(card_id, 0) - extra_deck.get(card_id, 0) - side_deck.get(card_id, 0)
+        if genesys_rules.is_forbidden(flags) or copies <= 0: continue
+        item = (card_id, table.points_of(card_id), float(weight), copies)
+        (extra_items if genesys_rules.is_extra_deck(flags) else main_items).append(item)
+
+    main_value, main_choices = _knapsack(np, main_items, budget, main_free)
+    extra_value, extra_choices = _knapsack(np, extra_items, budget, extra_free)
+    # Best main value for each exact point spend, over the allowed card counts.
+    main_window = main_value[:, main_needed:]
+    best_main = main_window.max(axis=1); best_main_count = main_window.argmax(axis=1) + main_needed
+    # Best extra value for a spend of at most p points (prefix maximum over exact spends).
+    best_extra = extra_value.max(axis=1); best_extra_count = extra_value.argmax(axis=1)
+    extra_spend = np.arange(budget + 1)
+    for p in range(1, budget + 1):
+        if best_extra[extra_spend[p - 1]] >= best_extra[p]: extra_spend[p] = extra_spend[p - 1]
+    totals = best_main + best_extra[extra_spend[budget - np.arange(budget + 1)]]
+    main_points = int(totals.argmax())
+    if not np.isfinite(totals[main_points]):
+        raise ValueError(f"not enough preferred main deck cards to reach {main_min} within the point cap")
+    extra_points = int(extra_spend[budget - main_points])
+    main_deck.update((card_id, main_deck.get(card_id, 0) + k) for card_id, k in _backtrack(main_items, main_choices, main_points, int(best_main_count[main_points])).items())
+    extra_deck.update((card_id, extra_deck.get(card_id, 0) + k) for card_id, k in _backtrack(extra_items, extra_choices, extra_points, int(best_extra_count[extra_points])).items())
+    total_points = genesys_rules.deck_points((main_deck, extra_deck), table)
+    return OptimizerResult(main_deck, extra_deck, total_points, value + float(totals[main_points]))
@@ -0,0 +1,96 @@
+from itertools import product
+from math import comb
+
+# Opening-hand odds for a main deck. Groups are named sets of card ids (e.g.
+# "starter", "extender") and a requirement maps group names to the minimum number
+# of copies that must be drawn; all requirements must hold at once.
+# Exact odds use the (multivariate) hypergeometric distribution and need disjoint
+# groups; the Monte Carlo mode samples hands in NumPy batches and also handles
+# cards that belong to several groups.
+
+DEFAULT_BATCH = 100_000
+
+
+def prob_at_least(deck_size, group_size, hand_size, minimum=1):
+    # P(at least `minimum` of the `group_size` copies are among `hand_size` cards drawn from `deck_size`).
+    if hand_size > deck_size: hand_size = deck_size
+    total = comb(deck_size, hand_size)
+    if total == 0: return 0.0
+    miss = sum(comb(group_size, i) * comb(deck_size - group_size, hand_size - i) for i in range(min(minimum, group_size + 1)))
+    return 1.0 - miss / total
+
+
+def group_sizes(main_deck, groups):
+    return {name: sum(main_deck.get(card_id, 0) for card_id in card_ids) for name, card_ids in groups.items()}
+
+
+def groups_overlap(groups):
+    seen = set()
+    for card_ids in groups.values():
+        if seen & set(card_ids): return True
+        seen.update(card_ids)
+    return False
+
+
+def exact_probability(main_deck, groups, requirements, hand_size):
+    """Exact probability that every requirement is met, or None when the required groups overlap."""
+    required = {name: groups[name] for name in requirements}
+    if groups_overlap(required): return None
+    deck_size = sum(main_deck.values())
+    if deck_size == 0: return 0.0
+    hand_size = min(hand_size, deck_size)
+    sizes = group_sizes(main_deck, required); names = list(required)
+    rest = deck_size - sum(sizes.values()); total = comb(deck_size, hand_size); hits = 0
+    for drawn in product(*(range(requirements[name], min(sizes[name], hand_size) + 1) for name in names)):
+        drawn_total = sum(drawn)
+        if drawn_total > hand_size: continue
+        ways = comb(rest, hand_size - drawn_total)
+        for name, count in zip(names, drawn): ways *= comb(sizes[name], count)
+        hits += ways
+    return hits / total
+
+
+def card_odds(main_deck, hand_size, minimum=1):
+    deck_size = sum(main_deck.values())
+    return {card_id: prob_at_least(deck_size, count, hand_size, minimum) for card_id, count in main_deck.items()}
+
+
+def _membership(main_deck, groups, requirements):
+    import numpy as np
+    copies = [card_id for card_id, count in main_deck.items() for _ in range(count)]
+    names = list(requirements)
+    members = np.zeros((len(copies), len(names)), dtype=np.uint8)
+    for column, name in enumerate(names):
+        group = set(groups[name])
+        members[:, column] = [card_id in group for card_id in copies]
+    minimums = np.array([requirements[name] for name in names], dtype=np.int64)
+    return members, minimums
+
+
+def _simulate_batches(members, minimums, hand_size, trials, batch, seed):
+    import numpy as np
+    rng = np.random.default_rng(seed); deck_size = members.shape[0]; hits = 0; done = 0
+    while done < trials:
+        size = min(batch, trials - done)
+        # Shuffling by random keys: the `hand_size` smallest keys of each row are that hand.
+        hands = np.argpartition(rng.random((size, deck_size), dtype=np.float32), hand_size - 1, axis=1)[:, :hand_size]
+        drawn = members[hands].sum(axis=1, dtype=np.int64)
+        hits += int(np.count_nonzero((drawn >= minimums).all(axis=1)))
+        done += size
+    return hits
+
+
+def simulate(main_deck, groups, requirements, hand_size, trials=1_000_000, batch=DEFAULT_BATCH, seed=None, workers=1):
+    """Monte Carlo estimate of the probability that every requirement is met."""
+    import numpy as np
+    deck_size = sum(main_deck.values())
+    if deck_size == 0 or trials <= 0: return 0.0
+    hand_size = min(hand_size, deck_size)
+    members, minimums = _membership(main_deck, groups, requirements)
+    if workers <= 1: return _simulate_batches(members, minimums, hand_size, trials, batch, seed) / trials
+    from concurrent.futures import ProcessPoolExecutor
+    seeds = np.random.SeedSequence(seed).spawn(workers)
+    shares = [trials // workers + (i < trials % workers) for i in range(workers)]
+    with ProcessPoolExecutor(workers) as pool:
+        hits = sum(pool.map(_simulate_batches, [members] * workers, [minimums] * workers, [hand_size] * workers, shares, [batch] * workers, seeds))
+    return hits / trials
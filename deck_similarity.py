@@ -0,0 +1,201 @@
+import hashlib
+import os
+import struct
+import sys
+from array import array
+from collections import Counter
+from itertools import chain
+
+import deck_codec
+
+# Exact and near-duplicate detection for large deck collections.
+# - deck_hash digests the sorted (id, copies) multisets of the main, extra and
+#   side deck, so identical lists are grouped in one pass with a dict.
+# - MinHash signatures over the main + extra deck (one shingle per copy: the
+#   id and which copy it is) estimate the Jaccard similarity of two decks. LSH
+#   banding sorts each band of the signatures once; decks that share a band
+#   value are the only candidates, so neither similarity search nor clustering
+#   compares all pairs. Signatures need NumPy and are computed for a whole deck
+#   set at a time.
+
+NUM_HASHES = 64
+BANDS = 16  # 4 rows per band: pairs above ~0.5 similarity almost always share a band
+DEFAULT_THRESHOLD = 0.5
+_SEED = 20240601
+_EMPTY = 0xFFFFFFFF  # every signature slot of a deck without main/extra cards
+_KEY_MULTIPLIERS = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0xD6E8FEB86659FD93)
+
+
+def _sections_hash(sections):
+    # Each section is hashed as its entry count then the sorted (id, copies) pairs, as little-endian uint32.
+    digest = hashlib.blake2b(digest_size=16)
+    for pairs in sections:
+        values = array("I", chain.from_iterable(sorted(pair for pair in pairs if pair[1] > 0)))
+        if sys.byteorder == "big": values.byteswap()
+        digest.update(struct.pack("<I", len(values) // 2)); digest.update(values)
+    return digest.hexdigest()
+
+
+def deck_hash(main_deck, extra_deck, side_deck):
+    """Canonical digest of a deck: equal for the same cards and copies in each section, in any order."""
+    return _sections_hash(deck.items() for deck in (main_deck, extra_deck, side_deck))
+
+
+def duplicate_groups(hashes):
+    """Indices of decks sharing a hash, for every hash seen more than once, in first-seen order."""
+    groups = {}
+    for index, digest in enumerate(hashes): groups.setdefault(digest, []).append(index)
+    return [indices for indices in groups.values() if len(indices) > 1]
+
+
+class DeckSet:
+    # Decks as flat columns in deck archive layout (see deck_codec.read_archive_columns) plus their names.
+    def __init__(self, names, lengths, ids, counts):
+        self.names = names
+        self.lengths = lengths
+        self.ids = ids
+        self.counts = counts
+        self.starts = array("I", [0])
+        for i in range(1, len(lengths), 4): self.starts.append(self.starts[-1] + sum(lengths[i:i + 3]))
+
+    @classmethod
+    def from_decks(cls, named_decks):
+        """Build from (name, main, extra, side) tuples, e.g. deck_codec.ArchivedDeck."""
+        names = []; lengths = array("H"); ids = array("I"); counts = bytearray()
+        for name, *sections in named_decks:
+            names.append(name); lengths.append(0)
+            for deck in sections: lengths.append(len(deck)); ids.extend(deck.keys()); counts.extend(deck.values())
+        return cls(names, lengths, ids, bytes(counts))
+
+    @classmethod
+    def read(cls, sources):
+        """Every deck in `sources`: deck archives, .ydk files and directories of them (named by relative path)."""
+        parts = []
+        for source in sources:
+            if source.lower().endswith(deck_codec.ARCHIVE_EXT):
+                name_bytes, lengths, ids, counts = deck_codec.read_archive_columns(source); names = []; at = 0
+                for size in lengths[0::4]: names.append(name_bytes[at:at + size].decode("utf-8")); at += size
+                parts.append(cls(names, lengths, ids, counts))
+            else:
+                root = source if os.path.isdir(source) else os.path.dirname(source)
+                parts.append(cls.from_decks((os.path.relpath(path, root), *deck_codec.read_ydk(path)[0]) for path in deck_codec.find_deck_files(source)))
+        if len(parts) == 1: return parts[0]
+        return cls(sum((part.names for part in parts), []), array("H", b"".join(part.lengths.tobytes() for part in parts)),
+                   array("I", b"".join(part.ids.tobytes() for part in parts)), b"".join(part.counts for part in parts))
+
+    def __len__(self):
+        return len(self.names)
+
+    def deck(self, index):
+        at = self.starts[index]; sections = []
+        for size in self.lengths[4 * index + 1:4 * index + 4]:
+            sections.append(dict(zip(self.ids[at:at + size], self.counts[at:at + size]))); at += size
+        return deck_codec.Deck(*sections)
+
+    def hashes(self):
+        ids = self.ids; counts = self.counts; lengths = self.lengths; hashes = []; at = 0
+        for i in range(0, len(lengths), 4):
+            sections = []
+            for size in lengths[i + 1:i + 4]: sections.append(zip(ids[at:at + size], counts[at:at + size])); at += size
+            hashes.append(_sections_hash(sections))
+        return hashes
+
+    def core_cards(self, indices, limit=3):
+        """The main/extra deck cards played by the most decks in `indices`, most common first."""
+        played = Counter()
+        for index in indices:
+            deck = self.deck(index); played.update(deck.main.keys() | deck.extra.keys())
+        return [card_id for card_id, _ in played.most_common(limit)]
+
+    def signatures(self):
+        """(decks, NUM_HASHES) uint32 MinHash signatures; decks without main/extra cards get all _EMPTY."""
+        import numpy as np
+        n = len(self)
+        if not n: return np.zeros((0, NUM_HASHES), dtype=np.uint32)
+        entries = np.frombuffer(self.lengths, dtype=np.uint16).reshape(n, 4)[:, 1:].astype(np.int64).ravel()
+        entry_deck = np.repeat(np.repeat(np.arange(n), 3), entries)
+        kept = np.repeat(np.tile(np.array([True, True, False]), n), entries)  # side deck entries are left out
+        counts = np.frombuffer(self.counts, dtype=np.uint8)[kept].astype(np.int64)
+        ids = np.frombuffer(self.ids, dtype=np.uint32)[kept].astype(np.uint64)
+        # One shingle per copy: the third copy of a card is a different shingle from the first.
+        copy_starts = np.cumsum(counts) - counts
+        nth_copy = np.arange(int(counts.sum())) - np.repeat(copy_starts, counts)
+        shingles = np.repeat(ids, counts) * np.uint64(4) + nth_copy.astype(np.uint64)
+        shingle_deck = np.repeat(entry_deck[kept], counts)
+        sizes = np.bincount(shingle_deck, minlength=n); filled = sizes > 0; starts = (np.cumsum(sizes) - sizes)[filled]
+        # Multiply-shift hashing: the top 31 bits of a * x + b (mod 2**64) for a random odd a.
+        rng = np.random.default_rng(_SEED); a = rng.integers(0, 1 << 63, NUM_HASHES, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        b = rng.integers(0, 1 << 63, NUM_HASHES, dtype=np.uint64); shift = np.uint64(33)
+        signatures = np.full((n, NUM_HASHES), _EMPTY, dtype=np.uint32)
+        if not shingles.size: return signatures
+        with np.errstate(over="ignore"):
+            for k in range(NUM_HASHES): signatures[filled, k] = np.minimum.reduceat((a[k] * shingles + b[k]) >> shift, starts)
+        return signatures
+
+
+class LSHIndex:
+    def __init__(self, signatures, bands=BANDS):
+        import numpy as np
+        self.signatures = signatures
+        self.rows = signatures.shape[1] // bands
+        self.bands = []  # (sorted band keys, deck index for each key)
+        for band in range(bands):
+            keys = self._band_keys(signatures[:, band * self.rows:(band + 1) * self.rows])
+            order = np.argsort(keys, kind="stable"); self.bands.append((keys[order], order))
+
+    @staticmethod
+    def _band_keys(band):
+        # One 64-bit key per deck and band (xor-multiply over the band's rows).
+        import numpy as np
+        keys = np.zeros(band.shape[0], dtype=np.uint64)
+        with np.errstate(over="ignore"):
+            for column in range(band.shape[1]): keys = (keys ^ band[:, column].astype(np.uint64)) * np.uint64(_KEY_MULTIPLIERS[column % len(_KEY_MULTIPLIERS)])
+        return keys
+
+    def similarity(self, indices, signature):
+        return (self.signatures[indices] == signature).mean(axis=1)
+
+    def candidates(self, signature):
+        import numpy as np
+        found = []
+        for band, (keys, order) in enumerate(self.bands):
+            key = self._band_keys(signature[None, band * self.rows:(band + 1) * self.rows])[0]
+            found.append(order[np.searchsorted(keys, key, side="left"):np.searchsorted(keys, key, side="right")])
+        return np.unique(np.concatenate(found)) if found else np.zeros(0, dtype=np.int64)
+
+    def similar(self, signature, limit=10, threshold=0.0):
+        """[(deck index, estimated Jaccard similarity)], most similar first, among the LSH candidates."""
+        import numpy as np
+        if signature[0] == _EMPTY: return []
+        indices = self.candidates(signature)
+        if not indices.size: return []
+        scores = self.similarity(indices, signature); keep = scores >= threshold
+        indices = indices[keep]; scores = scores[keep]; order = np.argsort(-scores, kind="stable")[:limit]
+        return [(int(indices[i]), float(scores[i])) for i in order]
+
+    def clusters(self, threshold=DEFAULT_THRESHOLD):
+        """Connected groups of decks, largest first. Decks sharing a band bucket are linked to the
+        bucket's first deck when their estimated similarity to it is at least `threshold`; decks
+        without main/extra cards stay on their own."""
+        import numpy as np
+        n = self.signatures.shape[0]; edges = []
+        for keys, order in self.bands:
+            if not n: break
+            first = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+            leaders = order[np.repeat(first, np.diff(np.r_[first, n]))]
+            linked = (leaders != order) & (self.signatures[order, 0] != _EMPTY)
+            linked &= (self.signatures[order] == self.signatures[leaders]).mean(axis=1) >= threshold
+            edges.append((order[linked], leaders[linked]))
+        labels = np.arange(n)
+        if edges:
+            u = np.concatenate([edge[0] for edge in edges]); v = np.concatenate([edge[1] for edge in edges])
+            while True:
+                # Min-label propagation with pointer jumping until every edge agrees.
+                low = np.minimum(labels[u], labels[v]); np.minimum.at(labels, u, low); np.minimum.at(labels, v, low)
+                labels = labels[labels]
+                if np.array_equal(labels[u], labels[v]): break
+        groups = np.argsort(labels, kind="stable"); sorted_labels = labels[groups]
+        bounds = np.flatnonzero(np.r_[True, sorted_labels[1:] != sorted_labels[:-1], True])
+        clusters = [groups[bounds[i]:bounds[i + 1]] for i in range(len(bounds) - 1)]
+        clusters.sort(key=len, reverse=True)
+        return clusters
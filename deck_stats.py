@@ -0,0 +1,129 @@
+import csv
+import multiprocessing
+from array import array
+from collections import namedtuple
+
+import deck_codec
+
+# Metagame card usage over large numbers of decks. Usage is kept as columns
+# indexed by card table row (decks that play the card, copies per section), so
+# each worker process folds its share of the decks into a few flat arrays and
+# the parent only adds arrays together. Deck archives are folded straight from
+# their flat id/count columns without building a dict per deck.
+
+SECTIONS = ("main", "extra", "side")
+DEFAULT_CHUNK = 2048
+
+CardUsage = namedtuple("CardUsage", "id decks inclusion_rate average_copies main extra side points points_per_deck")
+CSV_COLUMNS = ("id", "name", "decks", "inclusion_rate", "average_copies", "main", "extra", "side", "points", "points_per_deck")
+
+_worker_row_of_id = None
+_worker_size = 0
+
+
+class UsageTable:
+    def __init__(self, size):
+        self.deck_count = 0
+        self.failed = 0
+        self.unknown_copies = 0
+        self.decks = array("I", bytes(4 * size))
+        self.copies = tuple(array("I", bytes(4 * size)) for _ in SECTIONS)
+
+    def add_deck(self, sections, row_of_id):
+        # `sections`: main, extra and side as iterables of (card_id, copies).
+        rows = set()
+        for copies, section in zip(self.copies, sections):
+            for card_id, count in section:
+                row = row_of_id.get(card_id)
+                if row is None: self.unknown_copies += count; continue
+                copies[row] += count; rows.add(row)
+        for row in rows: self.decks[row] += 1
+        self.deck_count += 1
+
+    def add_columns(self, lengths, ids, counts, row_of_id):
+        # Decks in deck archive layout (see deck_codec.read_archive_columns).
+        at = 0
+        for i in range(0, len(lengths), 4):
+            sections = []
+            for size in lengths[i + 1:i + 4]: sections.append(zip(ids[at:at + size], counts[at:at + size])); at += size
+            self.add_deck(sections, row_of_id)
+
+    def merge(self, other):
+        self.deck_count += other.deck_count; self.failed += other.failed; self.unknown_copies += other.unknown_copies
+        for mine, theirs in zip((self.decks, *self.copies), (other.decks, *other.copies)):
+            for row, value in enumerate(theirs):
+                if value: mine[row] += value
+        return self
+
+
+def _init_worker(ids_bytes):
+    global _worker_row_of_id, _worker_size
+    ids = array("q"); ids.frombytes(ids_bytes)
+    _worker_row_of_id = {card_id: row for row, card_id in enumerate(ids) if card_id}; _worker_size = len(ids)
+
+
+def _usage_of_paths(paths):
+    usage = UsageTable(_worker_size)
+    for path in paths:
+        try: deck, _ = deck_codec.read_ydk(path)
+        except (OSError, UnicodeDecodeError, ValueError): usage.failed += 1; continue
+        usage.add_deck([section.items() for section in deck], _worker_row_of_id)
+    return usage
+
+
+def _usage_of_columns(columns):
+    usage = UsageTable(_worker_size); usage.add_columns(*columns, _worker_row_of_id)
+    return usage
+
+
+def _run_job(job):
+    func, arg = job
+    return func(arg)
+
+
+def _jobs(sources, chunk):
+    ydk_paths = []
+    for source in sources:
+        if source.lower().endswith(deck_codec.ARCHIVE_EXT):
+            _, lengths, ids, counts = deck_codec.read_archive_columns(source); at = 0
+            for first in range(0, len(lengths), 4 * chunk):
+                part = lengths[first:first + 4 * chunk]; size = sum(part) - sum(part[0::4])
+                yield _usage_of_columns, (part, ids[at:at + size], counts[at:at + size]); at += size
+        else: ydk_paths.extend(deck_codec.find_deck_files(source))
+    for first in range(0, len(ydk_paths), chunk): yield _usage_of_paths, ydk_paths[first:first + chunk]
+
+
+def collect_usage(sources, table, workers=None, chunk=DEFAULT_CHUNK, start_method=None):
+    """Card usage over every deck in `sources` (.ydk files, directories of them and deck archives).
+
+    Card ids are mapped to rows of `table`; decks go to `workers` processes in
+    chunks of `chunk` (workers=1 runs in this process), started with
+    `start_method` (the platform default when None). Unreadable .ydk files are
+    counted in `failed`; an unreadable archive raises ValueError or OSError."""
+    ids_bytes = table.ids.tobytes(); usage = UsageTable(len(table))
+    if workers == 1:
+        _init_worker(ids_bytes)
+        for job in _jobs(sources, chunk): usage.merge(_run_job(job))
+        return usage
+    with multiprocessing.get_context(start_method).Pool(workers, initializer=_init_worker, initargs=(ids_bytes,)) as pool:
+        for partial in pool.imap_unordered(_run_job, _jobs(sources, chunk)): usage.merge(partial)
+    return usage
+
+
+def usage_report(usage, table):
+    """CardUsage for every played card, most played first; rates and averages are per deck that plays it."""
+    report = []; total = usage.deck_count or 1
+    for row, decks in enumerate(usage.decks):
+        if not decks: continue
+        main, extra, side = (copies[row] / decks for copies in usage.copies)
+        points = table.points[row]
+        report.append(CardUsage(table.ids[row], decks, decks / total, main + extra + side, main, extra, side, points, points * (main + extra + side)))
+    report.sort(key=lambda usage_row: (-usage_row.decks, usage_row.id))
+    return report
+
+
+def write_csv(f, report, name_of=None):
+    writer = csv.writer(f); writer.writerow(CSV_COLUMNS)
+    for row in report:
+        writer.writerow((row.id, name_of(row.id) if name_of else "", row.decks, f"{row.inclusion_rate:.6f}", f"{row.average_copies:.4f}",
+                         f"{row.main:.4f}", f"{row.extra:.4f}", f"{row.side:.4f}", row.points, f"{row.points_per_deck:.4f}"))
@@ -0,0 +1,338 @@
+import argparse
+import json
+import os
+import sys
+from multiprocessing import Pool
+
+import card_snapshot
+import deck_codec
+import deck_stats
+import genesys_rules
+import point_list
+
+# Headless command-line tools for working with large numbers of deck files.
+#   python genesys_cli.py validate DECK_DIR [--cap 100] [--workers N]
+#   python genesys_cli.py odds DECK_OR_DIR --group starter=ID,ID --require starter [--trials N]
+#   python genesys_cli.py optimize POOL.json [--cap 100] [-o deck.ydk]
+#   python genesys_cli.py rescore DECK_DIR --points NEW.json [--old-points OLD.json] [--cap 100]
+#   python genesys_cli.py pack DECK_DIR -o decks.ydka
+#   python genesys_cli.py ydke DECK.ydk | ydke://... [-o deck.ydk]
+#   python genesys_cli.py search QUERY [--name-key en_name] [--text] [--limit 20]
+#   python genesys_cli.py meta DECK_DIR_OR_ARCHIVE... [--points NEW.json] [--top N] [-o usage.csv]
+#   python genesys_cli.py dedup DECK_DIR_OR_ARCHIVE...
+#   python genesys_cli.py similar DECK.ydk DECK_DIR_OR_ARCHIVE... [--limit 10]
+#   python genesys_cli.py cluster DECK_DIR_OR_ARCHIVE... [--threshold 0.5] [--min-size 2]
+
+_worker_table = None
+_worker_point_cap = None
+_worker_point_lists = None
+
+
+def _init_validate_worker(db_path, point_cap, points_path=None):
+    global _worker_table, _worker_point_cap
+    _worker_table = card_snapshot.read_table(db_path)
+    if points_path: point_list.apply_point_list(_worker_table, point_list.load_point_list(points_path))
+    _worker_point_cap = point_cap
+
+
+def _validate_path(path):
+    try: (main_deck, extra_deck, side_deck), _ = deck_codec.read_ydk(path)
+    except Exception as e: return {"path": path, "legal": False, "error": str(e)}
+    decks = (main_deck, extra_deck, side_deck)
+    issues = genesys_rules.check_deck(main_deck, extra_deck, side_deck, _worker_table, _worker_point_cap)
+    return {
+        "path": path, "legal": not issues,
+        "main": sum(main_deck.values()), "extra": sum(extra_deck.values()), "side": sum(side_deck.values()),
+        "points": genesys_rules.deck_points(decks, _worker_table),
+        "issues": [{"code": issue.code, "detail": issue.detail} for issue in issues],
+    }
+
+
+def _path_missing(path):
+    # find_deck_files yields nothing for a path that is not there; say so instead of reporting on zero decks.
+    if os.path.exists(path): return False
+    print(f"no such file or directory: {path}", file=sys.stderr)
+    return True
+
+
+def run_validate(args):
+    if _path_missing(args.path): return 2
+    paths = deck_codec.find_deck_files(args.path, recursive=not args.no_recursive)
+    db_path = card_snapshot.ensure_snapshot(args.cards)
+    legal_count = 0; out = sys.stdout
+    with Pool(args.workers or None, initializer=_init_validate_worker, initargs=(db_path, args.cap, args.points)) as pool:
+        for result in pool.imap_unordered(_validate_path, paths, chunksize=args.chunksize):
+            legal_count += result["legal"]
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+    out.flush()
+    print(f"{legal_count}/{len(paths)} decks legal", file=sys.stderr)
+    return 0 if legal_count == len(paths) else 1
+
+
+def _init_rescore_worker(db_path, old_points_path, new_points_path):
+    global _worker_point_lists
+    old_points = point_list.load_point_list(old_points_path) if old_points_path else point_list.table_points(card_snapshot.read_table(db_path))
+    _worker_point_lists = (old_points, point_list.load_point_list(new_points_path))
+
+
+def _rescore_path(path):
+    try: decks, _ = deck_codec.read_ydk(path)
+    except Exception as e: return {"path": path, "error": str(e)}
+    old_points, new_points = _worker_point_lists
+    totals = [sum(points.get(card_id, 0) * count for deck in decks for card_id, count in deck.items()) for points in (old_points, new_points)]
+    return {"path": path, "old_points": totals[0], "new_points": totals[1]}
+
+
+def run_rescore(args):
+    if _path_missing(args.path): return 2
+    paths = deck_codec.find_deck_files(args.path, recursive=not args.no_recursive)
+    db_path = card_snapshot.ensure_snapshot(args.cards)
+    over_count = newly_over_count = 0; out = sys.stdout
+    with Pool(args.workers or None, initializer=_init_rescore_worker, initargs=(db_path, args.old_points, args.points)) as pool:
+        for result in pool.imap_unordered(_rescore_path, paths, chunksize=args.chunksize):
+            if "error" not in result:
+                result["over_cap"] = result["new_points"] > args.cap
+                result["went_over"] = result["over_cap"] and result["old_points"] <= args.cap
+                over_count += result["over_cap"]; newly_over_count += result["went_over"]
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+    out.flush()
+    print(f"{over_count}/{len(paths)} decks over the cap of {args.cap}, {newly_over_count} of them newly", file=sys.stderr)
+    return 0
+
+
+def _parse_group(text):
+    name, _, ids = text.partition("=")
+    return name, [int(card_id) for card_id in ids.split(",") if card_id.strip()]
+
+
+def _parse_requirement(text):
+    name, _, minimum = text.partition("=")
+    return name, int(minimum or 1)
+
+
+def run_odds(args):
+    import deck_sim
+    groups = dict(args.group); requirements = dict(args.require)
+    unknown = [name for name in requirements if name not in groups]
+    if unknown:
+        print(f"unknown group(s) in --require: {', '.join(unknown)}", file=sys.stderr); return 2
+    if _path_missing(args.path): return 2
+    for path in deck_codec.find_deck_files(args.path):
+        main_deck = deck_codec.read_ydk(path)[0].main
+        sizes = deck_sim.group_sizes(main_deck, groups); deck_size = sum(main_deck.values())
+        result = {
+            "path": path, "deck_size": deck_size, "hand": args.hand,
+            "cards": {str(card_id): round(p, 6) for card_id, p in deck_sim.card_odds(main_deck, args.hand).items()},
+            "groups": {name: round(deck_sim.prob_at_least(deck_size, size, args.hand), 6) for name, size in sizes.items()},
+        }
+        if requirements:
+            exact = deck_sim.exact_probability(main_deck, groups, requirements, args.hand)
+            result["combo"] = {"exact": exact}
+            if args.trials: result["combo"]["simulated"] = deck_sim.simulate(main_deck, groups, requirements, args.hand, args.trials, seed=args.seed, workers=args.workers)
+        sys.stdout.write(json.dumps(result, ensure_ascii=False) + "\n")
+    return 0
+
+
+def run_optimize(args):
+    import deck_optimizer
+    with open(args.pool, "r", encoding="utf-8") as f: pool = json.load(f)
+    table = card_snapshot.read_table(card_snapshot.ensure_snapshot(args.cards))
+    try:
+        result = deck_optimizer.optimize(
+            table, args.cap, {int(k): int(v) for k, v in pool.get("required", {}).items()},
+            {int(k): float(v) for k, v in pool.get("preferred", {}).items()}, {int(k) for k in pool.get("excluded", [])},
+            main_min=args.main_min, main_max=args.main_max)
+    except ValueError as e:
+        print(f"no legal deck: {e}", file=sys.stderr); return 1
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f: deck_codec.write_ydk(f, result.main_deck, result.extra_deck, {})
+    else: deck_codec.write_ydk(sys.stdout, result.main_deck, result.extra_deck, {})
+    print(f"value {result.value:g}, {result.points} points, main {sum(result.main_deck.values())}, extra {sum(result.extra_deck.values())}", file=sys.stderr)
+    return 0
+
+
+def run_pack(args):
+    if _path_missing(args.path): return 2
+    root = args.path if os.path.isdir(args.path) else os.path.dirname(args.path)
+    decks = (deck_codec.ArchivedDeck(os.path.relpath(path, root), *deck_codec.read_ydk(path)[0]) for path in deck_codec.find_deck_files(args.path))
+    count = deck_codec.write_archive(args.output, decks)
+    print(f"packed {count} decks into {args.output}", file=sys.stderr)
+    return 0
+
+
+def run_ydke(args):
+    if args.source.startswith(deck_codec.YDKE_PREFIX):
+        try: deck, _ = deck_codec.decode_ydke(args.source)
+        except ValueError as e:
+            print(e, file=sys.stderr); return 1
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f: deck_codec.write_ydk(f, *deck)
+        else: deck_codec.write_ydk(sys.stdout, *deck)
+        return 0
+    deck, _ = deck_codec.read_ydk(args.source)
+    print(deck_codec.encode_ydke(*deck))
+    return 0
+
+
+def run_search(args):
+    import card_search
+    card_data = card_snapshot.load_cards(args.cards, args.name_key)
+    search = card_search.CardSearch(card_data.text, card_data.table, card_data.sort_orders)
+    table = card_data.table; names = card_data.text.names(args.name_key)
+    cids = search.search(args.name_key, args.query, args.text)
+    for cid in cids[:args.limit or None]:
+        row = table.row_of_cid[cid]
+        sys.stdout.write(json.dumps({"cid": cid, "id": table.ids[row], "name": names[row], "points": table.points[row]}, ensure_ascii=False) + "\n")
+    print(f"{len(cids)} matching cards", file=sys.stderr)
+    return 0 if cids else 1
+
+
+def run_meta(args):
+    card_data = card_snapshot.load_cards(args.cards, args.name_key); table = card_data.table
+    if args.points: point_list.apply_point_list(table, point_list.load_point_list(args.points))
+    names = card_data.text.names(args.name_key)
+    try: usage = deck_stats.collect_usage(args.paths, table, args.workers or None, args.chunksize)
+    except (OSError, ValueError) as e:
+        print(e, file=sys.stderr); return 1
+    report = deck_stats.usage_report(usage, table)[:args.top or None]
+    name_of = lambda card_id: names[table.row_of_id[card_id]]
+    if args.output:
+        with open(args.output, "w", encoding="utf-8", newline="") as f: deck_stats.write_csv(f, report, name_of)
+    else: deck_stats.write_csv(sys.stdout, report, name_of)
+    print(f"{usage.deck_count} decks, {usage.failed} unreadable, {usage.unknown_copies} copies of unknown cards", file=sys.stderr)
+    return 0
+
+
+def run_dedup(args):
+    import deck_similarity
+    decks = deck_similarity.DeckSet.read(args.paths); hashes = decks.hashes(); groups = deck_similarity.duplicate_groups(hashes)
+    for indices in groups:
+        sys.stdout.write(json.dumps({"hash": hashes[indices[0]], "decks": [decks.names[i] for i in indices]}, ensure_ascii=False) + "\n")
+    print(f"{len(decks)} decks, {sum(len(indices) - 1 for indices in groups)} exact duplicates in {len(groups)} groups", file=sys.stderr)
+    return 0
+
+
+def run_similar(args):
+    import deck_similarity
+    deck, _ = deck_codec.read_ydk(args.deck); decks = deck_similarity.DeckSet.read(args.paths)
+    try: signature = deck_similarity.DeckSet.from_decks([(args.deck, *deck)]).signatures()[0]; index = deck_similarity.LSHIndex(decks.signatures())
+    except ImportError:
+        print("similarity search needs NumPy", file=sys.stderr); return 2
+    digest = deck_similarity.deck_hash(*deck)
+    for i, similarity in index.similar(signature, args.limit, args.threshold):
+        result = {"deck": decks.names[i], "similarity": round(similarity, 4), "duplicate": deck_similarity.deck_hash(*decks.deck(i)) == digest}
+        sys.stdout.write(json.dumps(result, ensure_ascii=False) + "\n")
+    return 0
+
+
+def run_cluster(args):
+    import deck_similarity
+    decks = deck_similarity.DeckSet.read(args.paths)
+    try: clusters = deck_similarity.LSHIndex(decks.signatures()).clusters(args.threshold)
+    except ImportError:
+        print("clustering needs NumPy", file=sys.stderr); return 2
+    card_data = card_snapshot.load_cards(args.cards, args.name_key); names = card_data.text.names(args.name_key); row_of_id = card_data.table.row_of_id
+    shown = [members for members in clusters if len(members) >= args.min_size]
+    for members in shown:
+        core = [names[row_of_id[card_id]] if card_id in row_of_id else str(card_id) for card_id in decks.core_cards(members)]
+        sys.stdout.write(json.dumps({"size": len(members), "core": core, "decks": [decks.names[i] for i in members]}, ensure_ascii=False) + "\n")
+    print(f"{len(decks)} decks in {len(shown)} clusters of {args.min_size} or more", file=sys.stderr)
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="genesys_cli", description="Headless tools for the YGO Genesys deck builder.")
+    parser.add_argument("--cards", default="cards_data.json", help="path to cards_data.json")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    validate = subparsers.add_parser("validate", help="check every .ydk under a directory and stream JSON lines")
+    validate.add_argument("path", help="a .ydk file or a directory of decks")
+    validate.add_argument("--cap", type=int, default=genesys_rules.DEFAULT_POINT_CAP, help="point cap (default: %(default)s)")
+    validate.add_argument("--workers", type=int, default=0, help="worker processes (default: CPU count)")
+    validate.add_argument("--chunksize", type=int, default=64, help="decks handed to a worker at a time")
+    validate.add_argument("--no-recursive", action="store_true", help="do not descend into subdirectories")
+    validate.add_argument("--points", help="point list to score with instead of the card data's point field")
+    validate.set_defaults(func=run_validate)
+
+    rescore = subparsers.add_parser("rescore", help="re-score saved decks against a new point list")
+    rescore.add_argument("path", help="a .ydk file or a directory of decks")
+    rescore.add_argument("--points", required=True, help="the new point list")
+    rescore.add_argument("--old-points", help="the previous point list (default: the card data's point field)")
+    rescore.add_argument("--cap", type=int, default=genesys_rules.DEFAULT_POINT_CAP, help="point cap (default: %(default)s)")
+    rescore.add_argument("--workers", type=int, default=0, help="worker processes (default: CPU count)")
+    rescore.add_argument("--chunksize", type=int, default=64, help="decks handed to a worker at a time")
+    rescore.add_argument("--no-recursive", action="store_true", help="do not descend into subdirectories")
+    rescore.set_defaults(func=run_rescore)
+
+    odds = subparsers.add_parser("odds", help="opening-hand odds for one deck or a directory of decks")
+    odds.add_argument("path", help="a .ydk file or a directory of decks")
+    odds.add_argument("--hand", type=int, default=5, help="opening hand size (default: %(default)s, 6 going second)")
+    odds.add_argument("--group", type=_parse_group, action="append", default=[], metavar="NAME=ID,ID", help="define a named card group")
+    odds.add_argument("--require", type=_parse_requirement, action="append", default=[], metavar="NAME[=MIN]", help="require at least MIN (default 1) cards of a group; all requirements must hold")
+    odds.add_argument("--trials", type=int, default=0, help="also estimate the combo by simulating this many hands (needs NumPy)")
+    odds.add_argument("--workers", type=int, default=1, help="processes used for the simulation")
+    odds.add_argument("--seed", type=int, default=None)
+    odds.set_defaults(func=run_odds)
+
+    optimize = subparsers.add_parser("optimize", help="best main/extra deck under the point cap from a card pool")
+    optimize.add_argument("pool", help='JSON file: {"required": {id: copies}, "preferred": {id: weight}, "excluded": [id]}')
+    optimize.add_argument("--cap", type=int, default=genesys_rules.DEFAULT_POINT_CAP, help="point cap (default: %(default)s)")
+    optimize.add_argument("--main-min", type=int, default=genesys_rules.MAIN_DECK_MIN)
+    optimize.add_argument("--main-max", type=int, default=genesys_rules.MAIN_DECK_MAX)
+    optimize.add_argument("-o", "--output", help="write the deck to this .ydk instead of stdout")
+    optimize.set_defaults(func=run_optimize)
+
+    pack = subparsers.add_parser("pack", help="pack a directory of .ydk files into one deck archive")
+    pack.add_argument("path", help="a .ydk file or a directory of decks")
+    pack.add_argument("-o", "--output", required=True, help=f"archive to write (usually {deck_codec.ARCHIVE_EXT})")
+    pack.set_defaults(func=run_pack)
+
+    ydke = subparsers.add_parser("ydke", help="convert between a .ydk file and a ydke:// URL")
+    ydke.add_argument("source", help="a .ydk file (printed as a URL) or a ydke:// URL (written as .ydk)")
+    ydke.add_argument("-o", "--output", help="write the decoded deck to this .ydk instead of stdout")
+    ydke.set_defaults(func=run_ydke)
+
+    search = subparsers.add_parser("search", help="ranked card search with the GUI's query syntax")
+    search.add_argument("query", help='names in any language, romaji or pinyin, plus filters such as "t:monster p:0-10"')
+    search.add_argument("--name-key", default="cn_name", choices=card_snapshot.NAME_KEYS, help="name shown and used to break ties (default: %(default)s)")
+    search.add_argument("--text", action="store_true", help="also match effect text")
+    search.add_argument("--limit", type=int, default=20, help="results to print, 0 for all (default: %(default)s)")
+    search.set_defaults(func=run_search)
+
+    meta = subparsers.add_parser("meta", help="card usage across many decks as CSV")
+    meta.add_argument("paths", nargs="+", help=f".ydk files, directories of decks or deck archives ({deck_codec.ARCHIVE_EXT})")
+    meta.add_argument("--points", help="point list to report points with instead of the card data's point field")
+    meta.add_argument("--name-key", default="cn_name", choices=card_snapshot.NAME_KEYS, help="name written to the CSV (default: %(default)s)")
+    meta.add_argument("--top", type=int, default=0, help="only the N most played cards")
+    meta.add_argument("--workers", type=int, default=0, help="worker processes (default: CPU count)")
+    meta.add_argument("--chunksize", type=int, default=deck_stats.DEFAULT_CHUNK, help="decks handed to a worker at a time")
+    meta.add_argument("-o", "--output", help="write the CSV here instead of stdout")
+    meta.set_defaults(func=run_meta)
+
+    dedup = subparsers.add_parser("dedup", help="find decks with exactly the same main, extra and side deck")
+    dedup.add_argument("paths", nargs="+", help=f".ydk files, directories of decks or deck archives ({deck_codec.ARCHIVE_EXT})")
+    dedup.set_defaults(func=run_dedup)
+
+    similar = subparsers.add_parser("similar", help="decks closest to one deck (MinHash over main + extra, needs NumPy)")
+    similar.add_argument("deck", help="the .ydk to compare against")
+    similar.add_argument("paths", nargs="+", help=f".ydk files, directories of decks or deck archives ({deck_codec.ARCHIVE_EXT})")
+    similar.add_argument("--limit", type=int, default=10, help="decks to print (default: %(default)s)")
+    similar.add_argument("--threshold", type=float, default=0.0, help="minimum estimated similarity, 0 to 1")
+    similar.set_defaults(func=run_similar)
+
+    cluster = subparsers.add_parser("cluster", help="group near-identical decks into archetypes (needs NumPy)")
+    cluster.add_argument("paths", nargs="+", help=f".ydk files, directories of decks or deck archives ({deck_codec.ARCHIVE_EXT})")
+    cluster.add_argument("--threshold", type=float, default=0.5, help="estimated similarity that links two decks (default: %(default)s)")
+    cluster.add_argument("--min-size", type=int, default=2, help="smallest cluster to print (default: %(default)s)")
+    cluster.add_argument("--name-key", default="cn_name", choices=card_snapshot.NAME_KEYS, help="name used for the core cards (default: %(default)s)")
+    cluster.set_defaults(func=run_cluster)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+from collections import namedtuple
+
+# Genesys construction rules, kept free of any Qt dependency so they can be
+# shared by the deck builder window and the headless command-line tools.
+
+MAIN_DECK_MIN = 40
+MAIN_DECK_MAX = 60
+EXTRA_DECK_MAX = 15
+SIDE_DECK_MAX = 15
+COPY_LIMIT = 3
+DEFAULT_POINT_CAP = 100
+
+# Card type bit flags, parsed once from the `text.types` string of each card.
+MONSTER, SPELL, TRAP, FUSION, SYNCHRO, XYZ, PENDULUM, LINK = (1 << bit for bit in range(8))
+EXTRA_DECK_FLAGS = FUSION | SYNCHRO | XYZ
+FORBIDDEN_FLAGS = PENDULUM | LINK
+TYPE_KEYWORDS = (("怪兽", MONSTER), ("魔法", SPELL), ("陷阱", TRAP), ("融合", FUSION), ("同调", SYNCHRO), ("超量", XYZ), ("灵摆", PENDULUM), ("链接", LINK))
+MAIN_DECK_CATEGORIES = (("monster", MONSTER), ("spell", SPELL), ("trap", TRAP))
+EXTRA_DECK_CATEGORIES = (("fusion", FUSION), ("synchro", SYNCHRO), ("xyz", XYZ))
+
+LegalityIssue = namedtuple("LegalityIssue", "code detail")
+
+
+def card_types(card_data):
+    return card_data.get("text", {}).get("types", "") if card_data else ""
+
+
+def type_flags(types):
+    flags = 0
+    for keyword, flag in TYPE_KEYWORDS:
+        if keyword in types: flags |= flag
+    return flags
+
+
+def is_extra_deck(flags):
+    return bool(flags & EXTRA_DECK_FLAGS)
+
+
+def is_forbidden(flags):
+    return bool(flags & FORBIDDEN_FLAGS)
+
+
+def card_category(flags, categories):
+    return next((category for category, flag in categories if flags & flag), None)
+
+
+def deck_points(decks, table):
+    return sum(table.points_of(card_id) * count for deck in decks for card_id, count in deck.items())
+
+
+def check_deck(main_deck, extra_deck, side_deck, table, point_cap=None):
+    """Return the list of LegalityIssue found in a deck; an empty list means it is legal.
+
+    `table` is the CardTable the card ids are looked up in. Card ids in the `detail`
+    of list-valued issues are reported in first-seen order."""
+    issues = []
+    main_count = sum(main_deck.values()); extra_count = sum(extra_deck.values()); side_count = sum(side_deck.values())
+    if not (MAIN_DECK_MIN <= main_count <= MAIN_DECK_MAX): issues.append(LegalityIssue("main_deck_size", main_count))
+    if extra_count > EXTRA_DECK_MAX: issues.append(LegalityIssue("extra_deck_size", extra_count))
+    if side_count > SIDE_DECK_MAX: issues.append(LegalityIssue("side_deck_size", side_count))
+
+    rows = table.row_of_id; flags = table.flags
+    copies = {}; unknown = []; forbidden = []
+    for deck in (main_deck, extra_deck, side_deck):
+        for card_id, count in deck.items():
+            copies[card_id] = copies.get(card_id, 0) + count
+    for card_id in copies:
+        row = rows.get(card_id)
+        if row is None: unknown.append(card_id)
+        elif flags[row] & FORBIDDEN_FLAGS: forbidden.append(card_id)
+    illegal_main = [card_id for card_id in main_deck if card_id in rows and flags[rows[card_id]] & EXTRA_DECK_FLAGS]
+    illegal_extra = [card_id for card_id in extra_deck if card_id in rows and not flags[rows[card_id]] & EXTRA_DECK_FLAGS]
+
+    for card_id, count in copies.items():
+        if count > COPY_LIMIT: issues.append(LegalityIssue("copy_limit", card_id))
+    if unknown: issues.append(LegalityIssue("unknown_cards", unknown))
+    if forbidden: issues.append(LegalityIssue("forbidden_cards", forbidden))
+    if illegal_main: issues.append(LegalityIssue("extra_in_main", illegal_main))
+    if illegal_extra: issues.append(LegalityIssue("main_in_extra", illegal_extra))
+    if point_cap is not None:
+        total_points = deck_points((main_deck, extra_deck, side_deck), table)
+        if total_points > point_cap: issues.append(LegalityIssue("point_cap", total_points))
+    return issues
+
@@ -0,0 +1,56 @@
+import json
+import os
+
+# Genesys point costs kept in their own file, separate from cards_data.json, so a
+# new list can be dropped in without rebuilding the card database. The file maps
+# card ids to point costs: {"89631139": 0, "14558127": 33, ...}. Cards that are
+# not listed cost 0. Without the file, the `point` field of the card data is used.
+
+POINT_LIST_PATH = "genesys_points.json"
+
+
+def load_point_list(path=POINT_LIST_PATH):
+    """{card_id: points} from a point list file; raises ValueError when it is malformed."""
+    with open(path, "r", encoding="utf-8") as f: data = json.load(f)
+    if isinstance(data, dict) and isinstance(data.get("points"), dict): data = data["points"]
+    if not isinstance(data, dict): raise ValueError("a point list maps card ids to points")
+    points = {}
+    for card_id, value in data.items():
+        if isinstance(value, bool) or not isinstance(value, (int, float, str)): raise ValueError(f"card {card_id}: points must be a number, not {value!r}")
+        try: points[int(card_id)] = int(value)
+        except (ValueError, OverflowError): raise ValueError(f"card {card_id}: {value!r} is not a valid point cost") from None
+    return points
+
+
+def point_list_mtime(path=POINT_LIST_PATH):
+    try: return os.stat(path).st_mtime_ns
+    except OSError: return None
+
+
+def table_points(table):
+    return {card_id: table.points[row] for card_id, row in table.row_of_id.items()}
+
+
+def diff_point_lists(old, new):
+    # {card_id: (old_points, new_points)} for every card whose cost changed.
+    changes = {}
+    for card_id in old.keys() | new.keys():
+        old_points = old.get(card_id, 0); new_points = new.get(card_id, 0)
+        if old_points != new_points: changes[card_id] = (old_points, new_points)
+    return changes
+
+
+def apply_point_list(table, points):
+    """Write `points` into the table in place and return the changes it made."""
+    changes = {}
+    for card_id, row in table.row_of_id.items():
+        new_points = points.get(card_id, 0); old_points = table.points[row]
+        if new_points != old_points:
+            table.points[row] = new_points; changes[card_id] = (old_points, new_points)
+    return changes
+
+
+def apply_changes(table, changes):
+    for card_id, (_, new_points) in changes.items():
+        row = table.row_of_id.get(card_id)
+        if row is not None: table.points[row] = new_points
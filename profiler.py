@@ -0,0 +1,105 @@
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+# Opt-in timing spans and counters for the GUI's hot paths. Set YGO_PROFILE=1
+# (or use Options > Profiling) to record; while disabled each instrumented call
+# costs one attribute check. Spans can be summarized as p50/p95 per name or
+# exported in the Chrome trace format (chrome://tracing, Perfetto).
+
+ENV_VAR = "YGO_PROFILE"
+
+
+class Profiler:
+    def __init__(self, enabled=False, capacity=200_000, samples_per_name=2_000):
+        self.enabled = enabled
+        self.origin_ns = time.perf_counter_ns()
+        self.spans = deque(maxlen=capacity)
+        self.samples_per_name = samples_per_name
+        self.durations = {}
+        self.counters = {}
+        self.lock = threading.Lock()  # spans also arrive from the art decode threads
+
+    def record(self, name, start_ns, end_ns):
+        with self.lock:
+            self.spans.append((name, start_ns, end_ns - start_ns, threading.get_ident()))
+            samples = self.durations.get(name)
+            if samples is None: samples = self.durations[name] = deque(maxlen=self.samples_per_name)
+            samples.append(end_ns - start_ns)
+
+    def span(self, name):
+        return _Span(self, name) if self.enabled else _NULL_SPAN
+
+    def instrument(self, name=None):
+        """Decorator that records a span for every call while the profiler is enabled.
+
+        Qt cannot see through the wrapper's signature, so connect signals that carry
+        arguments to an instrumented slot through a lambda."""
+        def decorate(func):
+            span_name = name or func.__name__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled: return func(*args, **kwargs)
+                start = time.perf_counter_ns()
+                try: return func(*args, **kwargs)
+                finally: self.record(span_name, start, time.perf_counter_ns())
+            return wrapper
+        return decorate
+
+    def count(self, name, amount=1):
+        if not self.enabled: return
+        with self.lock: self.counters[name] = self.counters.get(name, 0) + amount
+
+    def reset(self):
+        with self.lock: self.spans.clear(); self.durations.clear(); self.counters.clear()
+
+    def summary(self):
+        """{name: (calls, p50_ms, p95_ms, max_ms)} over the most recent samples of each span."""
+        result = {}
+        with self.lock: durations = {name: list(samples) for name, samples in self.durations.items()}
+        for name, samples in durations.items():
+            ordered = sorted(samples); n = len(ordered)
+            if not n: continue
+            result[name] = (n, ordered[n // 2] / 1e6, ordered[min(n - 1, int(n * 0.95))] / 1e6, ordered[-1] / 1e6)
+        return result
+
+    def chrome_trace(self):
+        pid = os.getpid(); events = []
+        with self.lock: spans = list(self.spans); counters = dict(self.counters)
+        for name, start_ns, duration_ns, tid in spans:
+            events.append({"name": name, "ph": "X", "ts": (start_ns - self.origin_ns) / 1000, "dur": duration_ns / 1000, "pid": pid, "tid": tid})
+        now = (time.perf_counter_ns() - self.origin_ns) / 1000
+        events.extend({"name": name, "ph": "C", "ts": now, "pid": pid, "args": {name: value}} for name, value in counters.items())
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export_chrome_trace(self, path):
+        with open(path, "w", encoding="utf-8") as f: json.dump(self.chrome_trace(), f)
+
+
+class _Span:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler; self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns(); return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, self.start, time.perf_counter_ns())
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self): return self
+
+    def __exit__(self, *exc): pass
+
+
+_NULL_SPAN = _NullSpan()
+PROFILER = Profiler(enabled=os.environ.get(ENV_VAR, "") not in ("", "0"))
@@ -0,0 +1,53 @@
+import json
+import random
+
+import card_search
+import card_snapshot
+
+WORDS = ["Blue", "Eyes", "White", "Dragon", "Dark", "Magician", "Ash", "Blossom", "Droll", "Lock", "Bird", "Abyss"]
+
+
+def load_search(tmp_path, count=400):
+    rng = random.Random(7); cards = {}
+    for i in range(count):
+        name = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 3)))
+        cards[str(100 + i)] = {"cid": 100 + i, "id": 1000 + i, "cn_name": f"卡{i}", "jp_name": "ドラゴン", "en_name": name,
+                                "point": i % 10, "text": {"types": "[怪兽|效果] 龙/光", "desc": f"{name} effect"}}
+    path = tmp_path / "cards_data.json"; path.write_text(json.dumps(cards, ensure_ascii=False), encoding="utf-8")
+    card_data = card_snapshot.load_cards(str(path), "en_name")
+    return card_data, lambda: card_search.CardSearch(card_data.text, card_data.table, card_data.sort_orders)
+
+
+def test_short_queries_come_out_in_tiers_and_sort_order(tmp_path):
+    card_data, new_search = load_search(tmp_path); search = new_search(); order = card_data.sort_orders["en_name"]
+    haystacks = search.index_for("en_name").haystacks; row_of_cid = card_data.table.row_of_cid; sep = card_search.SEPARATOR
+    for query in ("a", "dr", "ey", "b"):
+        def tier(cid):
+            haystack = haystacks[row_of_cid[cid]]
+            return 0 if sep + query + sep in haystack else 1 if sep + query in haystack else 2
+        expected = sorted((cid for cid in order if query in haystacks[row_of_cid[cid]]), key=tier)
+        assert search.search("en_name", "") == order
+        assert search.search("en_name", query) == expected, query
+
+
+def test_extending_a_query_narrows_the_previous_hits(tmp_path):
+    _, new_search = load_search(tmp_path); search = new_search()
+    for query in ("d", "dr", "dra", "drag", "dragon", "dragonx", "b", "bl", "blue e", "blue eyes"):
+        assert search.search("en_name", query) == new_search().search("en_name", query), query
+    search.search("en_name", "a"); hits = search.last_hits
+    search.search("en_name", "ab"); assert set(search.last_hits) <= set(hits)
+    assert search.search("en_name", "ab t:monster p:0-4") == new_search().search("en_name", "ab t:monster p:0-4")
+
+
+def test_substring_queries_return_only_their_matches(tmp_path):
+    cards = {str(100 + i): {"cid": 100 + i, "id": 1000 + i, "cn_name": f"卡{i:03d}", "en_name": f"Card {i:03d}", "point": 0,
+                            "text": {"types": "[魔法]", "desc": ""}} for i in range(200)}
+    path = tmp_path / "cards_data.json"; path.write_text(json.dumps(cards, ensure_ascii=False), encoding="utf-8")
+    card_data = card_snapshot.load_cards(str(path), "en_name")
+    search = card_search.CardSearch(card_data.text, card_data.table, card_data.sort_orders)
+    names = lambda cids: [card_data.text.names("en_name")[card_data.table.row_of_cid[cid]] for cid in cids]
+    assert names(search.search("en_name", "card 01")) == [f"Card 01{i}" for i in range(10)]
+    assert names(search.search("en_name", "card 012")) == ["Card 012"]
+    assert names(search.search("en_name", "1000")) == []
+    # A typo still finds the card through the trigrams it keeps.
+    assert names(search.search("en_name", "card 0122"))[0] == "Card 012"
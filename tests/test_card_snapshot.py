@@ -0,0 +1,17 @@
+import json
+import sqlite3
+
+import card_snapshot
+
+
+def test_snapshot_checks_close_their_connections(tmp_path, monkeypatch):
+    path = tmp_path / "cards_data.json"
+    path.write_text(json.dumps({"1": {"cid": 1, "id": 11, "cn_name": "卡", "en_name": "Card", "point": 3, "text": {"types": "[魔法]", "desc": ""}}}), encoding="utf-8")
+    opened = []; connect = sqlite3.connect
+    monkeypatch.setattr(sqlite3, "connect", lambda *args, **kwargs: opened.append(connect(*args, **kwargs)) or opened[-1])
+    db_path = card_snapshot.ensure_snapshot(str(path))
+    assert card_snapshot.ensure_snapshot(str(path)) == db_path
+    assert list(card_snapshot.read_table(db_path).points) == [3]
+    for conn in opened:
+        try: conn.execute("SELECT 1"); assert False, "connection left open"
+        except sqlite3.ProgrammingError: pass
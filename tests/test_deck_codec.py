@@ -0,0 +1,40 @@
+import io
+
+import pytest
+
+import deck_codec
+
+DECK = deck_codec.Deck({89631139: 3, 14558127: 2, 1: 1}, {2: 1}, {3: 2})
+
+
+def test_ydke_round_trip():
+    url = deck_codec.encode_ydke(*DECK)
+    assert url.startswith(deck_codec.YDKE_PREFIX)
+    assert deck_codec.decode_ydke(url) == (DECK, {})
+    deck, unknown = deck_codec.decode_ydke(url, known_ids={89631139, 2, 3})
+    assert deck == ({89631139: 3}, {2: 1}, {3: 2}) and unknown == {14558127: 2, 1: 1}
+
+
+@pytest.mark.parametrize("url", ["https://example.com", "ydke://AAAA", "ydke://***!!!", "ydke://AAA=!!!"])
+def test_malformed_ydke_raises_value_error(url):
+    with pytest.raises(ValueError): deck_codec.decode_ydke(url)
+
+
+def test_archive_round_trip(tmp_path):
+    path = str(tmp_path / "decks.ydka")
+    decks = [deck_codec.ArchivedDeck("青眼白龙 / ブルーアイズ", *DECK), deck_codec.ArchivedDeck("", {}, {}, {}), ("ascii", {7: 1}, {}, {})]
+    assert deck_codec.write_archive(path, decks) == 3
+    assert deck_codec.read_archive(path) == [deck_codec.ArchivedDeck(*deck) for deck in decks]
+
+
+@pytest.mark.parametrize("deck", [("big", {1: 256}, {}, {}), ("x" * 70000, {}, {}, {}), ("id", {1 << 32: 1}, {}, {})])
+def test_archive_limits_raise_value_error(tmp_path, deck):
+    with pytest.raises(ValueError, match=repr(deck[0][:40])[1:-1]): deck_codec.write_archive(str(tmp_path / "decks.ydka"), [deck])
+
+
+def test_ydk_round_trip_with_unknown_ids(tmp_path):
+    out = io.StringIO(); deck_codec.write_ydk(out, *DECK)
+    path = tmp_path / "deck.ydk"; path.write_text(out.getvalue(), encoding="utf-8")
+    assert deck_codec.read_ydk(str(path)) == (DECK, {})
+    deck, unknown = deck_codec.read_ydk(str(path), known_ids={89631139, 2})
+    assert deck == ({89631139: 3}, {2: 1}, {}) and unknown == {14558127: 2, 1: 1, 3: 2}
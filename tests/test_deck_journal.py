@@ -0,0 +1,39 @@
+import json
+
+import deck_journal
+
+
+def write_lines(path, records, tail=""):
+    path.write_text("".join(json.dumps(record) + "\n" for record in records) + tail, encoding="utf-8")
+
+
+def test_replay_rebuilds_deck_and_history(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    records = [deck_journal.edit_record(deck_journal.Edit(0, 7, 1)), deck_journal.edit_record(deck_journal.Edit(0, 7, 1)),
+               deck_journal.reset_record(deck_journal.Snapshot(({1: 2}, {}, {3: 1}), "a.ydk", "A")), {"t": "undo"}, {"t": "undo"}]
+    write_lines(path, records, tail='{"t":"ed')
+    read, valid_bytes = deck_journal.read_journal(path)
+    assert len(read) == 5 and deck_journal.intact(path, valid_bytes)
+    session = deck_journal.replay(read, valid_bytes)
+    assert session.snapshot.decks == ({7: 1}, {}, {}) and session.history.can_undo() and session.history.can_redo()
+    assert session.history.redo() == deck_journal.Edit(0, 7, 1)
+
+
+def test_corrupt_journal_is_kept_aside(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    write_lines(path, [deck_journal.edit_record(deck_journal.Edit(1, 5, 1))], tail="not json\n" + json.dumps({"t": "undo"}) + "\n")
+    records, valid_bytes = deck_journal.read_journal(path)
+    assert len(records) == 1 and not deck_journal.intact(path, valid_bytes)
+    kept = deck_journal.set_aside(str(path))
+    assert not path.exists() and "not json" in open(kept, encoding="utf-8").read()
+
+
+def test_journal_writes_and_checkpoints(tmp_path):
+    path = str(tmp_path / "journal.jsonl"); journal = deck_journal.Journal(path)
+    journal.append(deck_journal.edit_record(deck_journal.Edit(0, 9, 1))); assert journal.flush(5)
+    journal.checkpoint(deck_journal.Snapshot(({9: 3}, {}, {}), None, "T")); journal.append({"t": "saved", "path": "x.ydk", "title": "X"})
+    assert journal.flush(5); journal.close()
+    session = deck_journal.replay(*deck_journal.read_journal(path))
+    assert session.snapshot == deck_journal.Snapshot(({9: 3}, {}, {}), "x.ydk", "X") and not session.history.can_undo()
+    journal = deck_journal.Journal(path); journal.close(discard=True)
+    assert not (tmp_path / "journal.jsonl").exists()
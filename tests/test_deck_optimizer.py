@@ -0,0 +1,29 @@
+from array import array
+
+import pytest
+
+pytest.importorskip("numpy")
+
+import deck_optimizer
+import genesys_rules
+from card_table import CardTable
+
+
+def make_table(count):
+    ids = array("q", range(1, count + 1))
+    return CardTable([str(card_id) for card_id in ids], ids, array("i", [1] * count), array("H", [genesys_rules.MONSTER] * count))
+
+
+def test_side_deck_copies_count_towards_copy_limit():
+    table = make_table(20); side_deck = {1: 3, 2: 2}
+    preferred = {card_id: 1.0 for card_id in range(1, 21)}; preferred[1] = preferred[2] = 10.0
+    result = deck_optimizer.optimize(table, 100, preferred=preferred, side_deck=side_deck, reserved_points=5)
+    assert 1 not in result.main_deck and result.main_deck[2] == 1
+    issues = genesys_rules.check_deck(result.main_deck, result.extra_deck, side_deck, table, 100)
+    assert not [issue for issue in issues if issue.code == "copy_limit"]
+
+
+def test_required_copies_are_lowered_by_side_deck_copies():
+    table = make_table(20); preferred = {card_id: 1.0 for card_id in range(1, 21)}
+    result = deck_optimizer.optimize(table, 100, required={3: 3}, preferred=preferred, side_deck={3: 1})
+    assert result.main_deck[3] == 2
@@ -0,0 +1,50 @@
+import random
+
+import pytest
+
+import deck_codec
+import deck_similarity
+
+
+def archetype_decks(rng, base_ids, count, prefix):
+    # Variants of one 40-card list that each swap one card for a card of their own.
+    base = {card_id: 2 for card_id in base_ids}; decks = []
+    for i in range(count):
+        main_deck = dict(base); main_deck.pop(rng.choice(base_ids)); main_deck[base_ids[0] * 1000 + i] = 2
+        decks.append(deck_codec.ArchivedDeck(f"{prefix} {i}", main_deck, {}, {}))
+    return base, decks
+
+
+def test_identical_decks_hash_the_same():
+    deck = ({1: 3, 2: 2}, {3: 1}, {4: 2})
+    reordered = ({2: 2, 1: 3}, {3: 1}, {4: 2})
+    assert deck_similarity.deck_hash(*deck) == deck_similarity.deck_hash(*reordered)
+    assert deck_similarity.deck_hash(*deck) != deck_similarity.deck_hash({1: 3, 2: 2}, {3: 1}, {4: 1})
+    assert deck_similarity.deck_hash(*deck) != deck_similarity.deck_hash({1: 3, 2: 2}, {4: 2}, {3: 1})
+    decks = deck_similarity.DeckSet.from_decks([("a", *deck), ("b", {5: 1}, {}, {}), ("c", *reordered)])
+    assert decks.hashes()[0] == deck_similarity.deck_hash(*deck)
+    assert deck_similarity.duplicate_groups(decks.hashes()) == [[0, 2]]
+
+
+def test_near_duplicates_share_a_bucket():
+    np = pytest.importorskip("numpy")
+    rng = random.Random(3); base, decks = archetype_decks(rng, list(range(1, 21)), 1, "variant")
+    others = [deck_codec.ArchivedDeck(f"other {i}", {card_id: 2 for card_id in rng.sample(range(100, 400), 20)}, {}, {}) for i in range(50)]
+    deck_set = deck_similarity.DeckSet.from_decks(decks + others)
+    signature = deck_similarity.DeckSet.from_decks([("base", base, {}, {})]).signatures()[0]
+    index = deck_similarity.LSHIndex(deck_set.signatures())
+    assert 0 in index.candidates(signature)
+    (best, similarity), *_ = index.similar(signature)
+    assert best == 0 and similarity > 0.7
+    assert np.all(index.similarity(np.arange(1, 51), signature) < 0.3)
+
+
+def test_unrelated_decks_are_not_clustered_together():
+    pytest.importorskip("numpy")
+    rng = random.Random(5)
+    _, first = archetype_decks(rng, list(range(1, 21)), 10, "first")
+    _, second = archetype_decks(rng, list(range(21, 41)), 10, "second")
+    empty = deck_codec.ArchivedDeck("empty", {}, {}, {1: 1})
+    decks = deck_similarity.DeckSet.from_decks(first + second + [empty] * 2)
+    clusters = [sorted(int(i) for i in members) for members in deck_similarity.LSHIndex(decks.signatures()).clusters(0.5)]
+    assert sorted(clusters) == [list(range(10)), list(range(10, 20)), [20], [21]]
@@ -0,0 +1,49 @@
+import random
+from array import array
+
+import deck_codec
+import deck_stats
+from card_table import CardTable
+
+
+def make_table(count):
+    ids = array("q", range(1, count + 1))
+    return CardTable([str(card_id) for card_id in ids], ids, array("i", [card_id % 7 for card_id in ids]), array("H", [1] * count))
+
+
+def write_decks(tmp_path, count):
+    # Half the decks as .ydk files in nested directories, half in an archive; ids above 50 are not in the table.
+    rng = random.Random(7); decks = []
+    for i in range(count):
+        main_deck = {card_id: rng.randint(1, 3) for card_id in rng.sample(range(1, 56), 15)}
+        decks.append(deck_codec.ArchivedDeck(f"deck {i}", main_deck, {rng.randint(1, 50): 1}, {rng.randint(1, 60): 2}))
+    for i, deck in enumerate(decks[:count // 2]):
+        folder = tmp_path / "ydk" / str(i % 3); folder.mkdir(parents=True, exist_ok=True)
+        with open(folder / f"{i}.ydk", "w", encoding="utf-8") as f: deck_codec.write_ydk(f, deck.main, deck.extra, deck.side)
+    (tmp_path / "ydk" / "broken.ydk").write_bytes(b"\xff\xfe#main\n")
+    archive = str(tmp_path / f"decks{deck_codec.ARCHIVE_EXT}"); deck_codec.write_archive(archive, decks[count // 2:])
+    return [str(tmp_path / "ydk"), archive], decks
+
+
+def test_single_and_multiple_workers_agree(tmp_path):
+    sources, decks = write_decks(tmp_path, 60); table = make_table(50)
+    single = deck_stats.collect_usage(sources, table, workers=1, chunk=7)
+    pooled = deck_stats.collect_usage(sources, table, workers=2, chunk=7)
+    assert (single.deck_count, single.failed) == (60, 1)
+    assert (single.deck_count, single.failed, single.unknown_copies) == (pooled.deck_count, pooled.failed, pooled.unknown_copies)
+    assert single.decks == pooled.decks and single.copies == pooled.copies
+    assert deck_stats.usage_report(single, table) == deck_stats.usage_report(pooled, table)
+
+
+def test_usage_counts_decks_copies_and_unknown_ids(tmp_path):
+    sources, decks = write_decks(tmp_path, 20); table = make_table(50)
+    usage = deck_stats.collect_usage(sources, table, workers=1)
+    assert usage.unknown_copies == sum(count for deck in decks for section in deck[1:] for card_id, count in section.items() if card_id > 50)
+    report = {row.id: row for row in deck_stats.usage_report(usage, table)}
+    for card_id in range(1, 51):
+        playing = [deck for deck in decks if any(card_id in section for section in deck[1:])]
+        if not playing: assert card_id not in report; continue
+        row = report[card_id]
+        assert row.decks == len(playing) and row.inclusion_rate == len(playing) / 20
+        assert usage.copies[0][table.row_of_id[card_id]] == sum(deck.main.get(card_id, 0) for deck in playing)
+        assert row.points == card_id % 7
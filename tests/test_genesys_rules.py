@@ -0,0 +1,65 @@
+from array import array
+
+import genesys_cli
+import genesys_rules
+from card_table import CardTable
+from genesys_rules import FUSION, LINK, MONSTER, PENDULUM, SPELL
+
+# Ids 1-30 are main deck monsters worth no points, 31-35 fusions, 36 a Pendulum,
+# 37 a Link and 38 a spell worth 40 points.
+FLAGS = {**{card_id: MONSTER for card_id in range(1, 31)}, **{card_id: MONSTER | FUSION for card_id in range(31, 36)}, 36: MONSTER | PENDULUM, 37: MONSTER | LINK, 38: SPELL}
+
+
+def make_table():
+    ids = array("q", sorted(FLAGS))
+    return CardTable([str(card_id) for card_id in ids], ids, array("i", [40 if card_id == 38 else 0 for card_id in ids]), array("H", [FLAGS[card_id] for card_id in ids]))
+
+
+def legal_main_deck():
+    return {card_id: 2 for card_id in range(1, 21)}
+
+
+def codes(issues):
+    return [issue.code for issue in issues]
+
+
+def test_legal_deck_has_no_issues():
+    assert genesys_rules.check_deck(legal_main_deck(), {31: 3, 32: 1}, {21: 3}, make_table(), 100) == []
+
+
+def test_deck_sizes():
+    table = make_table()
+    assert genesys_rules.check_deck({1: 3}, {}, {}, table) == [genesys_rules.LegalityIssue("main_deck_size", 3)]
+    main_deck = {card_id: 3 for card_id in range(1, 22)}
+    assert codes(genesys_rules.check_deck(main_deck, {31: 3, 32: 3, 33: 3, 34: 3, 35: 3, 36: 1}, {}, table)) == ["main_deck_size", "extra_deck_size", "forbidden_cards", "main_in_extra"]
+
+
+def test_copy_limit_counts_every_section():
+    main_deck = legal_main_deck(); side_deck = {1: 2}
+    assert genesys_rules.check_deck(main_deck, {}, side_deck, make_table()) == [genesys_rules.LegalityIssue("copy_limit", 1)]
+
+
+def test_point_cap_blocks_an_over_cap_deck():
+    table = make_table(); main_deck = legal_main_deck(); main_deck[38] = 2
+    assert genesys_rules.check_deck(main_deck, {}, {38: 1}, table, 100) == [genesys_rules.LegalityIssue("point_cap", 120)]
+    assert genesys_rules.check_deck(main_deck, {}, {}, table, 100) == []
+    assert genesys_rules.check_deck(main_deck, {}, {38: 1}, table) == []
+
+
+def test_pendulum_and_link_cards_are_forbidden():
+    main_deck = legal_main_deck(); main_deck[36] = 1
+    issues = genesys_rules.check_deck(main_deck, {37: 1}, {}, make_table())
+    assert issues == [genesys_rules.LegalityIssue("forbidden_cards", [36, 37]), genesys_rules.LegalityIssue("main_in_extra", [37])]
+
+
+def test_extra_deck_cards_are_kept_out_of_the_main_deck():
+    main_deck = legal_main_deck(); main_deck[31] = 1
+    assert genesys_rules.check_deck(main_deck, {1: 1}, {99: 1}, make_table()) == [
+        genesys_rules.LegalityIssue("unknown_cards", [99]), genesys_rules.LegalityIssue("extra_in_main", [31]), genesys_rules.LegalityIssue("main_in_extra", [1])]
+
+
+def test_cli_fails_on_a_missing_deck_path(tmp_path, capsys):
+    missing = str(tmp_path / "no-such-decks")
+    for argv in (["validate", missing], ["rescore", missing, "--points", missing], ["odds", missing], ["pack", missing, "-o", str(tmp_path / "decks.bin")]):
+        assert genesys_cli.main(argv) == 2
+        assert "no such file or directory" in capsys.readouterr().err
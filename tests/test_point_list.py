@@ -0,0 +1,20 @@
+import json
+
+import pytest
+
+import point_list
+
+
+def write(tmp_path, data):
+    path = tmp_path / "genesys_points.json"; path.write_text(json.dumps(data), encoding="utf-8")
+    return str(path)
+
+
+def test_load_point_list(tmp_path):
+    assert point_list.load_point_list(write(tmp_path, {"89631139": 0, "14558127": "33"})) == {89631139: 0, 14558127: 33}
+    assert point_list.load_point_list(write(tmp_path, {"points": {"1": 5}})) == {1: 5}
+
+
+@pytest.mark.parametrize("data", [{"1": None}, {"1": "many"}, {"1": [3]}, {"1": True}, {"x": 3}, [1, 2], {"1": float("inf")}])
+def test_malformed_point_list_raises_value_error(tmp_path, data):
+    with pytest.raises(ValueError): point_list.load_point_list(write(tmp_path, data))